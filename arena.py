@@ -0,0 +1,408 @@
+from array import array
+from arvore import *
+from classes import Parser, RegexTokenizer, FuncTable
+
+#Tipos de nó da arena; o código de cada tipo é a posição na tupla. Declarator é
+#cada variável de uma Declaration, com a expressão inicial como filho opcional
+KINDS = ('Program', 'FuncDecl', 'FuncCall', 'Statements', 'NoOp', 'Declaration', 'Declarator',
+         'Assign', 'Print', 'If', 'While', 'Return', 'BinOp', 'UnOp', 'IntVal', 'StrVal',
+         'BoolVal', 'Identifier', 'Scanf')
+(PROGRAM, FUNC_DECL, FUNC_CALL, STATEMENTS, NO_OP, DECLARATION, DECLARATOR, ASSIGN, PRINT, IF, WHILE,
+ RETURN, BIN_OP, UN_OP, INT_VAL, STR_VAL, BOOL_VAL, IDENTIFIER, SCANF) = range(len(KINDS))
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+#Operadores de BinOp e UnOp; 0 nos demais nós
+OPERATORS = (None, 'PLUS', 'MINUS', 'MULTIPLY', 'DIVIDE', 'AND', 'OR', 'EQUALS', 'NOT_EQUALS', 'LESS',
+             'GREATER', 'NOT')
+OPERATOR_CODES = {op: code for code, op in enumerate(OPERATORS)}
+#Índice que indica a ausência de filho, irmão, literal ou posição
+NONE = -1
+
+
+class Arena:
+    """AST em colunas array (struct of arrays), sem um objeto Python por nó.
+
+    Cada nó é um índice. kinds guarda o tipo (posição em KINDS) e ops o
+    operador (posição em OPERATORS). first_child e next_sibling ligam os nós:
+    os filhos de um nó são first_child e os next_sibling seguintes, na ordem
+    de children na árvore de objetos. refs indexa literals, a tabela de
+    valores sem repetição: o valor de IntVal, StrVal e BoolVal, o nome de
+    Identifier, FuncCall, Assign e Declarator, o tipo de Declaration e a tupla
+    (tipo, nome, parâmetros) de FuncDecl. starts guarda a posição no código dos
+    nós que o parser registra. root é o Program.
+
+    A árvore é percorrida por índices (children, walk, kind, value), tanto
+    pelo ArenaInterpreter quanto por análises, e tree() reconstrói os objetos.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.ops = array('B')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.refs = array('i')
+        self.starts = array('i')
+        self.literals = []
+        self.root = NONE
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index):
+        return KINDS[self.kinds[index]]
+
+    def op(self, index):
+        return OPERATORS[self.ops[index]]
+
+    def value(self, index):
+        # Literal do nó, ou None
+        ref = self.refs[index]
+        return self.literals[ref] if ref != NONE else None
+
+    def start(self, index):
+        start = self.starts[index]
+        return start if start != NONE else None
+
+    def children(self, index):
+        child = self.first_child[index]
+        next_sibling = self.next_sibling
+        while child != NONE:
+            yield child
+            child = next_sibling[child]
+
+    def walk(self, index=None):
+        # Todos os nós a partir de index (por padrão a raiz), em pré-ordem, sem recursão
+        stack = [self.root if index is None else index]
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        while stack:
+            index = stack.pop()
+            yield index
+            children = []
+            child = first_child[index]
+            while child != NONE:
+                children.append(child)
+                child = next_sibling[child]
+            stack.extend(reversed(children))
+
+    def tree(self, index=None):
+        # Reconstrói a árvore de objetos equivalente ao nó (por padrão, o programa inteiro)
+        index = self.root if index is None else index
+        kind = self.kinds[index]
+        children = [self.tree(child) for child in self.children(index)]
+        value = self.value(index)
+        if kind == PROGRAM or kind == STATEMENTS:
+            node = Program() if kind == PROGRAM else Statements()
+            node.children = children
+        elif kind == FUNC_DECL:
+            func_type, func_name, params = value
+            node = FuncDecl(func_type, func_name, list(params), children[0])
+        elif kind == FUNC_CALL:
+            node = FuncCall(value, children)
+        elif kind == DECLARATION:
+            node = Declaration(value, children)
+        elif kind == DECLARATOR:
+            return value, children[0] if children else None
+        elif kind == ASSIGN:
+            node = Assign(Identifier(value), children[0])
+        elif kind == PRINT or kind == RETURN:
+            node = (Print if kind == PRINT else Return)(children[0])
+        elif kind == IF:
+            node = If(*children)
+        elif kind == WHILE:
+            node = While(*children)
+        elif kind == BIN_OP:
+            node = BinOp(self.op(index), *children)
+        elif kind == UN_OP:
+            node = UnOp(self.op(index), *children)
+        elif kind == NO_OP or kind == SCANF:
+            node = NoOp() if kind == NO_OP else Scanf()
+        else:
+            node = {INT_VAL: IntVal, STR_VAL: StrVal, BOOL_VAL: BoolVal, IDENTIFIER: Identifier}[kind](value)
+        node.start = self.start(index)
+        return node
+
+
+class ArenaBuilder:
+    # Acrescenta nós a uma Arena; os filhos são criados antes dos pais
+
+    def __init__(self):
+        self.arena = Arena()
+        # (tipo, valor) -> índice em literals
+        self.indexes = {}
+
+    def literal(self, value):
+        key = (type(value), value)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = len(self.arena.literals)
+            self.arena.literals.append(value)
+        return index
+
+    def node(self, kind, children=(), op=None, value=None, start=None):
+        arena = self.arena
+        index = len(arena.kinds)
+        arena.kinds.append(kind)
+        arena.ops.append(OPERATOR_CODES[op])
+        arena.first_child.append(children[0] if children else NONE)
+        arena.next_sibling.append(NONE)
+        arena.refs.append(self.literal(value) if value is not None else NONE)
+        arena.starts.append(start if start is not None else NONE)
+        for child, sibling in zip(children, children[1:]):
+            arena.next_sibling[child] = sibling
+        return index
+
+    def add(self, node):
+        # Converte um nó da árvore de objetos (e os filhos) e retorna o índice
+        kind = KIND_CODES.get(type(node).__name__)
+        if kind is None:
+            raise ValueError(f"Cannot store node '{type(node).__name__}' in the arena")
+        if kind == DECLARATION:
+            children = [self.node(DECLARATOR, [self.add(expr)] if expr is not None else (), value=var_name)
+                        for var_name, expr in node.declarations]
+            return self.node(kind, children, value=node.var_type)
+        if kind == ASSIGN:
+            return self.node(kind, [self.add(node.children[1])], value=node.children[0].value)
+        children = [self.add(child) for child in node.children]
+        if kind == FUNC_DECL:
+            value = (node.func_type, node.func_name, tuple(node.params))
+        elif kind == FUNC_CALL:
+            value = node.func_name
+        elif kind in (BIN_OP, UN_OP):
+            return self.node(kind, children, op=node.value, start=node.start)
+        else:
+            value = node.value
+        return self.node(kind, children, value=value, start=node.start)
+
+    def finish(self, children):
+        self.arena.root = self.node(PROGRAM, children)
+        return self.arena
+
+
+class ArenaParser(Parser):
+    """Parser que guarda o programa numa Arena.
+
+    Cada função é convertida assim que é analisada e os objetos dela são
+    descartados, então a árvore de objetos do programa inteiro nunca existe.
+    """
+
+    def parseProgram(self):
+        builder = ArenaBuilder()
+        functions = []
+        #Loopa Até o fim do código
+        while self.tokenizer.next.type != 'EOF':
+            functions.append(builder.add(self.parseFunction()))
+            self.tokenizer.selectNext()
+        #Chama a função main
+        functions.append(builder.add(FuncCall("main", [])))
+        return builder.finish(functions)
+
+
+def parse_arena(code, tokenizer_class=RegexTokenizer):
+    # Analisa o código filtrado e retorna a Arena; os erros são os de Parser.run
+    return ArenaParser(tokenizer_class).run(code)
+
+
+def from_tree(program):
+    # Arena equivalente a uma árvore de objetos já criada (por exemplo, otimizada)
+    builder = ArenaBuilder()
+    return builder.finish([builder.add(child) for child in program.children])
+
+
+#Nós usados só pelos métodos de operação de BinOp e UnOp, que não dependem do nó
+_BIN_OP = BinOp(None, None, None)
+_UN_OP = UnOp(None, None)
+#Valores padrão para inicialização
+DEFAULTS = {'int': 0, 'str': ''}
+
+
+class ArenaInterpreter:
+    """Executa uma Arena com a mesma semântica (valores, tipos e erros) do Evaluate.
+
+    Cada nó é avaliado pelo método do seu tipo, escolhido numa lista pelo
+    código em kinds; nenhum objeto é criado por nó. As operações de BinOp e
+    UnOp são as próprias _handle_* das classes da árvore.
+    """
+
+    def __init__(self, arena, io=None):
+        self.arena = arena
+        self.io = io if io is not None else FuncTable.io
+        # Nome -> índice da FuncDecl, como as functions de uma FuncTable
+        self.functions = {}
+        self.handlers = [getattr(self, 'evaluate' + kind) for kind in KINDS]
+        self.binary = [getattr(_BIN_OP, '_handle_' + op.lower(), None) if op else None for op in OPERATORS]
+        self.unary = [getattr(_UN_OP, '_handle_' + op.lower(), None) if op else None for op in OPERATORS]
+        self.kinds = arena.kinds
+        self.first_child = arena.first_child
+        self.next_sibling = arena.next_sibling
+        self.refs = arena.refs
+        self.literals = arena.literals
+
+    def run(self):
+        return self.evaluate(self.arena.root, SymbolTable())
+
+    def evaluate(self, index, symbol_table):
+        return self.handlers[self.kinds[index]](index, symbol_table)
+
+    def children(self, index):
+        children = []
+        child = self.first_child[index]
+        while child != NONE:
+            children.append(child)
+            child = self.next_sibling[child]
+        return children
+
+    def evaluateProgram(self, index, symbol_table):
+        for child in self.children(index):
+            self.evaluate(child, symbol_table)
+        return None, None
+
+    evaluateStatements = evaluateProgram
+
+    def evaluateNoOp(self, index, symbol_table):
+        return 0
+
+    def evaluateFuncDecl(self, index, symbol_table):
+        func_name = self.literals[self.refs[index]][1]
+        if func_name in self.functions:
+            raise ValueError(f"Function '{func_name}' already declared.")
+        self.functions[func_name] = index
+        return None, None
+
+    def evaluateFuncCall(self, index, symbol_table):
+        func_name = self.literals[self.refs[index]]
+        if func_name not in self.functions:
+            raise ValueError(f"Function '{func_name}' not declared.")
+        func_dec = self.functions[func_name]
+        func_type, _, func_params = self.literals[self.refs[func_dec]]
+        args = self.children(index)
+        if len(args) != len(func_params):
+            raise ValueError(f"Function '{func_name}' expects {len(func_params)} arguments, got {len(args)}.")
+        args_values = [self.evaluate(arg, symbol_table) for arg in args]
+        # Novo escopo com os parâmetros, na ordem da declaração
+        func_symbol_table = SymbolTable()
+        params_values = []
+        for (param_type, param_name), (arg_value, arg_type) in zip(func_params, args_values):
+            if param_type != arg_type:
+                # Conversão implícita de bool para int
+                if param_type == 'int' and arg_type == 'bool':
+                    arg_value = int(arg_value)
+                else:
+                    raise TypeError(f"Type mismatch in function '{func_name}' argument '{param_name}': expected '{param_type}', got '{arg_type}'.")
+            params_values.append(arg_value)
+        for (param_type, param_name), arg_value in zip(func_params, params_values):
+            func_symbol_table.set(param_name, (arg_value, param_type))
+        try:
+            self.evaluate(self.first_child[func_dec], func_symbol_table)
+            if func_type != 'void' and func_name != 'main':
+                raise ValueError(f"Function '{func_name}' should return a value.")
+            return None, None
+        except ReturnException as e:
+            if func_type == 'void' and func_name != 'main':
+                raise ValueError(f"Function '{func_name}' should not return a value.")
+            return e.value, e.value_type
+
+    def evaluateDeclaration(self, index, symbol_table):
+        var_type = self.literals[self.refs[index]]
+        for declarator in self.children(index):
+            var_name = self.literals[self.refs[declarator]]
+            # Checa se a variável já foi declarada
+            if var_name in symbol_table.symbols:
+                raise ValueError(f"Variable '{var_name}' already declared.")
+            expr = self.first_child[declarator]
+            if expr != NONE:
+                value, value_type = self.evaluate(expr, symbol_table)
+                # Checagem de tipo e conversão implícita
+                if value_type != var_type:
+                    if var_type == 'int' and value_type == 'bool':
+                        value = int(value)
+                    else:
+                        raise TypeError(f"Cannot assign '{value_type}' to '{var_type}'.")
+                symbol_table.set(var_name, (value, var_type))
+            else:
+                symbol_table.set(var_name, (DEFAULTS[var_type], var_type))
+        return None, None
+
+    def evaluateAssign(self, index, symbol_table):
+        var_name = self.literals[self.refs[index]]
+        # Checa se a variável foi declarada
+        if var_name not in symbol_table.symbols:
+            raise ValueError(f"Variable '{var_name}' not declared.")
+        value, value_type = self.evaluate(self.first_child[index], symbol_table)
+        expected_type = symbol_table.get(var_name)[1]
+        # Checagem de tipo e conversão implícita
+        if value_type != expected_type:
+            if expected_type == 'int' and value_type == 'bool':
+                value = int(value)
+            else:
+                raise TypeError(f"Cannot assign '{value_type}' to '{expected_type}'.")
+        symbol_table.set(var_name, (value, expected_type))
+        return None, None
+
+    def evaluatePrint(self, index, symbol_table):
+        value, _ = self.evaluate(self.first_child[index], symbol_table)
+        self.io.write(value)
+        return None, None
+
+    def evaluateScanf(self, index, symbol_table):
+        return self.io.readInt(), 'int'
+
+    def evaluateIf(self, index, symbol_table):
+        condition, true_block = self.first_child[index], self.next_sibling[self.first_child[index]]
+        condition_value, condition_type = self.evaluate(condition, symbol_table)
+        # Checa se a condição é do tipo 'bool'
+        if condition_type != 'bool':
+            raise TypeError(f"Condition in 'if' must be 'bool', got '{condition_type}'")
+        if condition_value:
+            self.evaluate(true_block, symbol_table)
+        elif self.next_sibling[true_block] != NONE:
+            self.evaluate(self.next_sibling[true_block], symbol_table)
+        return None, None
+
+    def evaluateWhile(self, index, symbol_table):
+        condition = self.first_child[index]
+        block = self.next_sibling[condition]
+        evaluate = self.evaluate
+        while True:
+            condition_value, condition_type = evaluate(condition, symbol_table)
+            # Checa se a condição é do tipo 'bool'
+            if condition_type != 'bool':
+                raise TypeError(f"Condition in 'while' must be 'bool', got '{condition_type}'")
+            if not condition_value:
+                break
+            evaluate(block, symbol_table)
+        return None, None
+
+    def evaluateReturn(self, index, symbol_table):
+        value, value_type = self.evaluate(self.first_child[index], symbol_table)
+        raise ReturnException(value, value_type)
+
+    def evaluateBinOp(self, index, symbol_table):
+        left = self.first_child[index]
+        left_value, left_type = self.evaluate(left, symbol_table)
+        right_value, right_type = self.evaluate(self.next_sibling[left], symbol_table)
+        handler = self.binary[self.arena.ops[index]]
+        if handler is None:
+            raise ValueError(f"Unknown binary operator: {self.arena.op(index)}")
+        return handler(left_value, left_type, right_value, right_type)
+
+    def evaluateUnOp(self, index, symbol_table):
+        value, value_type = self.evaluate(self.first_child[index], symbol_table)
+        handler = self.unary[self.arena.ops[index]]
+        if handler is None:
+            raise ValueError(f"Unknown unary operator: {self.arena.op(index)}")
+        return handler(value, value_type)
+
+    def evaluateIntVal(self, index, symbol_table):
+        return self.literals[self.refs[index]], 'int'
+
+    def evaluateStrVal(self, index, symbol_table):
+        return self.literals[self.refs[index]], 'str'
+
+    def evaluateBoolVal(self, index, symbol_table):
+        return self.literals[self.refs[index]], 'bool'
+
+    def evaluateIdentifier(self, index, symbol_table):
+        return symbol_table.get(self.literals[self.refs[index]])
+
+    def evaluateDeclarator(self, index, symbol_table):
+        raise ValueError("Declarator is evaluated by its Declaration")
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from ropes import concat
 
 class SymbolTable:
     def __init__(self):
@@ -17,15 +18,24 @@ class SymbolTable:
         self.symbols[name] = value_type
 #Superclasse de todos os nós da árvore
 class Node(ABC):
+    # Atributos em slots; o __dict__ só é criado quando o profiler ou o memo
+    # acrescentam um atributo ao trocar a classe do nó
+    __slots__ = ('value', 'children', 'start', '__dict__')
+
     def __init__(self, value=None):
         self.value = value
-        self.children = []
+        # Folhas compartilham a mesma tupla vazia; nós com filhos atribuem uma lista
+        self.children = ()
+        # Posição do primeiro token do nó no código, usada pelo profiler (If, While, BinOp, FuncCall e FuncDecl)
+        self.start = None
 
     @abstractmethod
     def Evaluate(self):
         pass
 
 class BinOp(Node):
+    __slots__ = ()
+
     def __init__(self, op, left, right):
         super().__init__(op)
         self.children = [left, right]
@@ -33,6 +43,9 @@ class BinOp(Node):
     def Evaluate(self, funct_table,symbol_table):
         left_value, left_type = self.children[0].Evaluate(funct_table,symbol_table)
         right_value, right_type = self.children[1].Evaluate(funct_table,symbol_table)
+        return self.getHandler()(left_value, left_type, right_value, right_type)
+
+    def getHandler(self):
         #Possíveis operações binárias
         operations = {
             'PLUS': self._handle_plus,
@@ -47,14 +60,15 @@ class BinOp(Node):
         }
         #Verifica se a operação é válida
         if self.value in operations:
-            return operations[self.value](left_value, left_type, right_value, right_type)
+            return operations[self.value]
         else:
             raise ValueError(f"Unknown binary operator: {self.value}")
         
     #Funções que realizam as operações binárias
     def _handle_plus(self, left_value, left_type, right_value, right_type):
         if left_type == 'str' or right_type == 'str':
-            return str(left_value) + str(right_value), 'str'
+            # Concatenações longas viram Rope, materializada só ao imprimir ou comparar
+            return concat(left_value, right_value), 'str'
         return left_value + right_value, 'int'
 
     def _handle_minus(self, left_value, left_type, right_value, right_type):
@@ -108,12 +122,17 @@ class BinOp(Node):
 
 
 class UnOp(Node):
+    __slots__ = ()
+
     def __init__(self, op, child):
         super().__init__(op)
         self.children = [child]
 
     def Evaluate(self,funct_table, symbol_table):
         value, value_type = self.children[0].Evaluate(funct_table,symbol_table)
+        return self.getHandler()(value, value_type)
+
+    def getHandler(self):
         #Possíveis operações unárias
         operations = {
             'PLUS': self._handle_plus,
@@ -122,7 +141,7 @@ class UnOp(Node):
         }
         #Verifica se a operação é válida
         if self.value in operations:
-            return operations[self.value](value, value_type)
+            return operations[self.value]
         else:
             raise ValueError(f"Unknown unary operator: {self.value}")
     #Funções que realizam as operações unárias
@@ -148,6 +167,8 @@ class UnOp(Node):
 
 
 class IntVal(Node):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
 
@@ -156,15 +177,29 @@ class IntVal(Node):
         return self.value, 'int'
     
 class StrVal(Node):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value.strip('"'))
     
     def Evaluate(self, funct_table, symbol_table):
         return self.value, 'str'
 
+class BoolVal(Node):
+    __slots__ = ()
+
+    def __init__(self, value):
+        super().__init__(value)
+
+    def Evaluate(self, funct_table, symbol_table):
+        #Valor bool (0 ou 1) produzido pelo otimizador ao dobrar constantes
+        return self.value, 'bool'
+
 
 
 class Identifier(Node):
+    __slots__ = ()
+
     def __init__(self, value):
         super().__init__(value)
 
@@ -174,6 +209,8 @@ class Identifier(Node):
 
 
 class Assign(Node):
+    __slots__ = ()
+
     def __init__(self, identifier, expression):
         super().__init__()
         self.children = [identifier, expression]
@@ -201,6 +238,8 @@ class Assign(Node):
         return None, None 
 
 class Declaration(Node):
+    __slots__ = ('var_type', 'declarations')
+
     def __init__(self, var_type, declarations):
         super().__init__()
         self.var_type = var_type
@@ -238,28 +277,34 @@ class Declaration(Node):
 
 
 class Print(Node):
+    __slots__ = ()
+
     def __init__(self, expression):
         super().__init__()
         self.children = [expression]
 
     def Evaluate(self, funct_table, symbol_table):
         value, type = self.children[0].Evaluate(funct_table, symbol_table)
-        print(value)
+        funct_table.io.write(value)
         return None, None
 
 
 class Scanf(Node):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
     def Evaluate(self, funct_table, symbol_table):
         # Lê um valor int do usuário
-        value = int(input())
+        value = funct_table.io.readInt()
         return value, 'int'
 
 
 
 class Statements(Node):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
         self.children = []
@@ -272,6 +317,8 @@ class Statements(Node):
 
 
 class NoOp(Node):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
 
@@ -281,6 +328,8 @@ class NoOp(Node):
     
 
 class If(Node):
+    __slots__ = ()
+
     def __init__(self, condition, true_block, false_block=None):
         super().__init__()
         self.children = [condition, true_block]
@@ -301,6 +350,8 @@ class If(Node):
         return None, None 
 
 class While(Node):
+    __slots__ = ()
+
     def __init__(self, condition, block):
         super().__init__()
         self.children = [condition, block]
@@ -320,6 +371,8 @@ class While(Node):
 
 
 class Program(Node):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__()
         self.children = []
@@ -330,6 +383,8 @@ class Program(Node):
         return None, None
 
 class FuncDecl(Node):
+    __slots__ = ('func_type', 'func_name', 'params')
+
     def __init__(self, func_type, func_name, args, block):
         super().__init__()
         self.func_type = func_type
@@ -346,16 +401,21 @@ class FuncDecl(Node):
         return None, None
     
 class FuncCall(Node):
+    __slots__ = ('func_name',)
+
     def __init__(self, func_name, args):
         super().__init__()
         self.func_name = func_name
         self.children = args
 
     def Evaluate(self, func_table, symbol_table):
+        func_dec, params_values = self.bindArguments(func_table, symbol_table)
+        return self.invoke(func_table, func_dec, params_values)
+
+    def bindArguments(self, func_table, symbol_table):
         # Pegar a função da tabela de funções
         func_dec = func_table.get(self.func_name)
         func_params = func_dec.params
-        func_block = func_dec.children[0]
         if len(self.children) != len(func_params):
             raise ValueError(f"Function '{self.func_name}' expects {len(func_params)} arguments, got {len(self.children)}.")
         # Evaluate arguments
@@ -363,9 +423,8 @@ class FuncCall(Node):
         for arg in self.children:
             val, val_type = arg.Evaluate(func_table, symbol_table)
             args_values.append((val, val_type))
-        # Criar uma nova tabela de símbolos para a função
-        func_symbol_table = SymbolTable()
-        # Inicializar os parâmetros da função no novo escopo
+        # Valores dos parâmetros, na ordem da declaração
+        params_values = []
         for (param_type, param_name), (arg_value, arg_type) in zip(func_params, args_values):
             if param_type != arg_type:
                 # Conversão implícita de bool para int
@@ -373,6 +432,15 @@ class FuncCall(Node):
                     arg_value = int(arg_value)
                 else:
                     raise TypeError(f"Type mismatch in function '{self.func_name}' argument '{param_name}': expected '{param_type}', got '{arg_type}'.")
+            params_values.append(arg_value)
+        return func_dec, params_values
+
+    def invoke(self, func_table, func_dec, params_values):
+        func_block = func_dec.children[0]
+        # Criar uma nova tabela de símbolos para a função
+        func_symbol_table = SymbolTable()
+        # Inicializar os parâmetros da função no novo escopo
+        for (param_type, param_name), arg_value in zip(func_dec.params, params_values):
             func_symbol_table.set(param_name, (arg_value, param_type))
         # Executa o bloco da função
         try:
@@ -393,6 +461,8 @@ class ReturnException(Exception):
         self.value_type = value_type
 
 class Return(Node):
+    __slots__ = ()
+
     def __init__(self, expression):
         super().__init__()
         self.children = [expression]
@@ -0,0 +1,258 @@
+"""Executa muitos programas em paralelo, um por tarefa de um ProcessPoolExecutor.
+
+Cada programa roda em um processo do pool, com a saída capturada em memória,
+a entrada lida de <programa>.in (se existir) e um limite de tempo. Quando
+existe <programa>.out, a saída precisa ser igual a ele; quando existe
+<programa>.err, a última linha de erro precisa ser igual a ele (programas que
+devem falhar). O resumo pode ser salvo em JSON e em JUnit XML.
+
+Uso: python batch.py [opções] <arquivo.c | diretório>...
+"""
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from classes import *
+from arvore import *
+from cache import *
+from streams import IOContext, MemoryOutput, MemoryInput
+
+# Opções aceitas na linha de comando
+OPCOES = {
+    'jobs': 'número de processos (--jobs=N, padrão: número de núcleos)',
+    'timeout': 'limite de tempo por programa em segundos (--timeout=S, padrão 10)',
+    'engine': 'evaluate (padrão), vm, closure, typecheck, unboxed ou python',
+    'json': 'salva o resultado de cada programa e o resumo em JSON (--json=arquivo)',
+    'junit': 'salva o resultado em JUnit XML (--junit=arquivo)',
+    'no-cache': f'não usa o cache de programas analisados ({CACHE_DIR_NAME}/)',
+}
+ENGINES = ('evaluate', 'vm', 'closure', 'typecheck', 'unboxed', 'python')
+#Limite de tempo padrão por programa, em segundos
+DEFAULT_TIMEOUT = 10.0
+#Situação de cada programa no resumo
+PASSED = 'passed'    # terminou sem erro, ou com a saída e o erro esperados
+FAILED = 'failed'    # saída ou erro diferente do esperado
+ERROR = 'error'      # terminou com erro e não havia erro esperado
+TIMEOUT = 'timeout'  # passou do limite de tempo
+
+
+class ProgramTimeout(BaseException):
+    # BaseException, para que nenhum except Exception do interpretador ou do cache a esconda
+    pass
+
+
+def _expire(signum, frame):
+    raise ProgramTimeout()
+
+
+def fixture(filename, extension):
+    # Conteúdo de <programa>.<extensão>, ou None se o arquivo não existe
+    path = os.path.splitext(filename)[0] + extension
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def parse(filename, use_cache):
+    def analisar():
+        with open(filename, 'r') as file:
+            return Parser().run(PrePro.filter(file.read()))
+    if not use_cache:
+        return analisar()
+    return load_or_parse(ArtifactCache.forSource(filename), source_key(filename), analisar)
+
+
+def prepare(ast, engine, io):
+    """Verifica e compila o programa para o modo de execução e retorna a função que o executa.
+
+    Todo o trabalho que não depende da entrada (verificação de tipos, bytecode,
+    closures, código Python) é feito aqui, então a mesma função pode ser
+    preparada uma vez e executada depois, como no daemon.py. Erros de tipo são
+    levantados aqui, antes de executar.
+    """
+    if engine == 'vm':
+        from vm import VM
+        return VM(ast, io=io).run
+    types = None
+    if engine in ('typecheck', 'unboxed', 'python'):
+        from typechecker import type_check
+        checker, errors = type_check(ast)
+        if errors:
+            raise errors[0]
+        types = checker.types
+    if engine == 'python':
+        from transpiler import compile_program as transpile_program
+        return transpile_program(ast, types, io)
+    if engine != 'evaluate':
+        from closures import compile_program
+        return compile_program(ast, types, io, engine == 'unboxed')
+
+    def evaluate():
+        ast.Evaluate(FuncTable(io), SymbolTable())
+    return evaluate
+
+
+def execute(ast, engine, io):
+    # Executa o programa como main.py faria com a opção correspondente
+    prepare(ast, engine, io)()
+
+
+def run_program(filename, engine, timeout, use_cache):
+    # Roda um programa no processo do pool e retorna o resultado como dicionário
+    output = MemoryOutput()
+    stdin = fixture(filename, '.in')
+    io = IOContext(output, MemoryInput(stdin or ''))
+    result = {'file': filename, 'exit_code': 0, 'stderr': '', 'timed_out': False}
+    # O limite de tempo usa SIGALRM, que só existe em sistemas Unix
+    alarm = timeout and hasattr(signal, 'setitimer')
+    if alarm:
+        signal.signal(signal.SIGALRM, _expire)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        ast = parse(filename, use_cache)
+        if ast:
+            execute(ast, engine, io)
+    except ProgramTimeout:
+        result.update(exit_code=None, timed_out=True, stderr=f"Timed out after {timeout} s")
+    except Exception as error:
+        # Mesma última linha de erro que main.py mostra
+        result.update(exit_code=1, stderr=f"{type(error).__name__}: {error}")
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    result['seconds'] = time.perf_counter() - start
+    result['stdout'] = output.getvalue()
+    result['status'] = status(result, fixture(filename, '.out'), fixture(filename, '.err'))
+    return result
+
+
+def status(result, expected_stdout, expected_error):
+    if result['timed_out']:
+        return TIMEOUT
+    if expected_stdout is not None and result['stdout'] != expected_stdout:
+        return FAILED
+    if expected_error is not None:
+        return PASSED if result['stderr'] == expected_error.strip() else FAILED
+    return PASSED if result['exit_code'] == 0 else ERROR
+
+
+def discover(paths):
+    # Arquivos .c passados diretamente ou encontrados nos diretórios, em ordem
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories[:] = sorted(name for name in subdirectories if name != CACHE_DIR_NAME)
+                files.extend(os.path.join(directory, name) for name in sorted(names) if name.endswith('.c'))
+        else:
+            files.append(path)
+    return files
+
+
+def run_batch(files, engine='evaluate', jobs=None, timeout=DEFAULT_TIMEOUT, use_cache=True):
+    # Executa os programas no pool e retorna os resultados na ordem de files
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_program, filename, engine, timeout, use_cache) for filename in files]
+        for filename, future in zip(files, futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as error:
+                # O processo morreu (falta de memória, estouro da pilha do C)
+                results.append({'file': filename, 'exit_code': None, 'stdout': '', 'timed_out': False,
+                                'stderr': f"{type(error).__name__}: {error}", 'seconds': 0.0, 'status': ERROR})
+    return results
+
+
+def summarize(results, seconds, jobs):
+    counts = {name: 0 for name in (PASSED, FAILED, ERROR, TIMEOUT)}
+    for result in results:
+        counts[result['status']] += 1
+    return {'total': len(results), **counts, 'seconds': seconds, 'jobs': jobs}
+
+
+def junit(results, summary):
+    suite = ElementTree.Element('testsuite', name='batch', tests=str(summary['total']),
+                                failures=str(summary[FAILED]), errors=str(summary[ERROR] + summary[TIMEOUT]),
+                                time=f"{summary['seconds']:.3f}")
+    for result in results:
+        directory, name = os.path.split(result['file'])
+        case = ElementTree.SubElement(suite, 'testcase', classname=directory or '.', name=name,
+                                      time=f"{result['seconds']:.3f}")
+        if result['status'] == FAILED:
+            ElementTree.SubElement(case, 'failure', message='output differs from the expected fixture').text = result['stderr']
+        elif result['status'] == ERROR:
+            error_type = result['stderr'].partition(':')[0]
+            ElementTree.SubElement(case, 'error', type=error_type, message=result['stderr'])
+        elif result['status'] == TIMEOUT:
+            ElementTree.SubElement(case, 'error', type='timeout', message=result['stderr'])
+        ElementTree.SubElement(case, 'system-out').text = result['stdout']
+        if result['stderr']:
+            ElementTree.SubElement(case, 'system-err').text = result['stderr']
+    return ElementTree.ElementTree(suite)
+
+
+def main(argv):
+    # Separa as opções (--nome ou --nome=valor) dos arquivos
+    opcoes = {}
+    argumentos = []
+    for arg in argv:
+        if arg.startswith('--'):
+            nome, _, valor = arg[2:].partition('=')
+            if nome not in OPCOES:
+                print(f"Opção desconhecida: --{nome}")
+                sys.exit(1)
+            opcoes[nome] = valor or True
+        else:
+            argumentos.append(arg)
+
+    if not argumentos:
+        print("Uso: python3 batch.py [opções] <arquivo.c | diretório>...")
+        for nome, descricao in OPCOES.items():
+            print(f"  --{nome:<10} {descricao}")
+        sys.exit(1)
+
+    jobs = opcoes.get('jobs', os.cpu_count() or 1)
+    if jobs is True or not str(jobs).isdigit() or int(jobs) < 1:
+        print("Uso: --jobs=N, com N inteiro positivo")
+        sys.exit(1)
+    jobs = int(jobs)
+    try:
+        timeout = float(opcoes.get('timeout', DEFAULT_TIMEOUT))
+    except ValueError:
+        timeout = -1
+    if timeout < 0:
+        print("Uso: --timeout=S, com S em segundos (0 desliga o limite)")
+        sys.exit(1)
+    engine = opcoes.get('engine', 'evaluate')
+    if engine not in ENGINES:
+        print(f"Uso: --engine=MODO, com MODO em {', '.join(ENGINES)}")
+        sys.exit(1)
+
+    files = discover(argumentos)
+    start = time.perf_counter()
+    results = run_batch(files, engine, jobs, timeout, 'no-cache' not in opcoes)
+    summary = summarize(results, time.perf_counter() - start, jobs)
+
+    for result in results:
+        print(f"{result['status']:<8}{result['seconds']:>9.3f} s  {result['file']}")
+    print(f"{summary['total']} programas em {summary['seconds']:.2f} s com {jobs} processos: "
+          f"{summary[PASSED]} passed, {summary[FAILED]} failed, {summary[ERROR]} error, {summary[TIMEOUT]} timeout")
+
+    if 'json' in opcoes:
+        with open(opcoes['json'], 'w') as file:
+            json.dump({'summary': summary, 'results': results}, file, indent=1)
+    if 'junit' in opcoes:
+        junit(results, summary).write(opcoes['junit'], encoding='utf-8', xml_declaration=True)
+    sys.exit(0 if summary[PASSED] == summary['total'] else 1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1 @@
+"""Benchmarks do compilador. Cada módulo pode ser executado com python -m benchmarks.<nome>."""
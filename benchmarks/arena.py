@@ -0,0 +1,74 @@
+"""Compara a memória por nó da árvore de objetos com a da Arena, e o tempo de execução.
+
+Para cada programa do corpus mede, com tracemalloc, a memória que continua
+alocada depois da análise e o pico durante ela: Parser.run (um objeto por
+nó) e parse_arena (colunas array, com cada função convertida logo depois de
+analisada). Os bytes por nó dividem pelo número de nós da Arena, que conta
+também um nó por variável declarada. Depois mede a execução com
+Node.Evaluate e com o ArenaInterpreter.
+
+Uso: python -m benchmarks.arena [--scale=X] [--only=nome,...]
+"""
+import sys
+import time
+import tracemalloc
+
+from classes import PrePro, Parser, FuncTable
+from arvore import SymbolTable
+from arena import parse_arena, ArenaInterpreter
+from streams import IOContext, MemoryOutput, MemoryInput
+from benchmarks.corpus import CORPUS, generate
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'scale': 1.0, 'only': ''}
+
+
+def allocated(build):
+    # Resultado de build(), bytes que continuam alocados e pico durante a chamada
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def timed(run):
+    output = MemoryOutput()
+    io = IOContext(output, MemoryInput(''))
+    start = time.perf_counter()
+    run(io)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def evaluate(ast, io):
+    ast.Evaluate(FuncTable(io), SymbolTable())
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES:
+            raise SystemExit("Uso: python -m benchmarks.arena [--scale=X] [--only=nome,...]")
+        options[name] = float(value) if name == 'scale' else value
+    names = options['only'].split(',') if options['only'] else list(CORPUS)
+
+    print(f"{'programa':<16}{'nós':>9}{'objetos B/nó':>14}{'pico':>9}{'arena B/nó':>12}{'pico':>9}"
+          f"{'Evaluate':>11}{'Arena':>9}")
+    for name in names:
+        code = PrePro.filter(generate(name, options['scale']))
+        tree, tree_bytes, tree_peak = allocated(lambda: Parser().run(code))
+        arena, arena_bytes, arena_peak = allocated(lambda: parse_arena(code))
+        count = len(arena)
+        tree_time, tree_output = timed(lambda io: evaluate(tree, io))
+        arena_time, arena_output = timed(lambda io: ArenaInterpreter(arena, io).run())
+        if tree_output != arena_output:
+            raise RuntimeError(f"{name}: saídas diferentes")
+        print(f"{name:<16}{count:>9}{tree_bytes / count:>14.1f}{tree_peak / count:>9.1f}"
+              f"{arena_bytes / count:>12.1f}{arena_peak / count:>9.1f}"
+              f"{tree_time:>9.3f} s{arena_time:>7.3f} s")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
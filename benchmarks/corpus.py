@@ -0,0 +1,145 @@
+"""Programas gerados para os benchmarks, um gerador por tipo de carga.
+
+Cada gerador recebe um tamanho e retorna o código-fonte. Os programas rodam sem
+entrada e respeitam as regras da linguagem (declarações fora dos loops,
+condições 'bool'). Uso: python -m benchmarks.corpus <nome> [tamanho]
+"""
+import sys
+
+
+def straight_line(size):
+    # Código linear longo: declarações, atribuições e expressões sem desvios
+    lines = ["void main() {", "  int a = 1;", "  int b = 2;", "  str s = \"x\";"]
+    for n in range(size):
+        lines.append(f"  int v{n} = a * {n % 97} + b - {n % 13};")
+        lines.append(f"  a = v{n} / 128 + (b - {n % 7}) * 2;")
+        lines.append(f"  b = b / 2 + {n % 5};")
+    lines.append("  printf(a + b);")
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def nesting(size):
+    # if/while aninhados em profundidade; cada while executa uma única vez
+    lines = ["void main() {"]
+    for n in range(size):
+        lines.append(f"  int w{n} = 0;")
+    lines.append("  int total = 0;")
+    indent = "  "
+    for n in range(size):
+        if n % 2 == 0:
+            lines.append(f"{indent}if (total > {-1 - n}) {{")
+        else:
+            lines.append(f"{indent}while (w{n} < 1) {{")
+            lines.append(f"{indent}  w{n} = w{n} + 1;")
+        lines.append(f"{indent}  total = total + {n};")
+        indent += "  "
+    for n in reversed(range(size)):
+        indent = indent[:-2]
+        lines.append(f"{indent}}}")
+    lines.append("  printf(total);")
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+def counting_loop(size):
+    # Loop contado com aritmética no corpo
+    return f"""void main() {{
+  int i = 0;
+  int total = 0;
+  int par = 0;
+  while (i < {size}) {{
+    total = total + i * 3 - i / 2;
+    if ((i / 2) * 2 == i) {{
+      par = par + 1;
+    }}
+    i = i + 1;
+  }}
+  printf(total);
+  printf(par);
+}}
+"""
+
+
+def recursion(size):
+    # Recursão dupla no estilo fib
+    return f"""int fib(int n) {{
+  if (n < 2) {{
+    return n;
+  }}
+  return fib(n - 1) + fib(n - 2);
+}}
+
+void main() {{
+  printf(fib({size}));
+}}
+"""
+
+
+def strings(size):
+    # Concatenação repetida de strings, com números convertidos
+    return f"""void main() {{
+  str s = "";
+  str linha = "";
+  int i = 0;
+  while (i < {size}) {{
+    s = s + "ab" + i;
+    linha = "item " + i + ": " + (i * 2);
+    i = i + 1;
+  }}
+  printf(linha);
+  printf(s == "");
+}}
+"""
+
+
+def many_functions(size):
+    # Muitas funções pequenas, cada uma chamada uma vez por main
+    parts = []
+    for n in range(size):
+        parts.append(f"""int f{n}(int x, str nome) {{
+  int y = x * {n % 11 + 1};
+  if (y > {n}) {{
+    y = y - {n};
+  }} else {{
+    y = y + 1;
+  }}
+  return y;
+}}
+""")
+    body = ["void main() {", "  int total = 0;"]
+    for n in range(size):
+        body.append(f"  total = total + f{n}({n % 17}, \"f{n}\");")
+    body.append("  printf(total);")
+    body.append("}")
+    parts.append('\n'.join(body) + '\n')
+    return '\n'.join(parts)
+
+
+#Nome -> (gerador, tamanho padrão)
+CORPUS = {
+    'straight_line': (straight_line, 3000),
+    'nesting': (nesting, 40),
+    'counting_loop': (counting_loop, 20000),
+    'recursion': (recursion, 16),
+    'strings': (strings, 2000),
+    'many_functions': (many_functions, 500),
+}
+
+
+def generate(name, scale=1.0):
+    # Gera o programa name com o tamanho padrão multiplicado por scale
+    generator, size = CORPUS[name]
+    return generator(max(1, int(size * scale)))
+
+
+def main(argv):
+    if not argv or argv[0] not in CORPUS:
+        print(f"Uso: python -m benchmarks.corpus <{'|'.join(CORPUS)}> [tamanho]")
+        sys.exit(1)
+    generator, size = CORPUS[argv[0]]
+    print(generator(int(argv[1]) if len(argv) > 1 else size), end='')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
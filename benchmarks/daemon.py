@@ -0,0 +1,110 @@
+"""Compara a latência de python main.py com a de python client.py atendido pelo daemon.py.
+
+Para cada programa mede, como processos separados e do mesmo jeito que um
+usuário os chamaria: main.py sem cache (inicialização, imports, análise e
+execução), main.py com o cache em disco já preenchido e client.py com o
+daemon já carregado. Os programas são um pequeno que lê a entrada, para o
+caso de muitas entradas para o mesmo programa, e dois do corpus com análise
+mais cara. O relatório mostra a mediana e o menor tempo de cada modo.
+
+Uso: python -m benchmarks.daemon [--runs=N]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'runs': 20}
+BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+#Programa pequeno que depende só da entrada
+SMALL = """int square(int x) {
+  return x * x;
+}
+
+void main() {
+  int n = scanf();
+  int total = 0;
+  while (n > 0) {
+    total = total + square(n);
+    n = n - 1;
+  }
+  printf(total);
+}
+"""
+
+
+def timed(command, stdin, env):
+    start = time.perf_counter()
+    result = subprocess.run(command, input=stdin, capture_output=True, env=env)
+    seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} falhou: {result.stderr.decode()}")
+    return seconds, result.stdout
+
+
+def wait_for(path, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            raise RuntimeError("o daemon não iniciou")
+        time.sleep(0.01)
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value.isdigit() or int(value) < 1:
+            raise SystemExit("Uso: python -m benchmarks.daemon [--runs=N]")
+        options[name] = int(value)
+    runs = options['runs']
+
+    with tempfile.TemporaryDirectory() as directory:
+        programs = {'small': (SMALL, b'100\n'),
+                    'straight_line': (generate('straight_line'), b''),
+                    'many_functions': (generate('many_functions'), b'')}
+        paths = {}
+        for name, (source, _) in programs.items():
+            paths[name] = os.path.join(directory, name + '.c')
+            with open(paths[name], 'w') as file:
+                file.write(source)
+        socket_path = os.path.join(directory, 'daemon.sock')
+        env = dict(os.environ, COMPILADOR_SOCKET=socket_path)
+        python = sys.executable
+        daemon = subprocess.Popen([python, os.path.join(BASE, 'daemon.py'), *paths.values()],
+                                  env=env, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(socket_path, daemon)
+            print(f"{'programa':<16}{'modo':<22}{'mediana':>12}{'mínimo':>12}")
+            for name, path in paths.items():
+                stdin = programs[name][1]
+                modes = {
+                    'main.py --no-cache': [python, os.path.join(BASE, 'main.py'), '--no-cache', path],
+                    'main.py (cache)': [python, os.path.join(BASE, 'main.py'), path],
+                    'client.py (daemon)': [python, os.path.join(BASE, 'client.py'), path],
+                }
+                outputs = set()
+                # Uma execução de aquecimento preenche o cache em disco
+                timed(modes['main.py (cache)'], stdin, env)
+                for mode, command in modes.items():
+                    times = []
+                    for _ in range(runs):
+                        seconds, output = timed(command, stdin, env)
+                        times.append(seconds)
+                        outputs.add(output)
+                    print(f"{name:<16}{mode:<22}{statistics.median(times) * 1000:>9.1f} ms"
+                          f"{min(times) * 1000:>9.1f} ms")
+                if len(outputs) != 1:
+                    raise RuntimeError(f"{name}: saídas diferentes entre os modos")
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+"""Mede a análise e a execução de expressões enormes, com e sem --rebalance.
+
+Gera programas com uma única expressão: uma soma de muitos termos, muitos
+parênteses aninhados e uma cadeia longa de operadores unários. Para cada um
+mede Parser.run (o parser de expressões não usa recursão, então nenhum
+precisa de sys.setrecursionlimit) e a profundidade da árvore. Depois executa
+com Node.Evaluate, que é recursivo: sem rebalanceamento a soma tem a
+profundidade do número de termos e não cabe no limite de recursão, com
+--rebalance tem profundidade log n. Os parênteses e os operadores unários
+não são cadeias de + ou *, então continuam profundos.
+
+Uso: python -m benchmarks.expressions [--terms=N] [--repeats=N]
+"""
+import sys
+import time
+
+from classes import Parser, PrePro, FuncTable
+from arvore import SymbolTable
+from streams import IOContext, MemoryOutput, MemoryInput
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'terms': 100000, 'repeats': 3}
+
+
+def programs(terms):
+    # Nome -> código com uma expressão de tamanho proporcional a terms
+    return {
+        'soma': 'int main() { int x = 3; printf(' + ' + '.join(['x', '1'] * (terms // 2)) + '); }',
+        'parênteses': 'int main() { printf(' + '(' * terms + '1' + ')' * terms + '); }',
+        'unários': 'int main() { printf(' + '- ' * terms + '1); }',
+    }
+
+
+def depth(node):
+    # Profundidade da árvore, sem recursão
+    deepest = 0
+    stack = [(node, 1)]
+    while stack:
+        node, level = stack.pop()
+        deepest = max(deepest, level)
+        stack.extend((child, level + 1) for child in node.children)
+    return deepest
+
+
+def best_time(function, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def evaluate(ast):
+    # Tempo da execução com Node.Evaluate, ou o erro que ela levantou
+    func_table = FuncTable(IOContext(MemoryOutput(), MemoryInput('')))
+    start = time.perf_counter()
+    try:
+        with func_table.io:
+            ast.Evaluate(func_table, SymbolTable())
+    except RecursionError:
+        return 'RecursionError'
+    return f"{time.perf_counter() - start:.3f} s"
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value.isdigit():
+            raise SystemExit("Uso: python -m benchmarks.expressions [--terms=N] [--repeats=N]")
+        options[name] = int(value)
+
+    print(f"{'expressão':<12}{'rebalance':>10}{'análise':>10}{'profundidade':>14}{'Evaluate':>16}")
+    for name, code in programs(options['terms']).items():
+        code = PrePro.filter(code)
+        for rebalance in (False, True):
+            seconds, ast = best_time(lambda: Parser(rebalance=rebalance).run(code), options['repeats'])
+            print(f"{name:<12}{'sim' if rebalance else 'não':>10}{seconds:>8.3f} s{depth(ast):>14}"
+                  f"{evaluate(ast):>16}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,202 @@
+"""Mede PrePro.filter, o tokenizer, Parser.run e a execução de cada programa do corpus.
+
+Cada etapa roda várias vezes; o relatório mostra o menor tempo, a média, o
+desvio padrão relativo, a vazão (MB/s do código-fonte) e o pico de memória
+medido com tracemalloc numa execução separada, para não distorcer os tempos.
+O resultado pode ser salvo em JSON e comparado com um baseline salvo antes:
+uma etapa cujo menor tempo piora mais que o limite conta como regressão e o
+processo termina com código 1.
+
+Uso: python -m benchmarks.harness [--repeats=N] [--scale=X] [--engine=evaluate|vm|closure]
+                                  [--only=nome,...] [--json=arquivo] [--baseline=arquivo]
+                                  [--threshold=X] [--no-memory]
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from classes import PrePro, Parser, FuncTable
+from arvore import SymbolTable
+from streams import IOContext, MemoryOutput, MemoryInput
+from benchmarks.corpus import CORPUS, generate
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {
+    'repeats': 5,
+    'scale': 1.0,
+    'engine': 'evaluate',
+    'only': '',
+    'json': '',
+    'baseline': '',
+    'threshold': 0.10,
+    'no-memory': False,
+}
+ENGINES = ('evaluate', 'vm', 'closure')
+STAGES = ('filter', 'tokenize', 'parse', 'execute')
+
+
+def count_tokens(tokenizer_class, code):
+    tokenizer = tokenizer_class(code)
+    count = 0
+    while tokenizer.next.type != 'EOF':
+        tokenizer.selectNext()
+        count += 1
+    return count
+
+
+def execute(ast, engine):
+    # Executa o programa com a saída em memória e retorna o que ele imprimiu
+    output = MemoryOutput()
+    io = IOContext(output, MemoryInput(''))
+    if engine == 'vm':
+        from vm import VM
+        VM(ast, io=io).run()
+    elif engine == 'closure':
+        from closures import compile_program
+        compile_program(ast, io=io)()
+    else:
+        ast.Evaluate(FuncTable(io), SymbolTable())
+    return output.getvalue()
+
+
+def stages(source, engine):
+    # Funções sem argumentos para cada etapa; as entradas de cada uma são preparadas antes
+    code = PrePro.filter(source)
+    ast = Parser().run(code)
+    tokenizer_class = Parser().tokenizer_class
+    return {
+        'filter': lambda: PrePro.filter(source),
+        'tokenize': lambda: count_tokens(tokenizer_class, code),
+        'parse': lambda: Parser().run(code),
+        'execute': lambda: execute(ast, engine),
+    }
+
+
+def measure(function, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_memory(function):
+    # Pico de memória alocada durante uma execução, em bytes
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(names, options):
+    results = {}
+    for name in names:
+        source = generate(name, options['scale'])
+        entry = {'bytes': len(source), 'stages': {}}
+        for stage, function in stages(source, options['engine']).items():
+            times = measure(function, options['repeats'])
+            best = min(times)
+            mean = statistics.mean(times)
+            stats = {
+                'times': times,
+                'min': best,
+                'mean': mean,
+                'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+                # A execução não processa o código-fonte, então não tem vazão
+                'mb_per_s': len(source) / best / (1024 * 1024) if stage != 'execute' and best > 0 else None,
+                'peak_bytes': None if options['no-memory'] else peak_memory(function),
+            }
+            entry['stages'][stage] = stats
+        results[name] = entry
+    return results
+
+
+def print_results(results):
+    print(f"{'programa':<16}{'etapa':<10}{'mín (ms)':>10}{'média (ms)':>12}{'desvio':>9}{'MB/s':>9}{'pico (KiB)':>12}")
+    for name, entry in results.items():
+        for stage, stats in entry['stages'].items():
+            deviation = stats['stdev'] / stats['mean'] * 100 if stats['mean'] else 0.0
+            throughput = f"{stats['mb_per_s']:.2f}" if stats['mb_per_s'] is not None else '-'
+            peak = f"{stats['peak_bytes'] / 1024:.0f}" if stats['peak_bytes'] is not None else '-'
+            print(f"{name:<16}{stage:<10}{stats['min'] * 1000:>10.2f}{stats['mean'] * 1000:>12.2f}"
+                  f"{deviation:>8.1f}%{throughput:>9}{peak:>12}")
+
+
+def compare(results, baseline, threshold):
+    # Compara os menores tempos com o baseline e retorna as regressões
+    regressions = []
+    print(f"\n{'programa':<16}{'etapa':<10}{'baseline (ms)':>14}{'atual (ms)':>12}{'razão':>8}")
+    for name, entry in results.items():
+        for stage, stats in entry['stages'].items():
+            previous = baseline.get('results', {}).get(name, {}).get('stages', {}).get(stage)
+            if previous is None:
+                continue
+            ratio = stats['min'] / previous['min'] if previous['min'] else float('inf')
+            regression = ratio > 1 + threshold
+            if regression:
+                regressions.append((name, stage, ratio))
+            print(f"{name:<16}{stage:<10}{previous['min'] * 1000:>14.2f}{stats['min'] * 1000:>12.2f}"
+                  f"{ratio:>7.2f}x{'  REGRESSÃO' if regression else ''}")
+    return regressions
+
+
+def parse_options(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=') if arg.startswith('--') else (arg, '', '')
+        if not arg.startswith('--') or name not in OPCOES:
+            raise SystemExit(f"Opção desconhecida: {arg} (opções: {', '.join('--' + option for option in OPCOES)})")
+        default = OPCOES[name]
+        if isinstance(default, bool):
+            options[name] = True
+        elif isinstance(default, int):
+            options[name] = int(value)
+        elif isinstance(default, float):
+            options[name] = float(value)
+        else:
+            options[name] = value
+    if options['engine'] not in ENGINES:
+        raise SystemExit(f"--engine deve ser um de: {', '.join(ENGINES)}")
+    if options['repeats'] < 1:
+        raise SystemExit("--repeats deve ser pelo menos 1")
+    return options
+
+
+def main(argv):
+    options = parse_options(argv)
+    names = options['only'].split(',') if options['only'] else list(CORPUS)
+    for name in names:
+        if name not in CORPUS:
+            raise SystemExit(f"Programa desconhecido: {name} (disponíveis: {', '.join(CORPUS)})")
+    results = run(names, options)
+    print_results(results)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'repeats': options['repeats'],
+            'scale': options['scale'],
+            'engine': options['engine'],
+        },
+        'results': results,
+    }
+    if options['json']:
+        with open(options['json'], 'w') as file:
+            json.dump(report, file, indent=1)
+    if options['baseline']:
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, options['threshold'])
+        if regressions:
+            print(f"\n{len(regressions)} regressões acima de {options['threshold'] * 100:.0f}%")
+            sys.exit(1)
+        print(f"\nsem regressões acima de {options['threshold'] * 100:.0f}%")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
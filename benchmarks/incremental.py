@@ -0,0 +1,152 @@
+"""Compara o IncrementalParser com a análise completa em sequências de edições aleatórias.
+
+Cada edição (inserir ou apagar caracteres, comentários, duplicar ou remover
+uma função, trocar um número) é aplicada com IncrementalParser.edit e o
+resultado é comparado com Parser.run no código filtrado: as árvores precisam
+ser iguais, inclusive as posições dos nós, ou os dois precisam levantar o
+mesmo erro. Edições que quebram o código são desfeitas na maioria das vezes,
+para que a sequência continue passando por código válido. Depois mede a
+latência entre uma edição dentro de uma função e a AST pronta, nos dois modos.
+
+Uso: python -m benchmarks.incremental [--steps=N] [--seed=N] [--size=KB]
+"""
+import random
+import re
+import statistics
+import sys
+import time
+
+from arvore import Node
+from classes import PrePro, Parser
+from incremental import IncrementalParser, function_spans
+from benchmarks.lexer import generate
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'steps': 2000, 'seed': 1, 'size': 256}
+#Caracteres inseridos pelas edições aleatórias
+ALPHABET = 'ab1 \n;+-(){}"=!<'
+
+
+def fields(node):
+    # Atributos do nó: as slots de todas as classes e o __dict__, se foi criado
+    names = [name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ()) if name != '__dict__']
+    values = {name: getattr(node, name) for name in names if hasattr(node, name)}
+    values.update(getattr(node, '__dict__', {}))
+    return values
+
+
+def same(left, right):
+    # Igualdade estrutural das árvores, comparando todos os atributos dos nós
+    if isinstance(left, Node) or isinstance(right, Node):
+        if type(left) is not type(right):
+            return False
+        left, right = fields(left), fields(right)
+        return left.keys() == right.keys() and all(same(value, right[key]) for key, value in left.items())
+    if isinstance(left, (list, tuple)):
+        return type(left) is type(right) and len(left) == len(right) and all(map(same, left, right))
+    return left == right
+
+
+def outcome(parse):
+    # Árvore ou (tipo, mensagem) do erro
+    try:
+        return parse(), None
+    except Exception as error:
+        return None, (type(error).__name__, str(error))
+
+
+def random_edit(rng, source):
+    # Retorna (início, fim, texto) de uma edição aleatória
+    kind = rng.random()
+    position = rng.randrange(len(source) + 1)
+    if kind < 0.25:
+        return position, position, ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 3)))
+    if kind < 0.4:
+        return position, min(len(source), position + rng.randint(1, 4)), ''
+    if kind < 0.5:
+        return position, position, '/* ' + rng.choice(('x', '{', '}', '"')) + ' */'
+    spans = function_spans(source) if '/*' not in source else None
+    if spans and kind < 0.65:
+        # Duplica uma função com outro nome
+        start, end = rng.choice(spans)
+        text = re.sub(r'(\w+)\(', lambda match: match.group(1) + 'x(', source[start:end], count=1)
+        return end, end, text
+    if spans and len(spans) > 1 and kind < 0.7:
+        start, end = rng.choice(spans)
+        return start, end, ''
+    numbers = list(re.finditer(r'\b\d+\b', source))
+    if numbers:
+        match = rng.choice(numbers)
+        return match.start(), match.end(), str(rng.randrange(1000))
+    return position, position, ' '
+
+
+def check(steps, seed, size):
+    rng = random.Random(seed)
+    source = valid = generate(size)
+    incremental = IncrementalParser()
+    incremental.parse(source)
+    reused = parsed = errors = 0
+    for step in range(steps):
+        start, end, text = random_edit(rng, source)
+        edited = source[:start] + text + source[end:]
+        got, got_error = outcome(lambda: incremental.edit(start, end, text))
+        expected, expected_error = outcome(lambda: Parser().run(PrePro.filter(edited)))
+        if got_error != expected_error or (expected is not None and not same(got, expected)):
+            print(f"diferença no passo {step}: edição {start}:{end} -> {text!r}")
+            print(f"  incremental: {got_error}\n  completo:    {expected_error}")
+            return False
+        if expected_error is None:
+            reused += incremental.reused
+            parsed += incremental.parsed
+            source = valid = edited
+            continue
+        errors += 1
+        # Parte das edições que quebram o código continua valendo por um passo;
+        # as demais são desfeitas, voltando ao último código válido
+        source = edited if source == valid and rng.random() < 0.3 else valid
+        incremental.source = source
+    print(f"{steps} edições iguais à análise completa ({errors} com erro de sintaxe); "
+          f"funções reaproveitadas: {reused}, analisadas: {parsed}")
+    return True
+
+
+def latency(size, repeats=50):
+    # Tempo entre uma edição dentro de uma função e a AST pronta
+    source = generate(size)
+    incremental = IncrementalParser()
+    incremental.parse(source)
+    positions = [match.start() for match in re.finditer(r'total = x \* ', source)]
+    rng = random.Random(0)
+    full_times = []
+    incremental_times = []
+    for _ in range(repeats):
+        position = rng.choice(positions)
+        start = time.perf_counter()
+        incremental.edit(position, position, ' ')
+        incremental_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        Parser().run(PrePro.filter(incremental.source))
+        full_times.append(time.perf_counter() - start)
+        # Desfaz a edição para as posições continuarem valendo
+        incremental.edit(position, position + 1, '')
+    full = statistics.median(full_times) * 1000
+    fast = statistics.median(incremental_times) * 1000
+    print(f"código de {len(source) / 1024:.0f} KB: análise completa {full:.2f} ms, "
+          f"incremental {fast:.2f} ms (mediana de {repeats} edições), {full / fast:.1f}x")
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value.isdigit():
+            raise SystemExit(f"Uso: python -m benchmarks.incremental [--steps=N] [--seed=N] [--size=KB]")
+        options[name] = int(value)
+    if not check(options['steps'], options['seed'], 8 * 1024):
+        sys.exit(1)
+    latency(options['size'] * 1024)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,75 @@
+"""Compara a vazão (MB/s) do Tokenizer original com a do RegexTokenizer.
+
+Uso: python -m benchmarks.lexer [tamanho em MB]
+"""
+import sys
+import time
+
+from classes import Tokenizer, RegexTokenizer
+
+FUNCTION = '''
+int soma_{n}(int x, int y) {{
+  str nome = "funcao numero {n}";
+  int total = x * {n} + y;
+  while (total > 100) {{
+    total = total - (y + 1) / 2;
+  }}
+  if (total == {n} && !(x < y)) {{
+    printf(nome + total);
+  }} else {{
+    printf(total);
+  }}
+  return total;
+}}
+'''
+
+
+def generate(size):
+    # Gera um programa com pelo menos size bytes
+    parts = []
+    total = 0
+    n = 0
+    while total < size:
+        part = FUNCTION.format(n=n)
+        parts.append(part)
+        total += len(part)
+        n += 1
+    parts.append("void main() {\n  printf(soma_0(1, 2));\n}\n")
+    return ''.join(parts)
+
+
+def count_tokens(tokenizer_class, source):
+    tokenizer = tokenizer_class(source)
+    count = 0
+    while tokenizer.next.type != 'EOF':
+        tokenizer.selectNext()
+        count += 1
+    return count
+
+
+def measure(tokenizer_class, source, repeats=5):
+    # Retorna o melhor tempo entre as repetições e o número de tokens
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = count_tokens(tokenizer_class, source)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def main(argv):
+    size = float(argv[0]) if argv else 1.0
+    source = generate(int(size * 1024 * 1024))
+    megabytes = len(source) / (1024 * 1024)
+    print(f"código: {megabytes:.2f} MB")
+    results = {}
+    for tokenizer_class in (Tokenizer, RegexTokenizer):
+        elapsed, count = measure(tokenizer_class, source)
+        results[tokenizer_class.__name__] = elapsed
+        print(f"{tokenizer_class.__name__:<15} {count} tokens  {elapsed:.3f} s  {megabytes / elapsed:.2f} MB/s")
+    print(f"ganho: {results['Tokenizer'] / results['RegexTokenizer']:.2f}x")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
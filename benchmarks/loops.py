@@ -0,0 +1,127 @@
+"""Mede laços contados aninhados no interpretador de árvore, com e sem --loops.
+
+Cada programa tem dois ou três while aninhados da forma i = 0; while (i < n)
+{ ...; i = i + 1; }, com expressões que não mudam dentro do laço de dentro
+(n * n + 1, o produto dos contadores de fora). Para cada um executa a mesma
+árvore com Node.Evaluate e depois com install_loops, que troca os laços por
+OptimizedWhile: o contador roda como range e as expressões invariantes são
+calculadas uma vez por execução do laço. Mostra quantos laços foram
+reconhecidos como contados e confere se as saídas são iguais.
+
+Uso: python -m benchmarks.loops [--n=N] [--repeats=N]
+"""
+import sys
+import time
+
+from classes import Parser, PrePro, FuncTable
+from arvore import SymbolTable
+from streams import IOContext, MemoryOutput, MemoryInput
+from loops import install_loops
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'n': 150, 'repeats': 3}
+
+PROGRAMS = {
+    'soma 2 níveis': '''
+int main() {
+    int n = N;
+    int total = 0;
+    int i = 0;
+    int j = 0;
+    while (i < n) {
+        j = 0;
+        while (j < n) {
+            total = total + i * j + (n * n + 1);
+            j = j + 1;
+        }
+        i = i + 1;
+    }
+    printf(total);
+}
+''',
+    'passo -2 e n > i': '''
+int main() {
+    int n = N;
+    int total = 0;
+    int i = n * 2;
+    int j = 0;
+    while (i > 0) {
+        j = 0;
+        while (n > j) {
+            total = total + (i - n) * (i + n) - j;
+            j = j + 1;
+        }
+        i = i - 2;
+    }
+    printf(total);
+}
+''',
+    '3 níveis': '''
+int main() {
+    int n = N / 5;
+    int total = 0;
+    int i = 0;
+    int j = 0;
+    int k = 0;
+    while (i < n) {
+        j = 0;
+        while (j < n) {
+            k = 0;
+            while (k < n) {
+                total = total + i * j * k - (i * n + j);
+                k = k + 1;
+            }
+            j = j + 1;
+        }
+        i = i + 1;
+    }
+    printf(total);
+}
+''',
+}
+
+
+def evaluate(ast):
+    # Executa a árvore e retorna a saída
+    io = IOContext(MemoryOutput(), MemoryInput(''))
+    with io:
+        ast.Evaluate(FuncTable(io), SymbolTable())
+    return io.output.getvalue()
+
+
+def best_time(function, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value.isdigit():
+            raise SystemExit("Uso: python -m benchmarks.loops [--n=N] [--repeats=N]")
+        options[name] = int(value)
+
+    wrong = 0
+    print(f"{'programa':<18}{'Evaluate':>12}{'--loops':>12}{'ganho':>8}{'contados':>10}")
+    for name, code in PROGRAMS.items():
+        code = PrePro.filter(code.replace('N', str(options['n'])))
+        ast = Parser().run(code)
+        plain, expected = best_time(lambda: evaluate(ast), options['repeats'])
+        counted = install_loops(ast)
+        optimized, output = best_time(lambda: evaluate(ast), options['repeats'])
+        if output != expected:
+            wrong += 1
+            print(f"{name}: esperado {expected!r}, recebido {output!r}")
+        print(f"{name:<18}{plain:>10.3f} s{optimized:>10.3f} s{plain / optimized:>7.2f}x{counted:>10}")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
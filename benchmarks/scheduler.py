@@ -0,0 +1,132 @@
+"""Roda milhares de programas num único laço asyncio com o Scheduler e mede o custo das fatias.
+
+Um quarto dos programas lê dois números com scanf de uma QueueInput, que
+uma tarefa alimenta aos poucos; os outros fazem laços de tamanhos
+diferentes, e alguns nunca terminam e são cancelados pelo limite de
+instruções. Uma tarefa mede o maior atraso do laço de eventos (quanto um
+asyncio.sleep de 1 ms passou do previsto): com todos os programas prontos,
+cada um roda uma fatia antes de o laço voltar a essa tarefa, então o atraso
+cresce com o número de programas vezes --slice. Depois compara o tempo total
+com VM.run executando os programas que terminam um depois do outro, sem
+fatias, e confere as saídas.
+
+Uso: python -m benchmarks.scheduler [--programs=N] [--slice=N] [--max-steps=N]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from classes import Parser, PrePro
+from scheduler import Scheduler, QueueInput, DONE, OUT_OF_STEPS
+from streams import IOContext, MemoryOutput, MemoryInput
+from vm import VM
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'programs': 2000, 'slice': 1000, 'max-steps': 200000}
+
+LOOP = 'int main() { int i = 0; int t = 0; while (i < N) { t = t + i; i = i + 1; } printf(t); }'
+FOREVER = 'int main() { int i = 0; while (1 < 2) { i = i + 1; } }'
+INTERACTIVE = 'int main() { int a = scanf(); int b = scanf(); printf(a * b); }'
+
+
+def parse(source):
+    return Parser().run(PrePro.filter(source))
+
+
+async def lag(state):
+    # Maior atraso de um sleep de 1 ms enquanto os programas rodam
+    while not state['done']:
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        state['lag'] = max(state['lag'], time.perf_counter() - start - 0.001)
+
+
+async def feed(inputs, rng):
+    # Entrega as linhas de cada programa interativo em momentos diferentes
+    for queue, first, second in inputs:
+        await asyncio.sleep(rng.random() * 0.001)
+        queue.feed(f"{first}\n")
+        queue.feed(f"{second}\n")
+        queue.close()
+
+
+async def scheduled(cases, options):
+    scheduler = Scheduler(options['slice'], options['max-steps'])
+    rng = random.Random(1)
+    inputs = []
+    programs = []
+    for kind, ast, value in cases:
+        if kind == 'interactive':
+            queue = QueueInput()
+            inputs.append((queue, value, value + 1))
+            programs.append(scheduler.add(ast, input=queue))
+        else:
+            programs.append(scheduler.add(ast))
+    state = {'done': False, 'lag': 0.0}
+    watcher = asyncio.ensure_future(lag(state))
+    start = time.perf_counter()
+    await asyncio.gather(scheduler.run(), feed(inputs, rng))
+    elapsed = time.perf_counter() - start
+    state['done'] = True
+    await watcher
+    return programs, elapsed, state['lag']
+
+
+def expected(kind, value):
+    if kind == 'loop':
+        return f"{value * (value - 1) // 2}\n"
+    if kind == 'interactive':
+        return f"{value * (value + 1)}\n"
+    return None
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value.isdigit():
+            raise SystemExit("Uso: python -m benchmarks.scheduler [--programs=N] [--slice=N] [--max-steps=N]")
+        options[name] = int(value)
+
+    rng = random.Random(0)
+    forever = parse(FOREVER)
+    interactive = parse(INTERACTIVE)
+    cases = []
+    for index in range(options['programs']):
+        if index % 4 == 0:
+            cases.append(('interactive', interactive, index))
+        elif index % 50 == 1:
+            cases.append(('forever', forever, None))
+        else:
+            size = rng.randint(10, 2000)
+            cases.append(('loop', parse(LOOP.replace('N', str(size))), size))
+
+    programs, elapsed, worst_lag = asyncio.run(scheduled(cases, options))
+    wrong = 0
+    for (kind, _, value), program in zip(cases, programs):
+        status = OUT_OF_STEPS if kind == 'forever' else DONE
+        if program.status != status or (status == DONE and program.output != expected(kind, value)):
+            wrong += 1
+    steps = sum(program.steps for program in programs)
+    print(f"{len(programs)} programas, {steps} instruções em {elapsed:.2f} s "
+          f"({steps / elapsed / 1e6:.2f} M instruções/s), {wrong} errados")
+    print(f"fatias: {sum(program.slices for program in programs)}, esperas por entrada: "
+          f"{sum(program.waits for program in programs)}, maior atraso do laço: {worst_lag * 1000:.1f} ms")
+
+    # Os mesmos programas que terminam, um depois do outro e sem fatias
+    start = time.perf_counter()
+    for kind, ast, value in cases:
+        if kind != 'forever':
+            stdin = f"{value}\n{value + 1}\n" if kind == 'interactive' else ''
+            VM(ast, io=IOContext(MemoryOutput(), MemoryInput(stdin))).run()
+    sequential = time.perf_counter() - start
+    finished = sum(program.steps for program, (kind, _, _) in zip(programs, cases) if kind != 'forever')
+    print(f"VM.run em sequência (sem os que não terminam): {finished} instruções em {sequential:.2f} s "
+          f"({finished / sequential / 1e6:.2f} M instruções/s)")
+    if wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
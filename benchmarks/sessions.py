@@ -0,0 +1,132 @@
+"""Roda centenas de programas em paralelo em threads, cada um na sua Session, e confere as saídas.
+
+Todos os programas declaram as mesmas funções (f, label e main) com uma
+constante diferente e leem um número diferente do scanf, então qualquer
+estado compartilhado entre as execuções (uma função de outro programa, a
+entrada ou a saída de outra sessão) aparece como uma saída errada ou como
+"already declared". Os programas são distribuídos entre os modos de
+execução e rodam num ThreadPoolExecutor, com o intervalo de troca de threads
+reduzido para que as execuções se intercalem mais. Depois, uma mesma árvore
+já analisada é executada por várias sessões ao mesmo tempo. Termina com
+código 1 se alguma saída estiver errada.
+
+Uso: python -m benchmarks.sessions [--programs=N] [--threads=N] [--engine=MODO|all]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import ENGINES
+from session import Session
+
+#Opções aceitas na linha de comando e seus valores padrão
+OPCOES = {'programs': 400, 'threads': 16, 'engine': 'all'}
+
+PROGRAM = '''
+int f(int n) {
+    int total = 0;
+    int i = 0;
+    while (i < n) {
+        total = total + i * K;
+        i = i + 1;
+    }
+    return total;
+}
+
+str label(int n) {
+    if (n > K) {
+        return "grande";
+    } else {
+        return "pequeno";
+    }
+}
+
+int main() {
+    int n = scanf();
+    printf(f(n));
+    printf(label(n));
+    printf("k=" + K);
+    return 0;
+}
+'''
+
+
+def program(index):
+    # Código, entrada e saída esperada do programa index
+    constant = index % 97 + 1
+    n = index % 50 + 20
+    source = PROGRAM.replace('K', str(constant))
+    expected = f"{constant * n * (n - 1) // 2}\n{'grande' if n > constant else 'pequeno'}\nk={constant}\n"
+    return source, f"{n}\n", expected
+
+
+def run(index, engine):
+    # Executa o programa index numa sessão nova e retorna (index, modo, saída ou erro, esperado)
+    source, stdin, expected = program(index)
+    session = Session(engine, stdin)
+    try:
+        session.run(source)
+        output = session.output
+    except Exception as error:
+        output = f"{type(error).__name__}: {error}"
+    return index, engine, output, expected
+
+
+def run_shared(ast, index):
+    # Executa a árvore compartilhada numa sessão nova, com a entrada do programa index
+    _, stdin, expected = program(index)
+    session = Session('evaluate', stdin)
+    try:
+        session.execute(ast)
+        output = session.output
+    except Exception as error:
+        output = f"{type(error).__name__}: {error}"
+    return index, 'evaluate', output, expected
+
+
+def check(results):
+    # Mostra as saídas erradas e retorna quantas foram
+    wrong = 0
+    for index, engine, output, expected in results:
+        if output != expected:
+            wrong += 1
+            print(f"programa {index} ({engine}): esperado {expected!r}, recebido {output!r}")
+    return wrong
+
+
+def main(argv):
+    options = dict(OPCOES)
+    for arg in argv:
+        name, _, value = arg[2:].partition('=')
+        if not arg.startswith('--') or name not in OPCOES or not value:
+            raise SystemExit("Uso: python -m benchmarks.sessions [--programs=N] [--threads=N] [--engine=MODO|all]")
+        options[name] = value if name == 'engine' else int(value)
+    engines = ENGINES if options['engine'] == 'all' else (options['engine'],)
+    if any(engine not in ENGINES for engine in engines):
+        raise SystemExit(f"Uso: --engine=MODO, com MODO em {', '.join(ENGINES)} ou all")
+    count = options['programs']
+
+    # Troca de thread mais frequente, para intercalar as execuções
+    sys.setswitchinterval(1e-5)
+    with ThreadPoolExecutor(options['threads']) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(run, range(count), [engines[i % len(engines)] for i in range(count)]))
+        elapsed = time.perf_counter() - start
+        wrong = check(results)
+        print(f"{count} programas em {options['threads']} threads ({', '.join(engines)}): "
+              f"{count - wrong} corretos, {wrong} errados, {elapsed:.2f} s")
+
+        # A mesma árvore em várias sessões ao mesmo tempo; os programas 97 * i têm todos a mesma constante
+        source, _, _ = program(0)
+        ast = Session().parse(source)
+        shared = [97 * index for index in range(count)]
+        results = list(pool.map(lambda index: run_shared(ast, index), shared))
+        shared_wrong = check(results)
+        print(f"árvore compartilhada por {len(shared)} sessões: {len(shared) - shared_wrong} corretas, "
+              f"{shared_wrong} erradas")
+    if wrong or shared_wrong:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
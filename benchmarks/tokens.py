@@ -0,0 +1,127 @@
+"""Mede a memória por token e o tempo do TokenBuffer contra os tokens como objetos.
+
+Para guardar todos os tokens de um código (para olhar adiante ou voltar sem
+reconhecer de novo), compara, com tracemalloc: uma lista de Tokens como eram
+antes, com __dict__; uma lista de Tokens com __slots__; e um TokenBuffer. Nas
+listas cada token tem os próprios objetos de valor (o texto recortado pelo
+tokenizer); o TokenBuffer guarda cada valor diferente uma vez. Depois compara
+o tempo de Parser.run com o RegexTokenizer e com o BufferTokenizer, e confere
+o retrocesso do BufferTokenizer: Parser.speculate tenta dois comandos, o
+segundo com erro de sintaxe, volta ao início e analisa só o primeiro, que
+precisa sair igual, com as mesmas cadeias e declarações anotadas para o
+rebalanceamento, a uma análise que nunca tentou o comando errado.
+
+Uso: python -m benchmarks.tokens [tamanho em MB]
+"""
+import sys
+import time
+import tracemalloc
+
+from classes import Parser, RegexTokenizer, BufferTokenizer, TokenBuffer, Token
+from optimizer import dump
+from benchmarks.lexer import generate
+
+
+class DictToken:
+    # Token como era antes do __slots__, para comparação
+    def __init__(self, token_type, value, start=None, end=None):
+        self.type = token_type
+        self.value = value
+        self.start = start
+        self.end = end
+
+
+def all_tokens(source, token_class):
+    # Todos os tokens do código numa lista, criados como token_class
+    tokens = []
+    tokenizer = RegexTokenizer(source)
+    while True:
+        token = tokenizer.next
+        tokens.append(token_class(token.type, token.value, token.start, token.end))
+        if token.type == 'EOF':
+            return tokens
+        tokenizer.selectNext()
+
+
+def allocated(build):
+    # Bytes alocados e ainda vivos depois de build()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, size
+
+
+def best_time(function, repeats=5):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def backtracking(terms=40):
+    # Confere Parser.speculate com o BufferTokenizer; retorna a lista de problemas encontrados
+    declaration = 'int y = ' + ' + '.join(['s'] * terms) + ';'
+    parser = Parser(BufferTokenizer, rebalance=True)
+    parser.tokenizer = BufferTokenizer(declaration + ' y = ; printf(y);')
+    problems = []
+    if parser.tokenizer.peek(1).value != 'y':
+        problems.append("peek(1) deveria ser o identificador 'y'")
+    # Dois comandos seguidos: o segundo falha e a tentativa inteira é desfeita
+    if parser.speculate(lambda: (parser.parseStatement(), parser.parseStatement())) is not None:
+        problems.append("a tentativa com 'y = ;' deveria falhar")
+    if parser.tokenizer.next.value != 'int':
+        problems.append(f"depois do retrocesso o próximo token é {parser.tokenizer.next.value!r}, não 'int'")
+    # A alternativa: só a declaração
+    kept = parser.parseStatement()
+    reference = Parser(BufferTokenizer, rebalance=True)
+    reference.tokenizer = BufferTokenizer(declaration)
+    expected = reference.parseStatement()
+    if dump(kept) != dump(expected):
+        problems.append("a declaração analisada depois do retrocesso é diferente")
+    if (len(parser.chains), len(parser.declarations)) != (len(reference.chains), len(reference.declarations)):
+        problems.append(f"cadeias e declarações anotadas: {len(parser.chains)} e {len(parser.declarations)}, "
+                        f"esperado {len(reference.chains)} e {len(reference.declarations)}")
+    if parser.tokenizer.next.value != 'y':
+        problems.append(f"depois da declaração o próximo token é {parser.tokenizer.next.value!r}, não 'y'")
+    return problems
+
+
+def main(argv):
+    size = float(argv[0]) if argv else 1.0
+    source = generate(int(size * 1024 * 1024))
+    count = len(TokenBuffer(source))
+    print(f"código: {len(source) / (1024 * 1024):.2f} MB, {count} tokens")
+
+    results = {}
+    for name, build in (('Token com __dict__', lambda: all_tokens(source, DictToken)),
+                        ('Token com __slots__', lambda: all_tokens(source, Token)),
+                        ('TokenBuffer', lambda: TokenBuffer(source))):
+        result, bytes_used = allocated(build)
+        results[name] = bytes_used / count
+        print(f"{name:<22} {bytes_used / (1024 * 1024):8.2f} MB  {bytes_used / count:6.1f} bytes/token")
+        del result
+    print(f"TokenBuffer usa {results['Token com __dict__'] / results['TokenBuffer']:.1f}x menos memória "
+          f"que a lista de Tokens com __dict__")
+
+    tokenize = best_time(lambda: TokenBuffer(source))
+    regex = best_time(lambda: Parser(RegexTokenizer).run(source))
+    buffered = best_time(lambda: Parser(BufferTokenizer).run(source))
+    print(f"TokenBuffer(código)             {tokenize:.3f} s")
+    print(f"Parser.run com RegexTokenizer   {regex:.3f} s")
+    print(f"Parser.run com BufferTokenizer  {buffered:.3f} s (inclui o TokenBuffer)")
+
+    problems = backtracking()
+    for problem in problems:
+        print(f"retrocesso: {problem}")
+    print(f"retrocesso com Parser.speculate: {'ok' if not problems else f'{len(problems)} problemas'}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
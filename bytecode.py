@@ -0,0 +1,275 @@
+from arvore import *
+from resolver import *
+
+#Opcodes da máquina virtual. Cada instrução ocupa duas posições no código: (opcode, argumento)
+#Variáveis são acessadas pelo slot atribuído pelo Resolver; as verificações *_CHECK
+#só são emitidas quando a resolução depende do caminho executado
+CONST = 0           # empilha consts[arg]
+LOAD = 1            # empilha a variável do slot arg
+ASSIGN_CHECK = 2    # verifica se o slot arg foi declarado (antes de avaliar a expressão)
+STORE = 3           # atribui o topo da pilha ao slot arg
+DECL_CHECK = 4      # verifica se o slot arg ainda não foi declarado
+DECLARE = 5         # declara consts[arg] = (slot, tipo) com o topo da pilha
+DECLARE_DEFAULT = 6 # declara consts[arg] = (slot, tipo) com o valor padrão
+BINARY = 7          # aplica o handler consts[arg] aos dois valores do topo
+BINARY_ADD = 8      # soma com caminho rápido para int (handler em consts[arg])
+BINARY_SUB = 9
+BINARY_MUL = 10
+BINARY_LESS = 11
+BINARY_GREATER = 12
+BINARY_EQUALS = 13
+UNARY = 14          # aplica o handler consts[arg] ao topo
+PRINT = 15
+SCANF = 16
+POP = 17
+JUMP = 18           # desvia para arg
+IF_FALSE = 19       # desempilha a condição de um if e desvia para arg se for falsa
+WHILE_FALSE = 20    # desempilha a condição de um while e desvia para arg se for falsa
+CALL = 21           # chama consts[arg] = (função, número de argumentos)
+RETURN = 22
+RETURN_NONE = 23    # fim do bloco da função sem return
+RAISE = 24          # levanta consts[arg] = (classe, mensagem)
+LOAD_CHECK = 25     # empilha a variável do slot arg, verificando se foi declarada
+TAIL_CALL = 26      # como CALL, mas reaproveita o quadro atual (return f(...))
+
+OPNAMES = {value: name for name, value in list(globals().items()) if name.isupper() and isinstance(value, int)}
+
+#Especializações dos operadores binários
+SPECIALIZED = {
+    'PLUS': BINARY_ADD,
+    'MINUS': BINARY_SUB,
+    'MULTIPLY': BINARY_MUL,
+    'LESS': BINARY_LESS,
+    'GREATER': BINARY_GREATER,
+    'EQUALS': BINARY_EQUALS
+}
+
+
+class CodeObject:
+    def __init__(self, name, func_type, params, layout=None):
+        self.name = name
+        self.func_type = func_type
+        self.params = params
+        self.code = []
+        self.consts = []
+        # Nomes das variáveis, indexados pelo slot
+        self.names = list(layout.slots) if layout else []
+        self.param_slots = layout.param_slots if layout else []
+        self.layout = layout
+        # Slots vazios que completam o frame depois dos argumentos, ou None se
+        # parâmetros com nomes repetidos dividem o mesmo slot
+        self.padding = [None] * (len(self.names) - len(params))
+        if self.param_slots != list(range(len(params))):
+            self.padding = None
+
+    def emit(self, op, arg=0):
+        # Adiciona a instrução e retorna sua posição
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, position, target):
+        # Corrige o destino de um desvio
+        self.code[position + 1] = target
+
+    def addConst(self, value):
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def dis(self):
+        # Retorna a listagem legível do bytecode
+        lines = [f"{self.func_type} {self.name}({', '.join(t + ' ' + n for t, n in self.params)}):"]
+        for pc in range(0, len(self.code), 2):
+            op, arg = self.code[pc], self.code[pc + 1]
+            if op in (LOAD, LOAD_CHECK, ASSIGN_CHECK, STORE, DECL_CHECK):
+                detail = f"{arg} ({self.names[arg]})"
+            elif op in (JUMP, IF_FALSE, WHILE_FALSE):
+                detail = f"-> {arg}"
+            elif op in (CALL, TAIL_CALL):
+                detail = self.consts[arg][0].name
+            elif op in (CONST, DECLARE, DECLARE_DEFAULT, RAISE):
+                detail = repr(self.consts[arg])
+            elif op in (POP, PRINT, SCANF, RETURN, RETURN_NONE):
+                detail = ""
+            else:
+                detail = getattr(self.consts[arg], '__name__', '')
+            lines.append(f"  {pc:>5} {OPNAMES[op]:<16}{detail}")
+        return "\n".join(lines)
+
+
+class Compiler:
+    def __init__(self, tail_calls=False):
+        self.functions = {}
+        self.errors = []
+        self.code = None
+        # Compila return f(...) como TAIL_CALL
+        self.tail_calls = tail_calls
+
+    def compileProgram(self, program):
+        # Declara todas as funções antes de compilar os blocos, para que chamadas possam ser resolvidas
+        body = []
+        for child in program.children:
+            if isinstance(child, FuncDecl):
+                if child.func_name in self.functions:
+                    # O erro só é levantado quando o programa roda, como no Evaluate
+                    self.errors.append(ValueError(f"Function '{child.func_name}' already declared."))
+                    break
+                layout = resolve_function(child)
+                self.functions[child.func_name] = CodeObject(child.func_name, child.func_type, child.params, layout)
+                body.append(child)
+        for func_dec in body:
+            self.code = self.functions[func_dec.func_name]
+            self.compileStatement(func_dec.children[0])
+            self.code.emit(RETURN_NONE)
+        # O ponto de entrada é a chamada final de main
+        entry = CodeObject('<program>', 'void', [])
+        self.code = entry
+        for child in program.children:
+            if not isinstance(child, FuncDecl):
+                self.compileStatement(child)
+        return entry
+
+    def compileStatement(self, node):
+        # Chamadas de função usadas como comando descartam o valor retornado
+        if isinstance(node, FuncCall):
+            self.compileExpression(node)
+            self.code.emit(POP)
+            return
+        method = getattr(self, 'compile' + type(node).__name__, None)
+        if method is None:
+            raise ValueError(f"Cannot compile node '{type(node).__name__}'")
+        method(node)
+
+    def compileExpression(self, node):
+        method = getattr(self, 'compile' + type(node).__name__, None)
+        if method is None:
+            raise ValueError(f"Cannot compile node '{type(node).__name__}'")
+        method(node)
+
+    def compileRaise(self, error):
+        self.code.emit(RAISE, self.code.addConst((type(error), str(error))))
+
+    def compileStatements(self, node):
+        for child in node.children:
+            self.compileStatement(child)
+
+    def compileNoOp(self, node):
+        pass
+
+    def compileIntVal(self, node):
+        self.code.emit(CONST, self.code.addConst((node.value, 'int')))
+
+    def compileStrVal(self, node):
+        self.code.emit(CONST, self.code.addConst((node.value, 'str')))
+
+    def compileBoolVal(self, node):
+        self.code.emit(CONST, self.code.addConst((node.value, 'bool')))
+
+    def compileIdentifier(self, node):
+        check = self.code.layout.check(node)
+        if isinstance(check, Exception):
+            self.compileRaise(check)
+            return
+        self.code.emit(LOAD_CHECK if check == GUARD else LOAD, self.code.layout.slots[node.value])
+
+    def compileBinOp(self, node):
+        self.compileExpression(node.children[0])
+        self.compileExpression(node.children[1])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            # Operador desconhecido: os operandos são avaliados antes do erro
+            self.compileRaise(error)
+            return
+        self.code.emit(SPECIALIZED.get(node.value, BINARY), self.code.addConst(handler))
+
+    def compileUnOp(self, node):
+        self.compileExpression(node.children[0])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            self.compileRaise(error)
+            return
+        self.code.emit(UNARY, self.code.addConst(handler))
+
+    def compileAssign(self, node):
+        check = self.code.layout.check(node)
+        if isinstance(check, Exception):
+            self.compileRaise(check)
+            return
+        slot = self.code.layout.slots[node.children[0].value]
+        if check == GUARD:
+            self.code.emit(ASSIGN_CHECK, slot)
+        self.compileExpression(node.children[1])
+        self.code.emit(STORE, slot)
+
+    def compileDeclaration(self, node):
+        for index, (var_name, expr) in enumerate(node.declarations):
+            check = self.code.layout.check(node, index)
+            if isinstance(check, Exception):
+                self.compileRaise(check)
+                return
+            slot = self.code.layout.slots[var_name]
+            if check == GUARD:
+                self.code.emit(DECL_CHECK, slot)
+            if expr is not None:
+                self.compileExpression(expr)
+                self.code.emit(DECLARE, self.code.addConst((slot, node.var_type)))
+            else:
+                self.code.emit(DECLARE_DEFAULT, self.code.addConst((slot, node.var_type)))
+
+    def compilePrint(self, node):
+        self.compileExpression(node.children[0])
+        self.code.emit(PRINT)
+
+    def compileScanf(self, node):
+        self.code.emit(SCANF)
+
+    def compileIf(self, node):
+        self.compileExpression(node.children[0])
+        jump_else = self.code.emit(IF_FALSE)
+        self.compileStatement(node.children[1])
+        if len(node.children) == 3:
+            jump_end = self.code.emit(JUMP)
+            self.code.patch(jump_else, len(self.code.code))
+            self.compileStatement(node.children[2])
+            self.code.patch(jump_end, len(self.code.code))
+        else:
+            self.code.patch(jump_else, len(self.code.code))
+
+    def compileWhile(self, node):
+        start = len(self.code.code)
+        self.compileExpression(node.children[0])
+        jump_end = self.code.emit(WHILE_FALSE)
+        self.compileStatement(node.children[1])
+        self.code.emit(JUMP, start)
+        self.code.patch(jump_end, len(self.code.code))
+
+    def compileReturn(self, node):
+        # Uma função void (exceto main) levanta erro no RETURN depois da chamada,
+        # então só as demais podem entregar o quadro para a função chamada
+        if self.tail_calls and isinstance(node.children[0], FuncCall) and (self.code.func_type != 'void' or self.code.name == 'main'):
+            self.compileFuncCall(node.children[0], TAIL_CALL)
+        else:
+            self.compileExpression(node.children[0])
+        self.code.emit(RETURN)
+
+    def compileFuncCall(self, node, op=CALL):
+        # Função e número de argumentos são verificados antes de avaliar os argumentos
+        func = self.functions.get(node.func_name)
+        if func is None:
+            self.compileRaise(ValueError(f"Function '{node.func_name}' not declared."))
+            return
+        if len(node.children) != len(func.params):
+            self.compileRaise(ValueError(f"Function '{node.func_name}' expects {len(func.params)} arguments, got {len(node.children)}."))
+            return
+        for arg in node.children:
+            self.compileExpression(arg)
+        self.code.emit(op, self.code.addConst((func, len(node.children))))
+
+
+def compile_program(program, tail_calls=False):
+    # Compila a AST gerada por Parser.run e retorna (ponto de entrada, erros de carga)
+    compiler = Compiler(tail_calls)
+    entry = compiler.compileProgram(program)
+    return entry, compiler.errors
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+#Diretório do cache, criado ao lado do arquivo fonte (como o __pycache__)
+CACHE_DIR_NAME = '__compcache__'
+#Tamanho máximo do diretório de cache antes de remover as entradas mais antigas
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+#Módulos cujo código define o formato da AST; mudar qualquer um invalida o cache
+VERSION_MODULES = ('arvore.py', 'classes.py', 'rebalance.py', 'arena.py', 'cache.py')
+
+_version = None
+
+
+def compiler_version():
+    # Hash do código do front-end, calculado uma vez por processo
+    global _version
+    if _version is None:
+        digest = hashlib.sha256()
+        base = os.path.dirname(os.path.abspath(__file__))
+        for name in VERSION_MODULES:
+            with open(os.path.join(base, name), 'rb') as file:
+                digest.update(file.read())
+        _version = digest.hexdigest()
+    return _version
+
+
+def source_key(filename, mode=''):
+    # Hash do arquivo fonte (lido em blocos), da versão do compilador e do modo do front-end
+    digest = hashlib.sha256()
+    digest.update(compiler_version().encode())
+    digest.update(mode.encode())
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Cache em disco de programas já analisados, indexado pelo hash do fonte.
+
+    Cada entrada guarda a AST serializada e o tempo que o parse levou. Escritas
+    são atômicas (arquivo temporário + os.replace), então execuções concorrentes
+    só veem entradas completas; entradas ilegíveis são tratadas como ausentes.
+    """
+
+    def __init__(self, directory, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def forSource(filename, max_bytes=MAX_CACHE_BYTES):
+        directory = os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR_NAME)
+        return ArtifactCache(directory, max_bytes)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def load(self, key):
+        # Retorna (ast, tempo de parse evitado) ou None se a entrada não existir
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                ast, parse_seconds = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Entrada corrompida ou de um formato antigo
+            self._remove(path)
+            return None
+        try:
+            # Marca o uso para a remoção por antiguidade
+            os.utime(path)
+        except OSError:
+            pass
+        return ast, parse_seconds
+
+    def store(self, key, ast, parse_seconds):
+        try:
+            data = pickle.dumps((ast, parse_seconds), protocol=pickle.HIGHEST_PROTOCOL)
+        except RecursionError:
+            # AST profunda demais para serializar: segue sem cache
+            return False
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            # Diretório sem permissão de escrita: segue sem cache
+            return False
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, self.path(key))
+        except BaseException:
+            self._remove(temporary)
+            raise
+        self.evict()
+        return True
+
+    def evict(self):
+        # Remove as entradas menos usadas até o diretório caber no limite
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, path))
+            total += info.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_or_parse(cache, key, parse, stats=None):
+    # Usa a AST do cache ou chama parse() e guarda o resultado
+    start = time.perf_counter()
+    entry = cache.load(key)
+    if entry is not None:
+        ast, parse_seconds = entry
+        if stats is not None:
+            stats.update(hit=True, parse_seconds=parse_seconds, load_seconds=time.perf_counter() - start)
+        return ast
+    start = time.perf_counter()
+    ast = parse()
+    parse_seconds = time.perf_counter() - start
+    cache.store(key, ast, parse_seconds)
+    if stats is not None:
+        stats.update(hit=False, parse_seconds=parse_seconds, load_seconds=0.0)
+    return ast
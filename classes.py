@@ -1,34 +1,88 @@
 import re 
+from array import array
+from bisect import bisect_left, bisect_right
 from arvore import *
+from streams import *
+from rebalance import rebalance_function
+
+#Comentários /* */ removidos pelo PrePro
+COMMENT_REGEX = re.compile(r'/\*.*?\*/', re.DOTALL)
+
 class PrePro:
     @staticmethod
     def filter(source):
         # Remove C-style single-line (//) and multi-line (/* */) comments
-        source = re.sub(r'/\*.*?\*/', '', source, flags=re.DOTALL)  # Remove multi-line comments
+        source = COMMENT_REGEX.sub('', source)  # Remove multi-line comments
         # Remove spaces and newlines
         return ''.join(source)
 
 
+class SourceMap:
+    """Converte posições dos tokens em linha e coluna (a partir de 1) do arquivo fonte.
+
+    Os tokenizers registram posições no código que recebem. Depois do
+    PrePro.filter esse código não tem os comentários /* */, então cada posição é
+    deslocada pelo tamanho dos comentários removidos antes dela. Com filtered=False
+    (StreamTokenizer) as posições já são do arquivo.
+    """
+
+    def __init__(self, source, filtered=True):
+        self.newlines = [match.start() for match in re.finditer('\n', source)]
+        # Início de cada trecho no código filtrado e quanto foi removido antes dele
+        self.starts = [0]
+        self.removed = [0]
+        if filtered:
+            removed = 0
+            for match in COMMENT_REGEX.finditer(source):
+                self.starts.append(match.start() - removed)
+                removed += match.end() - match.start()
+                self.removed.append(removed)
+
+    def original(self, position):
+        return position + self.removed[bisect_right(self.starts, position) - 1]
+
+    def lineCol(self, position):
+        position = self.original(position)
+        line = bisect_left(self.newlines, position)
+        column = position - (self.newlines[line - 1] if line else -1)
+        return line + 1, column
+
+
 class FuncTable:
-    functions = {}
+    """Funções declaradas por um programa e a entrada e saída do printf/scanf.
 
-    @staticmethod
-    def set(name, func_node):
-        if name in FuncTable.functions:
+    Cada execução cria a sua FuncTable, então programas no mesmo processo,
+    inclusive em threads diferentes, não compartilham funções.
+    """
+    # Entrada e saída padrão, usadas quando a execução não recebe um IOContext
+    io = IOContext(BufferedOutput(policy=FLUSH_LINE))
+
+    def __init__(self, io=None):
+        self.functions = {}
+        if io is not None:
+            self.io = io
+
+    def set(self, name, func_node):
+        if name in self.functions:
             raise ValueError(f"Function '{name}' already declared.")
-        FuncTable.functions[name] = func_node
+        self.functions[name] = func_node
 
-    @staticmethod
-    def get(name):
-        if name not in FuncTable.functions:
+    def get(self, name):
+        if name not in self.functions:
             raise ValueError(f"Function '{name}' not declared.")
-        return FuncTable.functions[name]
+        return self.functions[name]
 
 
 class Token:
-    def __init__(self, token_type, value):
+    # Sem __dict__: os tokens de um TokenBuffer são criados a cada selectNext
+    __slots__ = ('type', 'value', 'start', 'end')
+
+    def __init__(self, token_type, value, start=None, end=None):
         self.type = token_type
         self.value = value
+        # Posições do token no código (início inclusivo, fim exclusivo)
+        self.start = start
+        self.end = end
 
 class Tokenizer:
     def __init__(self, source):
@@ -43,10 +97,11 @@ class Tokenizer:
             self.position += 1
         #Verifica se chegou ao fim do código    
         if self.position >= len(self.source):
-            self.next = Token("EOF", None)
+            self.next = Token("EOF", None, self.position, self.position)
             return
         
         caracter = self.source[self.position]
+        inicio = self.position
 
         #Determina o token
         if caracter == '+':
@@ -140,12 +195,399 @@ class Tokenizer:
             raise ValueError(f"Invalid character: {caracter}")
 
         self.position += 1
+        self.next.start, self.next.end = inicio, self.position
+
+
+#Palavras reservadas da linguagem
+KEYWORDS = {
+    "if": "IF",
+    "else": "ELSE",
+    "while": "WHILE",
+    "scanf": "SCANF",
+    "printf": "PRINTF",
+    "int": "TYPE",
+    "str": "TYPE",
+    "void": "FUNC_TYPE",
+    "return": "RETURN"
+}
+
+#Operadores e pontuação
+OPERATORS = {
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "MULTIPLY",
+    "/": "DIVIDE",
+    "(": "LPAREN",
+    ")": "RPAREN",
+    ";": "SEMICOLON",
+    "{": "LBRACE",
+    "}": "RBRACE",
+    ">": "GREATER",
+    "<": "LESS",
+    ",": "COMMA",
+    "=": "ASSIGN",
+    "==": "EQUALS",
+    "!": "NOT",
+    "!=": "NOT_EQUALS",
+    "&&": "AND",
+    "||": "OR"
+}
+
+#Expressão única que separa os espaços anteriores e o próximo token; "[^ \n]" captura
+#caracteres inválidos, que só geram erro quando o token é consumido
+TOKEN_REGEX = re.compile(r'([ \n]*)([^\W\d_]\w*|\d+|==|!=|&&|\|\||"[^"]*"|[^ \n])')
+
+
+class RegexTokenizer:
+    """Tokenizer equivalente ao Tokenizer que reconhece os tokens em lotes com a
+    expressão TOKEN_REGEX, em vez de percorrer o código caractere a caractere.
+    Erros léxicos só são levantados quando o token inválido é consumido.
+    """
+
+    #Tamanho aproximado, em caracteres, de cada lote reconhecido de uma vez
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+        self.next = None
+        # Tokens já reconhecidos e ainda não consumidos
+        self.pending = iter(())
+        self.selectNext()
+
+    def selectNext(self):
+        token = next(self.pending, None)
+        if token is None:
+            if not self._fill():
+                self.next = Token("EOF", None, self.position, self.position)
+                return
+            token = next(self.pending)
+        if token.type == 'ERROR':
+            raise ValueError(token.value)
+        self.next = token
+
+    def _fill(self):
+        # Reconhece o próximo lote; o lote termina numa quebra de linha fora de strings
+        source = self.source
+        position = self.position
+        if position >= len(source):
+            return False
+        end = position + self.CHUNK_SIZE
+        while end < len(source):
+            end = source.find('\n', end)
+            if end == -1 or source.count('"', position, end) % 2 == 0:
+                break
+            # A quebra de linha está dentro de uma string: continua depois do fechamento
+            end = source.find('"', end)
+            if end == -1:
+                break
+            end += 1
+        if end == -1 or end > len(source):
+            end = len(source)
+
+        tokens = []
+        append = tokens.append
+        operators = OPERATORS
+        for spaces, text in TOKEN_REGEX.findall(source, position, end):
+            start = position + len(spaces)
+            position = start + len(text)
+            kind = operators.get(text)
+            if kind is not None:
+                append(Token(kind, text, start, position))
+                continue
+            caracter = text[0]
+            if caracter.isalpha():
+                #Verifica se é uma palavra reservada
+                append(Token(KEYWORDS.get(text, 'IDENTIFIER'), text, start, position))
+            elif caracter.isdigit():
+                append(Token('NUMBER', int(text), start, position))
+            elif caracter == '"' and len(text) > 1:
+                append(Token('STRING', text[1:-1], start, position))
+            elif caracter == '"':
+                append(Token('ERROR', "String not closed", start, position))
+            else:
+                append(Token('ERROR', f"Invalid character: {caracter}", start, position))
+        self.position = end
+        if not tokens:
+            # Restam apenas espaços
+            return self._fill()
+        self.pending = iter(tokens)
+        return True
+
+
+#Tipos de token guardados no TokenBuffer; o código de cada tipo é a posição nesta tupla
+TOKEN_KINDS = ('EOF', 'ERROR', 'IDENTIFIER', 'NUMBER', 'STRING',
+               *dict.fromkeys(KEYWORDS.values()), *OPERATORS.values())
+TOKEN_CODES = {kind: code for code, kind in enumerate(TOKEN_KINDS)}
+
+
+class TokenBuffer:
+    """Todos os tokens de um código, em colunas array paralelas.
+
+    kinds guarda o código do tipo (posição em TOKEN_KINDS), starts e ends as
+    posições no código e lines a linha (a partir de 1) de cada token. values
+    indexa literals, a tabela dos valores sem repetição: nomes, números,
+    strings, o texto de operadores e palavras reservadas e as mensagens dos
+    tokens ERROR. O último token é sempre EOF. token(i) cria o Token da
+    posição i; só os tokens em uso pelo parser existem como objetos.
+    """
+
+    def __init__(self, source):
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.values = array('I')
+        self.literals = []
+        self._scan(source)
+
+    def _scan(self, source):
+        # Mesmos tokens do RegexTokenizer, reconhecidos de uma vez
+        codes = TOKEN_CODES
+        operators = OPERATORS
+        literals = self.literals
+        indexes = {}
+        add_kind, add_start, add_end = self.kinds.append, self.starts.append, self.ends.append
+        add_line, add_value = self.lines.append, self.values.append
+        line = 1
+        position = 0
+        for spaces, text in TOKEN_REGEX.findall(source):
+            line += spaces.count('\n')
+            start = position + len(spaces)
+            position = start + len(text)
+            value = text
+            kind = operators.get(text)
+            if kind is None:
+                caracter = text[0]
+                if caracter.isalpha():
+                    #Verifica se é uma palavra reservada
+                    kind = KEYWORDS.get(text, 'IDENTIFIER')
+                elif caracter.isdigit():
+                    kind, value = 'NUMBER', int(text)
+                elif caracter == '"' and len(text) > 1:
+                    kind, value = 'STRING', text[1:-1]
+                elif caracter == '"':
+                    kind, value = 'ERROR', "String not closed"
+                else:
+                    kind, value = 'ERROR', f"Invalid character: {caracter}"
+            index = indexes.get(value)
+            if index is None:
+                index = indexes[value] = len(literals)
+                literals.append(value)
+            add_kind(codes[kind])
+            add_start(start)
+            add_end(position)
+            add_line(line)
+            add_value(index)
+            if kind == 'STRING':
+                line += text.count('\n')
+        literals.append(None)
+        add_kind(codes['EOF'])
+        add_start(len(source))
+        add_end(len(source))
+        add_line(line + source.count('\n', position))
+        add_value(len(literals) - 1)
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def token(self, index):
+        return Token(TOKEN_KINDS[self.kinds[index]], self.literals[self.values[index]],
+                     self.starts[index], self.ends[index])
+
+
+class BufferTokenizer:
+    """Tokenizer que percorre um TokenBuffer com o código inteiro já reconhecido.
+
+    Além de selectNext, permite olhar tokens adiante (peek) e voltar a um token
+    anterior (mark/reset) sem reconhecer o código de novo. Como no
+    RegexTokenizer, erros léxicos só são levantados quando o token inválido é
+    consumido.
+    """
+
+    def __init__(self, source):
+        self.buffer = source if isinstance(source, TokenBuffer) else TokenBuffer(source)
+        self.index = -1
+        self.next = None
+        self.selectNext()
+
+    def selectNext(self):
+        # Depois do fim, continua em EOF
+        self.index = min(self.index + 1, len(self.buffer) - 1)
+        token = self.buffer.token(self.index)
+        if token.type == 'ERROR':
+            raise ValueError(token.value)
+        self.next = token
+
+    def peek(self, offset=1):
+        # Token offset posições depois de next, sem consumir; tokens inválidos vêm como ERROR
+        return self.buffer.token(min(self.index + offset, len(self.buffer) - 1))
+
+    def mark(self):
+        return self.index
+
+    def reset(self, mark):
+        # Volta para o token que era next quando mark() foi chamado
+        self.index = mark
+        self.next = self.buffer.token(mark)
+
+
+#Expressões do StreamTokenizer: espaços e comentários completos, e o próximo token
+STREAM_SKIP_REGEX = re.compile(r'(?:[ \n]+|/\*.*?\*/|//[^\n]*\n)*', re.DOTALL)
+STREAM_TOKEN_REGEX = re.compile(r'[^\W\d_]\w*|\d+|==|!=|&&|\|\||"[^"]*"|[^ \n]')
+
+
+class StreamTokenizer:
+    """Tokenizer que lê o código de um arquivo em blocos de tamanho fixo.
+
+    Comentários /* */ e // são descartados pelo próprio tokenizer, sem passar pelo
+    PrePro, e só o trecho ainda não consumido do arquivo fica em memória. Tokens,
+    strings e comentários que atravessam o fim de um bloco são completados com a
+    leitura do bloco seguinte. Ao contrário do PrePro, um comentário separa tokens
+    e não é removido de dentro de strings.
+    """
+
+    #Quantidade de caracteres lidos do arquivo por vez
+    CHUNK_SIZE = 1 << 16
+
+    def __init__(self, file, chunk_size=None):
+        self.file = file
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        # Trecho lido e ainda não consumido, e a posição do início dele no arquivo
+        self.buffer = ''
+        self.offset = 0
+        self.position = 0
+        self.eof = False
+        self.next = None
+        self.selectNext()
+
+    def _more(self, size=None):
+        # Descarta o que já foi consumido e lê mais um bloco; retorna False no fim do arquivo
+        if self.eof:
+            return False
+        chunk = self.file.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.position:] + chunk
+        self.offset += self.position
+        self.position = 0
+        return True
+
+    def _skipBlockComment(self):
+        # O trecho lido começa um comentário /* que não fecha dentro dele
+        search = self.position + 2
+        while True:
+            close = self.buffer.find('*/', search)
+            if close != -1:
+                self.position = close + 2
+                return
+            if self.eof:
+                raise ValueError("Comment not closed")
+            # Descarta o conteúdo já lido; o último caractere pode ser o início de "*/"
+            self.position = max(search, len(self.buffer) - 1)
+            self._more()
+            search = 0
+
+    def _skipLineComment(self):
+        # O trecho lido começa um comentário // sem a quebra de linha final
+        while True:
+            newline = self.buffer.find('\n', self.position)
+            if newline != -1:
+                self.position = newline + 1
+                return
+            self.position = len(self.buffer)
+            if not self._more():
+                return
+
+    def selectNext(self):
+        size = self.chunk_size
+        while True:
+            #Pula espaços e comentários
+            self.position = STREAM_SKIP_REGEX.match(self.buffer, self.position).end()
+            if self.position >= len(self.buffer):
+                if self._more():
+                    continue
+                self.next = Token("EOF", None, self.offset + self.position, self.offset + self.position)
+                return
+            if self.buffer.startswith('/*', self.position):
+                self._skipBlockComment()
+                continue
+            if self.buffer.startswith('//', self.position):
+                self._skipLineComment()
+                continue
+            match = STREAM_TOKEN_REGEX.match(self.buffer, self.position)
+            text = match.group()
+            end = match.end()
+            # O token ou a string podem continuar no próximo bloco
+            if (end == len(self.buffer) or text == '"') and self._more(size):
+                size *= 2
+                continue
+            break
+        start = self.offset + self.position
+        self.position = end
+        end += self.offset
+        kind = OPERATORS.get(text)
+        if kind is not None:
+            self.next = Token(kind, text, start, end)
+            return
+        caracter = text[0]
+        if caracter.isalpha():
+            #Verifica se é uma palavra reservada
+            self.next = Token(KEYWORDS.get(text, 'IDENTIFIER'), text, start, end)
+        elif caracter.isdigit():
+            self.next = Token('NUMBER', int(text), start, end)
+        elif caracter == '"' and len(text) > 1:
+            self.next = Token('STRING', text[1:-1], start, end)
+        elif caracter == '"':
+            raise ValueError("String not closed")
+        else:
+            raise ValueError(f"Invalid character: {caracter}")
+
+
+#Operadores de cada nível de precedência das expressões, do menor para o maior
+RELATIONAL_OPERATORS = ('GREATER', 'LESS', 'EQUALS', 'NOT_EQUALS')
+EXPRESSION_OPERATORS = ('PLUS', 'MINUS', 'OR')
+TERM_OPERATORS = ('MULTIPLY', 'DIVIDE', 'AND')
+UNARY_OPERATORS = ('PLUS', 'MINUS', 'NOT')
+#Operadores cujas cadeias o Parser(rebalance=True) pode rebalancear
+ASSOCIATIVE_OPERATORS = ('PLUS', 'MULTIPLY')
+
+
+class ExpressionFrame:
+    """Estado de uma expressão em análise: a expressão inteira, uma expressão
+    entre parênteses ou os argumentos de uma chamada (func_name e args).
+
+    Guarda o operando esquerdo e o operador pendente de cada nível (termo,
+    expressão e relação) e os operadores unários do fator em andamento.
+    """
+    __slots__ = ('func_name', 'start', 'args', 'prefix', 'term', 'term_operator', 'term_start',
+                 'expression', 'expression_operator', 'expression_start',
+                 'relational', 'relational_operator', 'relational_start')
+
+    def __init__(self, func_name=None, start=None):
+        self.func_name = func_name
+        self.start = start
+        self.args = []
+        self.clear()
+
+    def clear(self):
+        # Começa uma nova expressão (o próximo argumento da chamada)
+        self.prefix = []
+        self.term = self.term_operator = self.term_start = None
+        self.expression = self.expression_operator = self.expression_start = None
+        self.relational = self.relational_operator = self.relational_start = None
 
 
 class Parser:
-    def __init__(self):
+    def __init__(self, tokenizer_class=RegexTokenizer, rebalance=False):
+        self.tokenizer_class = tokenizer_class
         self.tokenizer = None
         self.current_token = None
+        # Rebalanceia as cadeias longas de + e * de cada função (rebalance.py)
+        self.rebalance = rebalance
+        # Somas, produtos e declarações da função em análise, usados pelo rebalanceamento
+        self.chains = []
+        self.declarations = []
 
     def parseProgram(self):
         functions = Program()
@@ -159,6 +601,9 @@ class Parser:
         return functions
     
     def parseFunction(self):
+        start = self.tokenizer.next.start
+        self.chains = []
+        self.declarations = []
         #Verifica se a função tem tipo
         if self.tokenizer.next.type != 'TYPE' and self.tokenizer.next.type != 'FUNC_TYPE':
             raise ValueError(f"Expected 'TYPE' initializing the function, got {self.tokenizer.next.value}")
@@ -194,6 +639,9 @@ class Parser:
         block = self.parseBlock()
         #Cria o nó da função
         func_dec = FuncDecl(function_type, function_name, params, block)
+        func_dec.start = start
+        if self.rebalance:
+            rebalance_function(func_dec, self.declarations, self.chains)
         return func_dec
 
 
@@ -255,7 +703,9 @@ class Parser:
                 if self.tokenizer.next.type == 'COMMA':
                     self.tokenizer.selectNext()
             self.tokenizer.selectNext() 
-            return FuncCall(id_token.value, args)
+            call = FuncCall(id_token.value, args)
+            call.start = id_token.start
+            return call
         else:
             raise ValueError(f"Token Inesperado depois de identificador '{id_token.value}': '{self.current_token.value}'")
 
@@ -299,6 +749,8 @@ class Parser:
                 raise ValueError(f"Erro de sintaxe: {self.tokenizer.next.value}")
         #Cria o nó de declaração
         declaration_node = Declaration(var_type, declarations)
+        if self.rebalance:
+            self.declarations.append(declaration_node)
         return declaration_node
 
 
@@ -306,6 +758,7 @@ class Parser:
         
 
     def parseIf(self):
+        start = self.tokenizer.next.start
         self.tokenizer.selectNext()
         self.current_token = self.tokenizer.next
         #Verifica se o próximo token é um parênteses
@@ -334,9 +787,12 @@ class Parser:
             false_block = self.parseStatement()
         else:
             false_block = None
-        return If(condition, true_block, false_block)
+        node = If(condition, true_block, false_block)
+        node.start = start
+        return node
     
     def parseWhile(self):
+        start = self.tokenizer.next.start
         self.tokenizer.selectNext()
         self.current_token = self.tokenizer.next
         #Verifica se o próximo token é um parênteses
@@ -357,7 +813,9 @@ class Parser:
         self.tokenizer.selectNext()
         block = self.parseStatement()
         
-        return While(condition, block)
+        node = While(condition, block)
+        node.start = start
+        return node
     
     def parseReturn(self):
         self.tokenizer.selectNext()
@@ -405,104 +863,137 @@ class Parser:
         return result
 
     def parseRelationalExpression(self):
-        #Determina a expressão
-        result = self.parseExpression()
-        #Verifica se o próximo token é um operador relacional
-        if self.current_token.type in ('GREATER', 'LESS', 'EQUALS', 'NOT_EQUALS'):
-            #Determina o operador relacional
-            operator = self.current_token.type
-            self.tokenizer.selectNext()
-            self.current_token = self.tokenizer.next
-            #Determina a proxima expressão
-            operand = self.parseExpression()
-            #Cria o nó da expressão relacional
-            result = BinOp(operator, result, operand)
-        return result
-    
-    def parseExpression(self):
-        #Determina o termo
-        result = self.parseTerm()
-        #Verifica se o próximo token é um operador de Expressão
-        while self.current_token.type in ('PLUS', 'MINUS', 'OR'):
-            #Determina o operador de Expressão
-            operator = self.current_token.type
-            self.tokenizer.selectNext()
-            self.current_token = self.tokenizer.next
-            #Determina o próximo termo
-            operand = self.parseTerm()
-            #Cria o nó da expressão
-            result = BinOp(operator, result, operand)
-        return result
-        
-    def parseTerm(self):
-        #Determina o fator
-        result = self.parseFactor()
-        #Verifica se o próximo token é um operador de Termo
-        while self.current_token.type in ('MULTIPLY', 'DIVIDE', 'AND'):
-            #Determina o operador de Termo
-            operator = self.current_token.type
-            self.tokenizer.selectNext()
-            self.current_token = self.tokenizer.next
-            #Determina o próximo fator
-            operand = self.parseFactor()
-            #Cria o nó do termo
-            result = BinOp(operator, result, operand)
-        return result
-    
-    def parseFactor(self):
-        self.current_token = self.tokenizer.next
-        token_type = self.current_token.type
+        """Analisa uma expressão sem recursão: relação, soma, termo e fator.
 
-        if token_type == 'IDENTIFIER':
-            identifier_name = self.current_token.value
-            self.tokenizer.selectNext()
+        Equivale à gramática expressão [relacional expressão], com expressão =
+        termo {(+ | - | ||) termo} e termo = fator {(* | / | &&) fator}, e
+        consome os tokens na mesma ordem da descida recursiva de antes, então os
+        erros são os mesmos. Parênteses e argumentos de chamadas abrem um
+        ExpressionFrame numa pilha explícita, e os operadores unários ficam
+        pendentes no frame até o fator terminar; a profundidade das expressões
+        não depende do limite de recursão do Python.
+        """
+        frames = [ExpressionFrame()]
+        frame = frames[0]
+        while True:
+            #Início de um fator
             self.current_token = self.tokenizer.next
-            if self.current_token.type == 'LPAREN':
-                # Function call with return value
+            token_type = self.current_token.type
+            if token_type in UNARY_OPERATORS:
                 self.tokenizer.selectNext()
-                args = []
-                while self.tokenizer.next.type != 'RPAREN':
-                    arg_expr = self.parseRelationalExpression()
-                    args.append(arg_expr)
-                    if self.tokenizer.next.type == 'COMMA':
-                        self.tokenizer.selectNext()
+                frame.prefix.append(token_type)
+                continue
+            if token_type == 'LPAREN':
                 self.tokenizer.selectNext()
                 self.current_token = self.tokenizer.next
-                return FuncCall(identifier_name, args)
+                frame = ExpressionFrame()
+                frames.append(frame)
+                continue
+            if token_type == 'IDENTIFIER':
+                identifier_name = self.current_token.value
+                start = self.current_token.start
+                self.tokenizer.selectNext()
+                self.current_token = self.tokenizer.next
+                if self.current_token.type == 'LPAREN':
+                    self.tokenizer.selectNext()
+                    if self.tokenizer.next.type != 'RPAREN':
+                        #Os argumentos são analisados no frame da chamada
+                        frame = ExpressionFrame(identifier_name, start)
+                        frames.append(frame)
+                        continue
+                    self.tokenizer.selectNext()
+                    self.current_token = self.tokenizer.next
+                    factor = FuncCall(identifier_name, [])
+                    factor.start = start
+                else:
+                    factor = Identifier(identifier_name)
+            #Parse para número ou string
+            elif token_type in ('NUMBER', 'STRING'):
+                value = self.current_token.value
+                self.tokenizer.selectNext()
+                self.current_token = self.tokenizer.next
+                if self.current_token.type == token_type:
+                    raise ValueError(f"Erro de sintaxe: {token_type.lower()} depois de {token_type.lower()} '{self.current_token.value}'")
+                factor = IntVal(value) if token_type == 'NUMBER' else StrVal(value)
+            #Parse para scanf
+            elif token_type == 'SCANF':
+                self._parseScanf()
+                factor = Scanf()
             else:
-                return Identifier(identifier_name)
+                raise ValueError(f"Caracter inválido: {token_type}")
+
+            #Fim de um fator: fecha as expressões que terminam nele
+            while True:
+                result = self.finishFactor(frame, factor)
+                if result is None:
+                    #O operador depois do fator foi consumido; começa o próximo fator
+                    break
+                if frame.func_name is not None:
+                    #Fim de um argumento
+                    frame.args.append(result)
+                    if self.tokenizer.next.type == 'COMMA':
+                        self.tokenizer.selectNext()
+                    if self.tokenizer.next.type != 'RPAREN':
+                        frame.clear()
+                        break
+                    self.tokenizer.selectNext()
+                    self.current_token = self.tokenizer.next
+                    result = FuncCall(frame.func_name, frame.args)
+                    result.start = frame.start
+                elif len(frames) > 1:
+                    #Fim de uma expressão entre parênteses
+                    if self.current_token.type != 'RPAREN':
+                        raise ValueError("Missing closing parenthesis")
+                    self.tokenizer.selectNext()
+                    self.current_token = self.tokenizer.next
+                frames.pop()
+                if not frames:
+                    return result
+                frame = frames[-1]
+                factor = result
 
-        #Parse para número ou string
-        if token_type in ["NUMBER", "STRING"]:
-            value = self.current_token.value
+    def finishFactor(self, frame, factor):
+        # Acrescenta o fator às expressões do frame; retorna a expressão completa do
+        # frame, ou None se um operador foi consumido e outro fator deve vir
+        #Operadores unários pendentes, do mais interno para o mais externo
+        while frame.prefix:
+            factor = UnOp(frame.prefix.pop(), factor)
+        if frame.term_operator is not None:
+            factor = self.binOp(frame.term_operator, frame.term, factor, frame.term_start)
+        #Verifica se o próximo token é um operador de Termo
+        if self.current_token.type in TERM_OPERATORS:
+            frame.term, frame.term_operator, frame.term_start = factor, self.current_token.type, self.current_token.start
             self.tokenizer.selectNext()
             self.current_token = self.tokenizer.next
-            if self.current_token.type == token_type:
-                raise ValueError(f"Erro de sintaxe: {token_type.lower()} depois de {token_type.lower()} '{self.current_token.value}'")
-            if token_type == "NUMBER":
-                return IntVal(value)
-            elif token_type == "STRING":
-                return StrVal(value)
-        #Parse para operador unário
-        if token_type in ["PLUS", "MINUS", "NOT"]:
-            self.tokenizer.selectNext()
-            return UnOp(token_type, self.parseFactor())
-        #Parse para scanf
-        if token_type == "SCANF":
-            self._parseScanf()
-            return Scanf()
-        #Parse para expressão entre parênteses
-        if token_type == 'LPAREN':
+            return None
+        frame.term_operator = None
+        term = factor
+        if frame.expression_operator is not None:
+            term = self.binOp(frame.expression_operator, frame.expression, term, frame.expression_start)
+        #Verifica se o próximo token é um operador de Expressão
+        if self.current_token.type in EXPRESSION_OPERATORS:
+            frame.expression, frame.expression_operator, frame.expression_start = term, self.current_token.type, self.current_token.start
             self.tokenizer.selectNext()
             self.current_token = self.tokenizer.next
-            result = self.parseRelationalExpression()
-            if self.current_token.type != 'RPAREN':
-                raise ValueError("Missing closing parenthesis")
+            return None
+        frame.expression_operator = None
+        if frame.relational_operator is not None:
+            #A relação não se encadeia: a expressão termina depois do segundo operando
+            return self.binOp(frame.relational_operator, frame.relational, term, frame.relational_start)
+        #Verifica se o próximo token é um operador relacional
+        if self.current_token.type in RELATIONAL_OPERATORS:
+            frame.relational, frame.relational_operator, frame.relational_start = term, self.current_token.type, self.current_token.start
             self.tokenizer.selectNext()
             self.current_token = self.tokenizer.next
-            return result
+            return None
+        return term
 
-        raise ValueError(f"Caracter inválido: {token_type}")
+    def binOp(self, operator, left, right, start):
+        node = BinOp(operator, left, right)
+        node.start = start
+        if self.rebalance and operator in ASSOCIATIVE_OPERATORS:
+            self.chains.append(node)
+        return node
 
     def _parseScanf(self):
         self.tokenizer.selectNext()
@@ -516,9 +1007,29 @@ class Parser:
         self.tokenizer.selectNext()
 
 
+    def speculate(self, parse):
+        # Tenta parse(); se levantar erro de sintaxe, volta os tokens ao ponto
+        # de partida e retorna None. Precisa de um tokenizer com mark/reset.
+        # As cadeias e declarações anotadas pela tentativa também são descartadas
+        mark = self.tokenizer.mark()
+        current_token = self.current_token
+        chains, declarations = len(self.chains), len(self.declarations)
+        try:
+            return parse()
+        except ValueError:
+            self.tokenizer.reset(mark)
+            self.current_token = current_token
+            del self.chains[chains:]
+            del self.declarations[declarations:]
+            return None
+
     def run(self, code):
         #Inicializa Tokenizer
-        self.tokenizer = Tokenizer(code)
+        return self.runTokenizer(self.tokenizer_class(code))
+
+    def runTokenizer(self, tokenizer):
+        #Usa um tokenizer já criado, como o StreamTokenizer
+        self.tokenizer = tokenizer
         #Cria a AST
         ast = self.parseProgram()
         #Verifica se o código termina com EOF
@@ -0,0 +1,97 @@
+"""Cliente do daemon.py: executa um programa no daemon em vez de iniciar um interpretador.
+
+Envia ao daemon, pelo socket Unix, o caminho do programa, as opções e os
+descritores da entrada, da saída e da saída de erro deste processo; o
+processo filho do daemon lê e escreve direto neles, e o cliente só espera o
+código de saída. Além do socket, importa só o que o Python já carrega na
+inicialização; por isso o pedido não é JSON (json importa re), e sim pares
+nome=valor separados por '\\0', que não aparece em caminhos. Sem daemon no
+socket, executa main.py com as opções equivalentes, então pode substituir
+python main.py em qualquer caso.
+
+Uso: python client.py [--socket=CAMINHO] [--engine=MODO] [--flush=POLÍTICA] <arquivo.c>
+"""
+import os
+import socket
+import sys
+
+# Opções aceitas na linha de comando
+OPCOES = {
+    'socket': 'socket do daemon (padrão: $COMPILADOR_SOCKET ou /tmp/compilador-<uid>.sock)',
+    'engine': 'evaluate (padrão do daemon), vm, closure, typecheck, unboxed ou python',
+    'flush': 'quando descarregar a saída do printf: size (padrão), line ou exit',
+}
+#Opção do main.py equivalente a cada modo de execução, usada sem daemon
+MAIN_OPTIONS = {'evaluate': [], 'vm': ['--vm'], 'closure': ['--closure'], 'typecheck': ['--typecheck'],
+                'unboxed': ['--unboxed'], 'python': ['--python']}
+#Tamanho máximo de um pedido ao daemon
+MAX_REQUEST = 1 << 16
+
+
+def socket_path():
+    return os.environ.get('COMPILADOR_SOCKET') or f"/tmp/compilador-{os.getuid()}.sock"
+
+
+def request(path, filename, options):
+    """Executa filename no daemon e retorna o código de saída do programa.
+
+    Levanta OSError se não há daemon escutando em path.
+    """
+    fields = {'file': os.path.abspath(filename), **options}
+    message = '\0'.join(f"{name}={value}" for name, value in fields.items()).encode()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        socket.send_fds(connection, [message], [0, 1, 2])
+        # O daemon responde com o código de saída quando o programa termina
+        reply = b''
+        while chunk := connection.recv(64):
+            reply += chunk
+    if not reply.strip().isdigit():
+        print("daemon: o processo terminou sem responder", file=sys.stderr)
+        return 1
+    return int(reply)
+
+
+def decode(message):
+    # Pedido recebido pelo daemon -> dicionário
+    return dict(field.partition('=')[::2] for field in message.decode().split('\0'))
+
+
+def main(argv):
+    # Separa as opções (--nome=valor) do arquivo
+    opcoes = {}
+    argumentos = []
+    for arg in argv:
+        if arg.startswith('--'):
+            nome, _, valor = arg[2:].partition('=')
+            if nome not in OPCOES or not valor:
+                print(f"Opção desconhecida ou sem valor: --{nome}")
+                sys.exit(1)
+            opcoes[nome] = valor
+        else:
+            argumentos.append(arg)
+
+    if len(argumentos) != 1:
+        print("Uso: python3 client.py [opções] <arquivo.c>")
+        for nome, descricao in OPCOES.items():
+            print(f"  --{nome:<8} {descricao}")
+        sys.exit(1)
+
+    path = opcoes.pop('socket', None) or socket_path()
+    try:
+        sys.exit(request(path, argumentos[0], opcoes))
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    # Sem daemon: executa o programa com main.py neste mesmo processo
+    engine = opcoes.get('engine', 'evaluate')
+    if engine not in MAIN_OPTIONS:
+        print(f"Uso: --engine=MODO, com MODO em {', '.join(MAIN_OPTIONS)}")
+        sys.exit(1)
+    flags = MAIN_OPTIONS[engine] + ([f"--flush={opcoes['flush']}"] if 'flush' in opcoes else [])
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, main_py, *flags, argumentos[0]])
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,692 @@
+from array import array
+from arvore import *
+from resolver import *
+from ropes import concat
+from classes import FuncTable
+
+#Valor retornado por chamadas de funções void
+NONE = (None, None)
+#Partes do frame do UnboxedCompiler: ints em array('q') e os demais valores em lista
+INTS = 0
+OBJECTS = 1
+
+
+class Function:
+    def __init__(self, func_dec):
+        self.name = func_dec.func_name
+        self.func_type = func_dec.func_type
+        self.params = func_dec.params
+        self.layout = resolve_function(func_dec)
+        # Preenchido depois que todas as funções forem declaradas
+        self.body = None
+
+
+class ClosureCompiler:
+    """Transforma a AST em closures especializadas, uma por nó.
+
+    Expressões viram closures frame -> (valor, tipo) e comandos viram closures
+    frame -> None, ou a tupla (valor, tipo) quando executam um return. Handlers,
+    closures filhas, constantes e slots das variáveis são resolvidos uma única
+    vez na compilação; o frame é uma lista com um par (valor, tipo) por slot.
+    """
+
+    def __init__(self, io=None):
+        self.functions = {}
+        self.errors = []
+        self.layout = None
+        # Entrada e saída de printf/scanf, por padrão as mesmas do FuncTable
+        self.io = io if io is not None else FuncTable.io
+
+    def compileProgram(self, program):
+        # Declara todas as funções antes de compilar os blocos, para que chamadas possam ser resolvidas
+        declared = []
+        for child in program.children:
+            if isinstance(child, FuncDecl):
+                if child.func_name in self.functions:
+                    self.errors.append(ValueError(f"Function '{child.func_name}' already declared."))
+                    break
+                self.functions[child.func_name] = self.createFunction(child)
+                declared.append(child)
+        for func_dec in declared:
+            func = self.functions[func_dec.func_name]
+            self.layout = func.layout
+            func.body = self.compileStatement(func_dec.children[0])
+        self.layout = None
+        entry = [self.compileStatement(child) for child in program.children if not isinstance(child, FuncDecl)]
+        errors = self.errors
+        empty_frame = self.emptyFrame
+
+        def run():
+            # Erros de carga acontecem antes de main, como no Evaluate
+            if errors:
+                raise errors[0]
+            frame = empty_frame()
+            for statement in entry:
+                statement(frame)
+        return run
+
+    def createFunction(self, func_dec):
+        return Function(func_dec)
+
+    def emptyFrame(self):
+        # Frame dos comandos fora das funções
+        return []
+
+    def compileStatement(self, node):
+        # Chamadas de função usadas como comando descartam o valor retornado
+        if isinstance(node, FuncCall):
+            call = self.compileExpression(node)
+
+            def call_statement(frame):
+                call(frame)
+            return call_statement
+        return self.compile(node)
+
+    def compileExpression(self, node):
+        return self.compile(node)
+
+    def compile(self, node):
+        method = getattr(self, 'compile' + type(node).__name__, None)
+        if method is None:
+            raise ValueError(f"Cannot compile node '{type(node).__name__}'")
+        return method(node)
+
+    def compileRaise(self, error, operands=()):
+        # Avalia os operandos e levanta o erro quando o nó é executado
+        error_class, message = type(error), str(error)
+
+        def fail(frame):
+            for operand in operands:
+                operand(frame)
+            raise error_class(message)
+        return fail
+
+    def compileStatements(self, node):
+        statements = [self.compileStatement(child) for child in node.children]
+        if not statements:
+            return self.compileNoOp(node)
+        if len(statements) == 1:
+            return statements[0]
+
+        def block(frame):
+            for statement in statements:
+                result = statement(frame)
+                # Um return interrompe o bloco
+                if result is not None:
+                    return result
+        return block
+
+    def compileNoOp(self, node):
+        def noop(frame):
+            pass
+        return noop
+
+    def compileIntVal(self, node):
+        const = (node.value, 'int')
+        return lambda frame: const
+
+    def compileStrVal(self, node):
+        const = (node.value, 'str')
+        return lambda frame: const
+
+    def compileBoolVal(self, node):
+        const = (node.value, 'bool')
+        return lambda frame: const
+
+    def compileIdentifier(self, node):
+        check = self.layout.check(node)
+        if isinstance(check, Exception):
+            return self.compileRaise(check)
+        slot = self.layout.slots[node.value]
+        if check == GUARD:
+            name = node.value
+
+            def load_checked(frame):
+                result = frame[slot]
+                if result is None:
+                    raise ValueError(f"Undefined variable '{name}'")
+                return result
+            return load_checked
+        return lambda frame: frame[slot]
+
+    def compileBinOp(self, node):
+        left = self.compileExpression(node.children[0])
+        right = self.compileExpression(node.children[1])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            # Operador desconhecido: os operandos são avaliados antes do erro
+            return self.compileRaise(error, (left, right))
+        op = node.value
+
+        # Caminhos rápidos para operandos int, o handler cobre os demais casos
+        if op == 'PLUS':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return lv + rv, 'int'
+                return handler(lv, lt, rv, rt)
+        elif op == 'MINUS':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return lv - rv, 'int'
+                return handler(lv, lt, rv, rt)
+        elif op == 'MULTIPLY':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return lv * rv, 'int'
+                return handler(lv, lt, rv, rt)
+        elif op == 'LESS':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return int(lv < rv), 'bool'
+                return handler(lv, lt, rv, rt)
+        elif op == 'GREATER':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return int(lv > rv), 'bool'
+                return handler(lv, lt, rv, rt)
+        elif op == 'EQUALS':
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                if lt == 'int' and rt == 'int':
+                    return int(lv == rv), 'bool'
+                return handler(lv, lt, rv, rt)
+        else:
+            def binop(frame):
+                lv, lt = left(frame)
+                rv, rt = right(frame)
+                return handler(lv, lt, rv, rt)
+        return binop
+
+    def compileUnOp(self, node):
+        operand = self.compileExpression(node.children[0])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            return self.compileRaise(error, (operand,))
+
+        def unop(frame):
+            value, value_type = operand(frame)
+            return handler(value, value_type)
+        return unop
+
+    def compileAssign(self, node):
+        check = self.layout.check(node)
+        if isinstance(check, Exception):
+            return self.compileRaise(check)
+        name = node.children[0].value
+        slot = self.layout.slots[name]
+        guard = check == GUARD
+        expression = self.compileExpression(node.children[1])
+
+        def assign(frame):
+            # Checa se a variável foi declarada antes de avaliar a expressão
+            if guard and frame[slot] is None:
+                raise ValueError(f"Variable '{name}' not declared.")
+            result = expression(frame)
+            expected_type = frame[slot][1]
+            # Checagem de tipo e conversão implícita
+            if result[1] != expected_type:
+                if expected_type == 'int' and result[1] == 'bool':
+                    result = (int(result[0]), 'int')
+                else:
+                    raise TypeError(f"Cannot assign '{result[1]}' to '{expected_type}'.")
+            frame[slot] = result
+        return assign
+
+    def compileDeclaration(self, node):
+        var_type = node.var_type
+        default = ({'int': 0, 'str': ''}[var_type], var_type)
+        items = []
+        for index, (var_name, expr) in enumerate(node.declarations):
+            check = self.layout.check(node, index)
+            if isinstance(check, Exception):
+                # Declaração repetida: as anteriores executam e esta levanta o erro
+                items.append((var_name, None, None, self.compileRaise(check)))
+                break
+            expression = self.compileExpression(expr) if expr is not None else None
+            items.append((var_name, self.layout.slots[var_name], check == GUARD, expression))
+
+        def declare(frame):
+            for var_name, slot, guard, expression in items:
+                if slot is None:
+                    # Declaração repetida detectada na resolução: levanta o erro
+                    expression(frame)
+                # Checa se a variável já foi declarada
+                if guard and frame[slot] is not None:
+                    raise ValueError(f"Variable '{var_name}' already declared.")
+                if expression is None:
+                    frame[slot] = default
+                    continue
+                result = expression(frame)
+                # Checagem de tipo e conversão implícita
+                if result[1] != var_type:
+                    if var_type == 'int' and result[1] == 'bool':
+                        result = (int(result[0]), 'int')
+                    else:
+                        raise TypeError(f"Cannot assign '{result[1]}' to '{var_type}'.")
+                frame[slot] = result
+        return declare
+
+    def compilePrint(self, node):
+        expression = self.compileExpression(node.children[0])
+        write = self.io.write
+
+        def printf(frame):
+            write(expression(frame)[0])
+        return printf
+
+    def compileScanf(self, node):
+        read_int = self.io.readInt
+
+        def scanf(frame):
+            return read_int(), 'int'
+        return scanf
+
+    def compileIf(self, node):
+        condition = self.compileExpression(node.children[0])
+        true_block = self.compileStatement(node.children[1])
+        false_block = self.compileStatement(node.children[2]) if len(node.children) == 3 else None
+
+        def if_statement(frame):
+            value, value_type = condition(frame)
+            # Checa se a condição é do tipo 'bool'
+            if value_type != 'bool':
+                raise TypeError(f"Condition in 'if' must be 'bool', got '{value_type}'")
+            if value:
+                return true_block(frame)
+            elif false_block is not None:
+                return false_block(frame)
+        return if_statement
+
+    def compileWhile(self, node):
+        condition = self.compileExpression(node.children[0])
+        block = self.compileStatement(node.children[1])
+
+        def while_statement(frame):
+            while True:
+                value, value_type = condition(frame)
+                # Checa se a condição é do tipo 'bool'
+                if value_type != 'bool':
+                    raise TypeError(f"Condition in 'while' must be 'bool', got '{value_type}'")
+                if not value:
+                    return None
+                result = block(frame)
+                if result is not None:
+                    return result
+        return while_statement
+
+    def compileReturn(self, node):
+        # O resultado do return é propagado como valor de retorno das closures, sem exceções
+        return self.compileExpression(node.children[0])
+
+    def compileFuncCall(self, node):
+        # Função e número de argumentos são verificados antes de avaliar os argumentos
+        func = self.functions.get(node.func_name)
+        if func is None:
+            return self.compileRaise(ValueError(f"Function '{node.func_name}' not declared."))
+        if len(node.children) != len(func.params):
+            return self.compileRaise(ValueError(f"Function '{node.func_name}' expects {len(func.params)} arguments, got {len(node.children)}."))
+        args = [self.compileExpression(arg) for arg in node.children]
+        params = func.params
+        # Os parâmetros ocupam os primeiros slots; o resto do frame começa vazio
+        param_slots = func.layout.param_slots
+        padding = [None] * (func.layout.size - len(params))
+        distinct = param_slots == list(range(len(params)))
+        name = func.name
+        returns_value = func.func_type != 'void' and name != 'main'
+        returns_none = func.func_type == 'void' and name != 'main'
+
+        def call(frame):
+            # Os argumentos avaliados já formam o início do frame da função
+            values = [arg(frame) for arg in args]
+            for index, (param_type, param_name) in enumerate(params):
+                if param_type != values[index][1]:
+                    # Conversão implícita de bool para int
+                    if param_type == 'int' and values[index][1] == 'bool':
+                        values[index] = (int(values[index][0]), 'int')
+                    else:
+                        raise TypeError(f"Type mismatch in function '{name}' argument '{param_name}': expected '{param_type}', got '{values[index][1]}'.")
+            if distinct:
+                func_frame = values + padding
+            else:
+                # Parâmetros com nomes repetidos: o último argumento prevalece
+                func_frame = [None] * len(func.layout.slots)
+                for slot, result in zip(param_slots, values):
+                    func_frame[slot] = result
+            result = func.body(func_frame)
+            if result is None:
+                if returns_value:
+                    raise ValueError(f"Function '{name}' should return a value.")
+                return NONE
+            if returns_none:
+                raise ValueError(f"Function '{name}' should not return a value.")
+            return result
+        return call
+
+
+class CheckedCompiler(ClosureCompiler):
+    """Compila um programa que passou pelo TypeChecker, sem checagens de tipo.
+
+    Com os tipos conhecidos na compilação, expressões retornam só o valor (bools
+    já são os ints 0 e 1) e o frame guarda valores em vez de pares (valor, tipo).
+    Operadores, atribuições, condições e chamadas não checam nem convertem
+    tipos; só ficam as checagens que não dependem de tipo: variáveis declaradas
+    em caminhos condicionais e divisão por zero. O TypeChecker garante que o
+    valor de um return nunca é None, então None continua indicando "sem return".
+    """
+
+    def __init__(self, types, io=None):
+        super().__init__(io)
+        self.types = types
+
+    def compileIntVal(self, node):
+        value = node.value
+        return lambda frame: value
+
+    compileStrVal = compileIntVal
+    compileBoolVal = compileIntVal
+
+    def compileBinOp(self, node):
+        left = self.compileExpression(node.children[0])
+        right = self.compileExpression(node.children[1])
+        op = node.value
+        # Os dois operandos são avaliados antes da operação, como no Evaluate
+        if op == 'PLUS':
+            if self.types[node] == 'str':
+                return lambda frame: concat(left(frame), right(frame))
+            return lambda frame: left(frame) + right(frame)
+        if op == 'MINUS':
+            return lambda frame: left(frame) - right(frame)
+        if op == 'MULTIPLY':
+            return lambda frame: left(frame) * right(frame)
+        if op == 'DIVIDE':
+            def divide(frame):
+                lv = left(frame)
+                rv = right(frame)
+                if rv == 0:
+                    raise ZeroDivisionError("Division by zero")
+                return lv // rv
+            return divide
+        if op == 'AND':
+            def and_op(frame):
+                lv = left(frame)
+                rv = right(frame)
+                return int(lv and rv)
+            return and_op
+        if op == 'OR':
+            def or_op(frame):
+                lv = left(frame)
+                rv = right(frame)
+                return int(lv or rv)
+            return or_op
+        if op == 'EQUALS':
+            return lambda frame: int(left(frame) == right(frame))
+        if op == 'LESS':
+            return lambda frame: int(left(frame) < right(frame))
+        if op == 'GREATER':
+            return lambda frame: int(left(frame) > right(frame))
+        raise ValueError(f"Unknown binary operator: {op}")
+
+    def compileUnOp(self, node):
+        operand = self.compileExpression(node.children[0])
+        op = node.value
+        if op == 'PLUS':
+            return operand
+        if op == 'MINUS':
+            return lambda frame: -operand(frame)
+        if op == 'NOT':
+            return lambda frame: int(not operand(frame))
+        raise ValueError(f"Unknown unary operator: {op}")
+
+    def compileAssign(self, node):
+        name = node.children[0].value
+        slot = self.layout.slots[name]
+        guard = self.layout.check(node) == GUARD
+        expression = self.compileExpression(node.children[1])
+        if guard:
+            def assign_checked(frame):
+                if frame[slot] is None:
+                    raise ValueError(f"Variable '{name}' not declared.")
+                frame[slot] = expression(frame)
+            return assign_checked
+
+        def assign(frame):
+            frame[slot] = expression(frame)
+        return assign
+
+    def compileDeclaration(self, node):
+        default = {'int': 0, 'str': ''}[node.var_type]
+        items = []
+        for index, (var_name, expr) in enumerate(node.declarations):
+            expression = self.compileExpression(expr) if expr is not None else None
+            items.append((var_name, self.layout.slots[var_name], self.layout.check(node, index) == GUARD, expression))
+
+        def declare(frame):
+            for var_name, slot, guard, expression in items:
+                if guard and frame[slot] is not None:
+                    raise ValueError(f"Variable '{var_name}' already declared.")
+                frame[slot] = expression(frame) if expression is not None else default
+        return declare
+
+    def compilePrint(self, node):
+        expression = self.compileExpression(node.children[0])
+        write = self.io.write
+
+        def printf(frame):
+            write(expression(frame))
+        return printf
+
+    def compileScanf(self, node):
+        read_int = self.io.readInt
+
+        def scanf(frame):
+            return read_int()
+        return scanf
+
+    def compileIf(self, node):
+        condition = self.compileExpression(node.children[0])
+        true_block = self.compileStatement(node.children[1])
+        false_block = self.compileStatement(node.children[2]) if len(node.children) == 3 else None
+
+        def if_statement(frame):
+            if condition(frame):
+                return true_block(frame)
+            elif false_block is not None:
+                return false_block(frame)
+        return if_statement
+
+    def compileWhile(self, node):
+        condition = self.compileExpression(node.children[0])
+        block = self.compileStatement(node.children[1])
+
+        def while_statement(frame):
+            while condition(frame):
+                result = block(frame)
+                if result is not None:
+                    return result
+        return while_statement
+
+    def compileFuncCall(self, node):
+        func = self.functions[node.func_name]
+        args = [self.compileExpression(arg) for arg in node.children]
+        param_slots = func.layout.param_slots
+        padding = [None] * (func.layout.size - len(func.params))
+        if param_slots != list(range(len(func.params))):
+            # Parâmetros com nomes repetidos: o último argumento prevalece
+            def call_repeated(frame):
+                func_frame = [None] * len(func.layout.slots)
+                for slot, arg in zip(param_slots, args):
+                    func_frame[slot] = arg(frame)
+                return func.body(func_frame)
+            return call_repeated
+
+        def call(frame):
+            return func.body([arg(frame) for arg in args] + padding)
+        return call
+
+
+class TypedFunction(Function):
+    """Function com o lugar de cada variável no frame do UnboxedCompiler.
+
+    Variáveis int ficam em um array('q') e variáveis str em uma lista. Variáveis
+    com acesso GUARD também ficam na lista, porque precisam de None para indicar
+    que ainda não foram declaradas.
+    """
+
+    def __init__(self, func_dec):
+        super().__init__(func_dec)
+        guarded = set(self.layout.guarded())
+        counts = [0, 0]
+        # Nome -> (INTS ou OBJECTS, índice)
+        self.places = {}
+        for name in sorted(self.layout.slots, key=self.layout.slots.get):
+            kind = INTS if self.layout.types.get(name) == 'int' and name not in guarded else OBJECTS
+            self.places[name] = (kind, counts[kind])
+            counts[kind] += 1
+        self.ints = array('q', bytes(8 * counts[INTS]))
+        self.objects = [None] * counts[OBJECTS]
+
+
+def store_int(frame, index, value):
+    # Guarda um int no frame; um valor fora de 64 bits troca o array por uma lista
+    try:
+        frame[INTS][index] = value
+    except OverflowError:
+        frame[INTS] = frame[INTS].tolist()
+        frame[INTS][index] = value
+
+
+class UnboxedCompiler(CheckedCompiler):
+    """CheckedCompiler com as variáveis guardadas por tipo.
+
+    O frame é a lista [ints, objects]: os ints ficam sem caixa em um array('q')
+    (8 bytes por variável, sem um objeto int vivo para cada uma) e os str em uma
+    lista. Um int que não cabe em 64 bits promove o array do frame para uma
+    lista, então inteiros grandes continuam funcionando como no Evaluate.
+    """
+
+    def __init__(self, types, io=None):
+        super().__init__(types, io)
+        # FunctionLayout -> lugares das variáveis da função
+        self.places = {}
+
+    def createFunction(self, func_dec):
+        func = TypedFunction(func_dec)
+        self.places[func.layout] = func.places
+        return func
+
+    def emptyFrame(self):
+        return [array('q'), []]
+
+    def compileIdentifier(self, node):
+        kind, index = self.places[self.layout][node.value]
+        if self.layout.check(node) == GUARD:
+            name = node.value
+
+            def load_checked(frame):
+                value = frame[OBJECTS][index]
+                if value is None:
+                    raise ValueError(f"Undefined variable '{name}'")
+                return value
+            return load_checked
+        if kind == INTS:
+            return lambda frame: frame[INTS][index]
+        return lambda frame: frame[OBJECTS][index]
+
+    def compileAssign(self, node):
+        name = node.children[0].value
+        kind, index = self.places[self.layout][name]
+        expression = self.compileExpression(node.children[1])
+        if self.layout.check(node) == GUARD:
+            def assign_checked(frame):
+                if frame[OBJECTS][index] is None:
+                    raise ValueError(f"Variable '{name}' not declared.")
+                frame[OBJECTS][index] = expression(frame)
+            return assign_checked
+        if kind == INTS:
+            def assign_int(frame):
+                value = expression(frame)
+                try:
+                    frame[INTS][index] = value
+                except OverflowError:
+                    store_int(frame, index, value)
+            return assign_int
+
+        def assign(frame):
+            frame[OBJECTS][index] = expression(frame)
+        return assign
+
+    def compileDeclaration(self, node):
+        default = {'int': 0, 'str': ''}[node.var_type]
+        places = self.places[self.layout]
+        items = []
+        for index, (var_name, expr) in enumerate(node.declarations):
+            expression = self.compileExpression(expr) if expr is not None else None
+            kind, place = places[var_name]
+            items.append((var_name, kind, place, self.layout.check(node, index) == GUARD, expression))
+
+        def declare(frame):
+            for var_name, kind, place, guard, expression in items:
+                if guard and frame[OBJECTS][place] is not None:
+                    raise ValueError(f"Variable '{var_name}' already declared.")
+                value = expression(frame) if expression is not None else default
+                if kind == INTS:
+                    store_int(frame, place, value)
+                else:
+                    frame[OBJECTS][place] = value
+        return declare
+
+    def compileFuncCall(self, node):
+        func = self.functions[node.func_name]
+        args = [self.compileExpression(arg) for arg in node.children]
+        # Na ordem dos parâmetros, para que o último de nomes repetidos prevaleça
+        places = [func.places[param_name] for _, param_name in func.params]
+        ints, objects = func.ints, func.objects
+        if places == [(INTS, index) for index in range(len(places))]:
+            # Só parâmetros int: os argumentos já formam o início do array
+            padding = ints[len(places):]
+
+            def call_ints(frame):
+                values = [arg(frame) for arg in args]
+                try:
+                    storage = array('q', values)
+                except OverflowError:
+                    storage = values + padding.tolist()
+                else:
+                    storage.extend(padding)
+                return func.body([storage, objects[:]])
+            return call_ints
+
+        def call(frame):
+            values = [arg(frame) for arg in args]
+            func_frame = [ints[:], objects[:]]
+            for (kind, index), value in zip(places, values):
+                if kind == INTS:
+                    store_int(func_frame, index, value)
+                else:
+                    func_frame[OBJECTS][index] = value
+            return func.body(func_frame)
+        return call
+
+
+def compile_program(program, types=None, io=None, unboxed=False):
+    # Compila a AST gerada por Parser.run e retorna uma função que executa o programa;
+    # com os tipos do TypeChecker, compila sem as checagens de tipo em tempo de execução,
+    # e com unboxed guarda as variáveis int em array('q')
+    if types is not None:
+        if unboxed:
+            return UnboxedCompiler(types, io).compileProgram(program)
+        return CheckedCompiler(types, io).compileProgram(program)
+    return ClosureCompiler(io).compileProgram(program)
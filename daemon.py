@@ -0,0 +1,170 @@
+"""Daemon que mantém programas analisados em memória e executa cada pedido num processo filho.
+
+O daemon escuta num socket Unix. Cada pedido do client.py traz o caminho do
+programa, as opções e os descritores de entrada, saída e saída de erro do
+cliente. O programa é analisado e preparado (batch.prepare) uma vez por
+arquivo e modo de execução, e de novo só quando o arquivo muda. Cada pedido
+roda num fork do daemon: o filho herda a árvore e o código já compilados por
+cópia na escrita, troca os descritores 0, 1 e 2 pelos do cliente, executa e
+responde com o código de saída. Assim uma execução não paga a inicialização
+do Python, os imports nem a análise, e nenhum estado (FuncTable, memória,
+saída pendente) passa de um pedido para outro.
+
+Uso: python daemon.py [--socket=CAMINHO] [--engine=MODO] [--no-cache] [programa.c...]
+"""
+import os
+import signal
+import socket
+import sys
+import time
+
+from batch import ENGINES, parse, prepare
+from cache import CACHE_DIR_NAME
+from client import MAX_REQUEST, decode, socket_path
+from streams import IOContext, FLUSH_POLICIES
+
+# Opções aceitas na linha de comando
+OPCOES = {
+    'socket': 'caminho do socket (padrão: $COMPILADOR_SOCKET ou /tmp/compilador-<uid>.sock)',
+    'engine': 'modo usado quando o pedido não escolhe: evaluate (padrão), vm, closure, typecheck, unboxed ou python',
+    'no-cache': f'não usa o cache de programas analisados ({CACHE_DIR_NAME}/)',
+}
+
+
+class Daemon:
+    def __init__(self, path, engine='evaluate', use_cache=True):
+        self.path = path
+        self.engine = engine
+        self.use_cache = use_cache
+        # (arquivo, modo) -> (mtime e tamanho do arquivo, IOContext, função que executa o programa)
+        self.programs = {}
+        self.server = None
+
+    def load(self, filename, engine):
+        # Programa preparado para o modo, analisado de novo se o arquivo mudou
+        info = os.stat(filename)
+        signature = (info.st_mtime_ns, info.st_size)
+        entry = self.programs.get((filename, engine))
+        if entry is None or entry[0] != signature:
+            # Sem stream explícito, a entrada e a saída são sys.stdin e sys.stdout
+            # no momento do uso, que no filho são os descritores do cliente
+            io = IOContext()
+            ast = parse(filename, self.use_cache)
+            run = prepare(ast, engine, io) if ast else (lambda: None)
+            entry = (signature, io, run)
+            self.programs[(filename, engine)] = entry
+        return entry
+
+    def serve(self):
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if os.path.exists(self.path):
+            # Socket de um daemon que não terminou direito; recusa se ainda há alguém escutando
+            try:
+                self.server.connect(self.path)
+                raise OSError(f"Já existe um daemon escutando em {self.path}")
+            except ConnectionRefusedError:
+                os.unlink(self.path)
+            self.server.close()
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.path)
+        self.server.listen(64)
+        # Os filhos são recolhidos pelo sistema; SIGTERM fecha o socket antes de sair
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            while True:
+                connection, _ = self.server.accept()
+                with connection:
+                    self.handle(connection)
+        finally:
+            self.server.close()
+            os.unlink(self.path)
+
+    def handle(self, connection):
+        message, fds, _, _ = socket.recv_fds(connection, MAX_REQUEST, 3)
+        try:
+            if len(fds) != 3:
+                return
+            try:
+                request = decode(message)
+                engine = request.get('engine', self.engine)
+                if engine not in ENGINES:
+                    raise ValueError(f"Unknown engine '{engine}'; use one of {', '.join(ENGINES)}")
+                if request.get('flush', FLUSH_POLICIES[0]) not in FLUSH_POLICIES:
+                    raise ValueError(f"Unknown flush policy: {request['flush']}")
+                _, io, run = self.load(request['file'], engine)
+            except Exception as error:
+                # Erro antes de executar (arquivo, sintaxe, tipos): responde sem criar processo
+                os.write(fds[2], f"{type(error).__name__}: {error}\n".encode())
+                connection.sendall(b'1')
+                return
+            # Nada pendente nos buffers do daemon pode ser copiado para o filho
+            sys.stdout.flush()
+            sys.stderr.flush()
+            if os.fork() == 0:
+                self.child(connection, fds, io, run, request)
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def child(self, connection, fds, io, run, request):
+        # Executa o pedido no processo filho e nunca retorna
+        status = 1
+        try:
+            self.server.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            if 'flush' in request:
+                io.output.policy = request['flush']
+            try:
+                with io:
+                    run()
+                status = 0
+            except SystemExit as exit:
+                status = exit.code if isinstance(exit.code, int) else 1
+            except BaseException as error:
+                # Mesma última linha de erro que main.py mostra
+                print(f"{type(error).__name__}: {error}", file=sys.stderr)
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            try:
+                connection.sendall(str(status).encode())
+            finally:
+                os._exit(status)
+
+
+def main(argv):
+    # Separa as opções (--nome ou --nome=valor) dos arquivos
+    opcoes = {}
+    argumentos = []
+    for arg in argv:
+        if arg.startswith('--'):
+            nome, _, valor = arg[2:].partition('=')
+            if nome not in OPCOES:
+                print(f"Opção desconhecida: --{nome}")
+                sys.exit(1)
+            opcoes[nome] = valor or True
+        else:
+            argumentos.append(arg)
+
+    engine = opcoes.get('engine', 'evaluate')
+    if engine not in ENGINES:
+        print(f"Uso: --engine=MODO, com MODO em {', '.join(ENGINES)}")
+        sys.exit(1)
+    path = opcoes['socket'] if isinstance(opcoes.get('socket'), str) else socket_path()
+    daemon = Daemon(path, engine, 'no-cache' not in opcoes)
+
+    # Os programas passados na linha de comando são carregados antes do primeiro pedido
+    for filename in argumentos:
+        start = time.perf_counter()
+        daemon.load(os.path.abspath(filename), engine)
+        print(f"{filename}: preparado em {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+    print(f"daemon escutando em {path}", file=sys.stderr)
+    daemon.serve()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,129 @@
+import re
+from arvore import *
+from classes import PrePro, Parser, RegexTokenizer
+from memo import walk
+
+#Strings e chaves do código filtrado; chaves dentro de strings não contam
+BRACE_REGEX = re.compile(r'"[^"]*"|[{}]')
+
+
+def function_spans(code):
+    """Divide o código filtrado em trechos (início, fim), um por função.
+
+    Cada trecho termina na chave que fecha o bloco da função e começa logo
+    depois do trecho anterior, com os espaços entre as funções. Como nenhum
+    token atravessa essa chave, tokenizar os trechos separadamente dá os mesmos
+    tokens que tokenizar o código inteiro. Retorna None quando o código não se
+    divide assim (chaves desbalanceadas ou texto depois da última função).
+    """
+    spans = []
+    depth = 0
+    start = 0
+    for match in BRACE_REGEX.finditer(code):
+        text = match.group()
+        if text == '{':
+            depth += 1
+        elif text == '}':
+            depth -= 1
+            if depth == 0:
+                spans.append((start, match.end()))
+                start = match.end()
+            elif depth < 0:
+                return None
+    if depth != 0 or code[start:].strip(' \n'):
+        return None
+    return spans
+
+
+def positioned(func_dec):
+    # Nós da função com posição no código (as que o parser registra)
+    return [node for node in walk(func_dec) if node.start is not None]
+
+
+class IncrementalParser:
+    """Reanalisa só as funções cujo texto mudou desde a análise anterior.
+
+    Guarda, para cada função da árvore anterior, o texto do trecho (depois do
+    PrePro.filter), a posição dele e a FuncDecl. Numa nova análise o código é
+    filtrado e dividido por function_spans; trechos com o mesmo texto de antes
+    reaproveitam a FuncDecl, com as posições dos nós deslocadas, e só os demais
+    passam pelo Parser. O resultado é igual ao de Parser.run no código
+    filtrado, inclusive as posições. Qualquer caso que foge disso (erro de
+    sintaxe, chaves desbalanceadas) é resolvido com uma análise completa, então
+    os erros também são os mesmos.
+
+    As FuncDecl reaproveitadas são compartilhadas com a árvore anterior, que
+    não deve mais ser usada depois de uma nova análise.
+    """
+
+    def __init__(self, tokenizer_class=RegexTokenizer):
+        self.tokenizer_class = tokenizer_class
+        self.source = ''
+        # Texto do trecho -> lista de [posição, FuncDecl, nós com posição]
+        self.functions = {}
+        # Funções reaproveitadas e analisadas na última chamada
+        self.reused = 0
+        self.parsed = 0
+
+    def parse(self, source):
+        # Retorna a AST de source, reaproveitando as funções que não mudaram
+        code = PrePro.filter(source)
+        spans = function_spans(code)
+        program = None
+        if spans is not None:
+            try:
+                program, functions = self.parseSpans(code, spans)
+            except Exception:
+                program = None
+        if program is None:
+            # Análise completa: levanta o mesmo erro que Parser.run
+            program = Parser(self.tokenizer_class).run(code)
+            functions = {}
+            self.reused, self.parsed = 0, len(program.children) - 1
+        self.source = source
+        self.functions = functions
+        return program
+
+    def edit(self, start, end, text):
+        # Troca source[start:end] por text e reanalisa
+        return self.parse(self.source[:start] + text + self.source[end:])
+
+    def parseSpans(self, code, spans):
+        previous = self.functions
+        functions = {}
+        program = Program()
+        reused = parsed = 0
+        for start, end in spans:
+            text = code[start:end]
+            candidates = previous.get(text)
+            if candidates:
+                # Mesmo texto: a função é a mesma, só muda de posição
+                entry = candidates.pop()
+                delta = start - entry[0]
+                if delta:
+                    for node in entry[2]:
+                        node.start += delta
+                    entry[0] = start
+                reused += 1
+            else:
+                func_dec = self.parseFunction(text)
+                nodes = positioned(func_dec)
+                for node in nodes:
+                    node.start += start
+                entry = [start, func_dec, nodes]
+                parsed += 1
+            functions.setdefault(text, []).append(entry)
+            program.children.append(entry[1])
+        program.children.append(FuncCall("main", []))
+        self.reused, self.parsed = reused, parsed
+        return program, functions
+
+    def parseFunction(self, text):
+        # Analisa um trecho que deve conter exatamente uma função
+        parser = Parser(self.tokenizer_class)
+        parser.tokenizer = self.tokenizer_class(text)
+        func_dec = parser.parseFunction()
+        parser.tokenizer.selectNext()
+        if parser.tokenizer.next.type != 'EOF':
+            raise ValueError("Function span does not end at the function's closing brace")
+        return func_dec
@@ -0,0 +1,189 @@
+from arvore import *
+from memo import walk
+
+#Comparação equivalente com os operandos trocados (n > i é i < n)
+FLIPPED = {'LESS': 'GREATER', 'GREATER': 'LESS'}
+#Folhas que não dependem de nenhuma variável
+CONSTANTS = (IntVal, StrVal, BoolVal)
+
+
+class LoopInvariant(Node):
+    # Expressão do laço que não muda entre as iterações. O valor é calculado na
+    # primeira vez que a expressão é avaliada em cada execução do laço e guardado
+    # em loop.cache[value]; um erro não é guardado e sai no mesmo ponto de antes
+    __slots__ = ('loop',)
+
+    def __init__(self, index, expression, loop):
+        super().__init__(index)
+        self.children = [expression]
+        self.loop = loop
+
+    def Evaluate(self, funct_table, symbol_table):
+        cache = self.loop.cache
+        result = cache[self.value]
+        if result is None:
+            result = cache[self.value] = self.children[0].Evaluate(funct_table, symbol_table)
+        return result
+
+
+class OptimizedWhile(While):
+    """While com expressões invariantes guardadas e, se reconhecido, laço contado.
+
+    counter é None ou (variável, limite, passo, comandos) para laços da forma
+    while (i < n) { ...; i = i + c; } (ou i > n com i = i - c), em que i só é
+    atribuída no último comando e n não muda no corpo. Na execução, se i é int
+    e n é int ou bool, o laço roda como um range do Python: i é escrita na
+    tabela de símbolos a cada iteração e os outros comandos são avaliados
+    normalmente. Nos outros casos roda o While comum.
+
+    cache guarda os valores das LoopInvariant do laço na execução atual; é
+    trocado a cada execução e restaurado no fim, então uma recursão que executa
+    o mesmo laço não mistura os valores.
+    """
+    # Mesmo layout do While, para a troca de __class__; counter e cache ficam no __dict__
+    __slots__ = ()
+
+    def Evaluate(self, funct_table, symbol_table):
+        saved = self.cache
+        self.cache = [None] * self.invariants
+        try:
+            if self.counter is None or not self.countedLoop(funct_table, symbol_table):
+                While.Evaluate(self, funct_table, symbol_table)
+        finally:
+            self.cache = saved
+        return None, None
+
+    def countedLoop(self, funct_table, symbol_table):
+        # Executa o laço contado; retorna False, sem efeito nenhum, se os tipos não permitem
+        name, bound, step, statements = self.counter
+        symbols = symbol_table.symbols
+        current = symbols.get(name)
+        if current is None or current[1] != 'int':
+            return False
+        # O limite não tem chamadas nem scanf: avaliar de novo no While comum não muda nada
+        bound_value, bound_type = bound.Evaluate(funct_table, symbol_table)
+        if bound_type != 'int' and bound_type != 'bool':
+            return False
+        values = range(current[0], bound_value, step)
+        for value in values:
+            symbols[name] = (value, 'int')
+            for statement in statements:
+                statement.Evaluate(funct_table, symbol_table)
+        # Valor que faz a condição falhar, como depois da última atribuição i = i + c
+        if values:
+            symbols[name] = (values[-1] + step, 'int')
+        return True
+
+
+def written(node):
+    # Nomes atribuídos ou declarados em algum ponto de node
+    names = set()
+    for child in walk(node):
+        if isinstance(child, Assign):
+            names.add(child.children[0].value)
+        elif isinstance(child, Declaration):
+            names.update(var_name for var_name, _ in child.declarations)
+    return names
+
+
+def counted_loop(loop, names):
+    # (variável, posição do limite na condição, passo) se o While é um laço contado, ou None
+    condition, body = loop.children
+    if type(condition) is not BinOp or condition.value not in FLIPPED or type(body) is not Statements:
+        return None
+    if not body.children or type(body.children[-1]) is not Assign:
+        return None
+    update = body.children[-1]
+    name = update.children[0].value
+    # A variável atribuída no último comando precisa ser um lado da comparação
+    left, right = condition.children
+    if type(left) is Identifier and left.value == name:
+        bound_index, comparison = 1, condition.value
+    elif type(right) is Identifier and right.value == name:
+        bound_index, comparison = 0, FLIPPED[condition.value]
+    else:
+        return None
+    # i = i + c, i = c + i ou i = i - c, com c constante
+    operation = update.children[1]
+    if type(operation) is not BinOp or operation.value not in ('PLUS', 'MINUS'):
+        return None
+    operands = operation.children
+    if operation.value == 'PLUS' and type(operands[0]) is IntVal:
+        operands = operands[::-1]
+    if type(operands[0]) is not Identifier or operands[0].value != name or type(operands[1]) is not IntVal:
+        return None
+    step = operands[1].value if operation.value == 'PLUS' else -operands[1].value
+    if not (step > 0 if comparison == 'LESS' else step < 0):
+        return None
+    # i só muda no último comando, e o limite não muda no corpo
+    updates = [child for child in walk(body) if isinstance(child, Assign) and child.children[0].value == name]
+    declared = any(isinstance(child, Declaration) and any(var_name == name for var_name, _ in child.declarations)
+                   for child in walk(body))
+    if updates != [update] or declared or not invariant(condition.children[bound_index], names):
+        return None
+    return name, bound_index, step
+
+
+def invariant(node, names):
+    # Se a expressão tem o mesmo valor em todas as iterações: sem chamadas, scanf nem variáveis de names
+    if isinstance(node, CONSTANTS) or type(node) is LoopInvariant:
+        return True
+    if type(node) is Identifier:
+        return node.value not in names
+    if type(node) in (BinOp, UnOp):
+        return all(invariant(child, names) for child in node.children)
+    return False
+
+
+def hoist(node, loop, names):
+    """Troca as maiores expressões invariantes dentro de node por LoopInvariant de loop.
+
+    Retorna se node é uma expressão invariante; nesse caso quem troca é o pai,
+    e só expressões com operadores são trocadas (ler uma constante ou uma
+    variável custa o mesmo que ler o cache).
+    """
+    if isinstance(node, CONSTANTS) or type(node) is LoopInvariant:
+        return True
+    if type(node) is Identifier:
+        return node.value not in names
+    flags = [child is not None and hoist(child, loop, names) for child in node.children]
+    if type(node) in (BinOp, UnOp) and all(flags):
+        return True
+    for index, flag in enumerate(flags):
+        if flag and type(node.children[index]) in (BinOp, UnOp):
+            node.children[index] = LoopInvariant(loop.invariants, node.children[index], loop)
+            loop.invariants += 1
+    if isinstance(node, Declaration):
+        for index, (var_name, expr) in enumerate(node.declarations):
+            if expr is not None and hoist(expr, loop, names) and type(expr) in (BinOp, UnOp):
+                node.declarations[index] = (var_name, LoopInvariant(loop.invariants, expr, loop))
+                loop.invariants += 1
+    return False
+
+
+def install_loops(program):
+    """Troca a classe dos While por OptimizedWhile e retorna quantos laços são contados.
+
+    Os laços são processados de fora para dentro: uma expressão invariante no
+    laço de fora é guardada por ele, e os laços de dentro ainda guardam as
+    expressões que só são invariantes neles. Como memo e profiler, altera a
+    árvore; os While já instrumentados pelo profiler ficam como estão.
+    """
+    counted = 0
+    for node in list(walk(program)):
+        if type(node) is not While:
+            continue
+        names = written(node)
+        counter = counted_loop(node, names)
+        node.__class__ = OptimizedWhile
+        node.cache = None
+        node.invariants = 0
+        hoist(node, node, names)
+        node.counter = None
+        if counter is not None:
+            # O limite é lido depois de hoist, que pode tê-lo trocado por uma LoopInvariant
+            name, bound_index, step = counter
+            bound = node.children[0].children[bound_index]
+            node.counter = (name, bound, step, node.children[1].children[:-1])
+            counted += 1
+    return counted
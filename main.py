@@ -1,30 +1,242 @@
 from classes import *
 import sys
 from arvore import *
+from cache import *
+
+# Opções aceitas na linha de comando
+OPCOES = {
+    'vm': 'executa o programa na máquina virtual de bytecode',
+    'closure': 'executa o programa compilado para closures especializadas',
+    'stream': 'lê o arquivo em blocos, removendo os comentários no próprio tokenizer',
+    'token-buffer': 'reconhece todos os tokens antes da análise, num TokenBuffer compacto',
+    'arena': 'guarda a árvore em colunas array (arena.py) e executa com o ArenaInterpreter',
+    'rebalance': 'rebalanceia as cadeias longas de + e * quando o resultado não muda (rebalance.py)',
+    'no-cache': f'não usa o cache de programas analisados ({CACHE_DIR_NAME}/)',
+    'cache-stats': 'mostra na saída de erro o tempo economizado pelo cache',
+    'optimize': 'dobra constantes e remove código inalcançável antes de executar',
+    'dump': 'mostra a árvore sintática (otimizada, com --optimize) sem executar',
+    'typecheck': 'verifica os tipos antes de executar e roda sem checagens de tipo',
+    'unboxed': 'guarda as variáveis int sem caixa, em array(\'q\') (implica --typecheck)',
+    'python': 'transpila o programa verificado para Python e executa com exec (implica --typecheck)',
+    'emit-python': 'mostra o código Python gerado por --python sem executar',
+    'max-depth': 'profundidade máxima de chamadas na VM (--max-depth=N, implica --vm)',
+    'tail-calls': 'executa return f(...) sem empilhar um quadro novo (implica --vm)',
+    'memo': 'memoriza chamadas a funções puras no interpretador de árvore (--memo=N entradas)',
+    'memo-stats': 'mostra na saída de erro as estatísticas da memoização ao sair (implica --memo)',
+    'flush': 'quando descarregar a saída do printf: size (padrão), line ou exit',
+    'profile': 'mede funções, loops e nós no interpretador de árvore (--profile=N: top N)',
+    'loops': 'executa laços contados como range e guarda expressões invariantes no interpretador de árvore',
+}
+
+# Separa as opções (--nome ou --nome=valor) do arquivo
+opcoes = {}
+argumentos = []
+for arg in sys.argv[1:]:
+    if arg.startswith('--'):
+        nome, _, valor = arg[2:].partition('=')
+        if nome not in OPCOES:
+            print(f"Opção desconhecida: --{nome}")
+            sys.exit(1)
+        opcoes[nome] = valor or True
+    else:
+        argumentos.append(arg)
+
+# Valida a profundidade máxima de chamadas
+if 'max-depth' in opcoes:
+    if opcoes['max-depth'] is True or not opcoes['max-depth'].isdigit() or int(opcoes['max-depth']) < 1:
+        print("Uso: --max-depth=N, com N inteiro positivo")
+        sys.exit(1)
+    opcoes['max-depth'] = int(opcoes['max-depth'])
+    opcoes['vm'] = True
+if 'tail-calls' in opcoes:
+    opcoes['vm'] = True
+
+if 'emit-python' in opcoes:
+    opcoes['python'] = True
+if 'python' in opcoes or 'unboxed' in opcoes:
+    opcoes['typecheck'] = True
+
+# Valida o tamanho do cache de memoização
+if 'memo' in opcoes and opcoes['memo'] is not True:
+    if not opcoes['memo'].isdigit() or int(opcoes['memo']) < 1:
+        print("Uso: --memo[=N], com N inteiro positivo")
+        sys.exit(1)
+    opcoes['memo'] = int(opcoes['memo'])
+if 'memo-stats' in opcoes:
+    opcoes.setdefault('memo', True)
+
+# Valida o tamanho do relatório do profiler
+if 'profile' in opcoes and opcoes['profile'] is not True:
+    if not opcoes['profile'].isdigit() or int(opcoes['profile']) < 1:
+        print("Uso: --profile[=N], com N inteiro positivo")
+        sys.exit(1)
+    opcoes['profile'] = int(opcoes['profile'])
+
+# Valida a política de descarga da saída
+if 'flush' in opcoes and opcoes['flush'] not in FLUSH_POLICIES:
+    print(f"Uso: --flush=POLÍTICA, com POLÍTICA em {', '.join(FLUSH_POLICIES)}")
+    sys.exit(1)
+
+# A arena só roda no ArenaInterpreter: as opções que usam a árvore de objetos não se aplicam
+ARENA_COMPATIVEIS = ('arena', 'stream', 'token-buffer', 'rebalance', 'no-cache', 'cache-stats', 'flush')
+if 'arena' in opcoes:
+    conflitos = [nome for nome in opcoes if nome not in ARENA_COMPATIVEIS]
+    if conflitos:
+        print(f"A opção --arena não pode ser usada com --{conflitos[0]}")
+        sys.exit(1)
+
+# Opções que só alteram o interpretador de árvore, e os modos que terminam antes dele
+# (as opções digitadas vêm antes das implícitas, para a mensagem citar a que o usuário passou)
+SO_ARVORE = ('memo-stats', 'memo', 'profile', 'loops')
+SEM_ARVORE = ('dump', 'emit-python', 'python', 'unboxed', 'typecheck', 'closure', 'max-depth', 'tail-calls', 'vm')
+opcao = next((nome for nome in SO_ARVORE if nome in opcoes), None)
+conflito = next((nome for nome in SEM_ARVORE if nome in opcoes), None)
+if opcao and conflito:
+    print(f"A opção --{opcao} não pode ser usada com --{conflito}")
+    sys.exit(1)
 
 # Verifica se o arquivo foi passado como argumento
-if len(sys.argv) < 2:
-    print("Uso: python3 parser.py <arquivo.c>")
+if len(argumentos) < 1:
+    print("Uso: python3 main.py [opções] <arquivo.c>")
+    for nome, descricao in OPCOES.items():
+        print(f"  --{nome:<12} {descricao}")
     sys.exit(1)
 
 # Determina o nome do arquivo
-filename = sys.argv[1]
-
-# Lê o código do arquivo
-with open(filename, 'r') as file:
-    code = file.read()
-    
-# Filtra o código
-filtered_code = PrePro.filter(code)
-# Cria o parser
-parser = Parser()
-# Cria a árvore sintática
-ast = parser.run(filtered_code)
-
-# Cria FuncTable e SymbolTable
-funcTable = FuncTable()
-symbolTable = SymbolTable()
-
-# Avalia a árvore sintática
-if ast:
-    ast.Evaluate(funcTable, symbolTable)
+filename = argumentos[0]
+
+def analisar():
+    # Cria o parser; com --arena, cada função vai para a arena assim que é analisada
+    tokenizer_class = BufferTokenizer if 'token-buffer' in opcoes else RegexTokenizer
+    if 'arena' in opcoes:
+        from arena import ArenaParser
+        parser = ArenaParser(tokenizer_class, 'rebalance' in opcoes)
+    else:
+        parser = Parser(tokenizer_class, 'rebalance' in opcoes)
+
+    if 'stream' in opcoes:
+        # Lê e tokeniza o arquivo em blocos, sem carregar o código inteiro
+        with open(filename, 'r') as file:
+            return parser.runTokenizer(StreamTokenizer(file))
+
+    # Lê o código do arquivo
+    with open(filename, 'r') as file:
+        code = file.read()
+
+    # Filtra o código
+    filtered_code = PrePro.filter(code)
+    # Cria a árvore sintática
+    return parser.run(filtered_code)
+
+
+if 'no-cache' in opcoes:
+    ast = analisar()
+else:
+    # Reaproveita a árvore sintática se o arquivo e o compilador não mudaram
+    estatisticas = {}
+    modo = ''.join(nome for nome in ('stream', 'arena', 'rebalance') if nome in opcoes)
+    chave = source_key(filename, modo)
+    ast = load_or_parse(ArtifactCache.forSource(filename), chave, analisar, estatisticas)
+    if 'cache-stats' in opcoes:
+        if estatisticas['hit']:
+            economia = estatisticas['parse_seconds'] - estatisticas['load_seconds']
+            print(f"cache: hit, carga {estatisticas['load_seconds'] * 1000:.2f} ms, "
+                  f"parse evitado {estatisticas['parse_seconds'] * 1000:.2f} ms, economia {economia * 1000:.2f} ms", file=sys.stderr)
+        else:
+            print(f"cache: miss, parse {estatisticas['parse_seconds'] * 1000:.2f} ms", file=sys.stderr)
+
+# Otimiza a árvore sintática
+if ast and 'optimize' in opcoes:
+    from optimizer import optimize
+    ast = optimize(ast)
+
+# Mostra a árvore sintática sem executar
+if 'dump' in opcoes:
+    from optimizer import dump
+    if ast:
+        print(dump(ast))
+    sys.exit(0)
+
+# Verifica os tipos do programa inteiro antes de executar
+tipos = None
+if ast and 'typecheck' in opcoes:
+    from typechecker import type_check
+    verificador, erros = type_check(ast)
+    if erros:
+        for erro in erros:
+            print(f"{type(erro).__name__}: {erro}", file=sys.stderr)
+        sys.exit(1)
+    tipos = verificador.types
+
+# Mostra o código Python gerado sem executar
+if 'emit-python' in opcoes:
+    from transpiler import transpile, source
+    if ast:
+        print(source(transpile(ast, tipos)))
+    sys.exit(0)
+
+# Saída com buffer e entrada lida em blocos; a saída é descarregada no fim, mesmo com erro
+io = IOContext(BufferedOutput(policy=opcoes.get('flush', FLUSH_SIZE)))
+with io:
+    # Executa a arena sem criar objetos por nó
+    if ast and 'arena' in opcoes:
+        from arena import ArenaInterpreter
+        ArenaInterpreter(ast, io).run()
+        sys.exit(0)
+
+    # Executa na máquina virtual
+    if ast and 'vm' in opcoes:
+        from vm import VM, DEFAULT_MAX_DEPTH
+        VM(ast, opcoes.get('max-depth', DEFAULT_MAX_DEPTH), 'tail-calls' in opcoes, io).run()
+        sys.exit(0)
+
+    # Executa o programa transpilado para Python
+    if ast and 'python' in opcoes:
+        from transpiler import compile_program as transpile_program
+        transpile_program(ast, tipos, io)()
+        sys.exit(0)
+
+    # Executa o programa compilado para closures; com os tipos verificados, sem checagens de tipo
+    if ast and ('closure' in opcoes or tipos is not None):
+        from closures import compile_program
+        compile_program(ast, tipos, io, 'unboxed' in opcoes)()
+        sys.exit(0)
+
+    # Cria FuncTable e SymbolTable
+    funcTable = FuncTable(io)
+    symbolTable = SymbolTable()
+
+    # Memoiza as chamadas a funções puras
+    memo = None
+    if ast and 'memo' in opcoes:
+        from memo import Memo, install_memo, DEFAULT_MEMO_SIZE
+        memo = Memo(DEFAULT_MEMO_SIZE if opcoes['memo'] is True else opcoes['memo'])
+        puras = install_memo(ast, memo)
+
+    # Instrumenta FuncCall, While, If e BinOp; sem --profile a árvore não muda
+    profiler = None
+    if ast and 'profile' in opcoes:
+        from profiler import Profiler, install_profiler, report, DEFAULT_TOP
+        profiler = install_profiler(ast, Profiler())
+
+    # Laços contados e expressões invariantes; com --profile, os While medidos ficam como estão
+    if ast and 'loops' in opcoes:
+        from loops import install_loops
+        install_loops(ast)
+
+    # Avalia a árvore sintática
+    inicio = profiler.clock() if profiler else None
+    try:
+        if ast:
+            ast.Evaluate(funcTable, symbolTable)
+    finally:
+        # O relatório sai mesmo se o programa terminar com erro
+        if profiler is not None:
+            profiler.total = profiler.clock() - inicio
+            io.flush()
+            with open(filename, 'r') as file:
+                mapa = SourceMap(file.read(), filtered='stream' not in opcoes)
+            print(report(profiler, mapa, DEFAULT_TOP if opcoes['profile'] is True else opcoes['profile']), file=sys.stderr)
+        # As estatísticas saem mesmo se o programa terminar com erro
+        if memo is not None and 'memo-stats' in opcoes:
+            print(f"{memo.report()}; funções puras: {', '.join(sorted(puras)) or '-'}", file=sys.stderr)
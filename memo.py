@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from arvore import *
+
+#Número máximo de resultados guardados quando o tamanho não é informado
+DEFAULT_MEMO_SIZE = 4096
+
+
+def walk(node):
+    # Percorre todos os nós da árvore, incluindo as expressões das declarações
+    yield node
+    if isinstance(node, Declaration):
+        for _, expr in node.declarations:
+            if expr is not None:
+                yield from walk(expr)
+    for child in node.children:
+        yield from walk(child)
+
+
+def pure_functions(functions):
+    """Retorna os nomes das funções puras de um dicionário nome -> FuncDecl.
+
+    Uma função é pura quando nem ela nem nenhuma função que ela chama, direta ou
+    indiretamente, contém Print ou Scanf. Como não existem variáveis globais, o
+    resultado de uma função pura depende só dos argumentos. Chamadas a funções
+    não declaradas tornam a função impura.
+    """
+    calls = {}
+    impure = set()
+    for name, func_dec in functions.items():
+        calls[name] = set()
+        for node in walk(func_dec.children[0]):
+            if isinstance(node, (Print, Scanf)):
+                impure.add(name)
+            elif isinstance(node, FuncCall):
+                calls[name].add(node.func_name)
+    # Propaga a impureza para quem chama, até não mudar mais
+    changed = True
+    while changed:
+        changed = False
+        for name, callees in calls.items():
+            if name not in impure and any(callee in impure or callee not in functions for callee in callees):
+                impure.add(name)
+                changed = True
+    return {name for name in functions if name not in impure}
+
+
+class Memo:
+    """Cache LRU limitado dos resultados de chamadas a funções puras.
+
+    A chave é o nome da função e a tupla dos valores dos parâmetros, já
+    convertidos para os tipos declarados; o valor é o par (valor, tipo)
+    retornado. Chamadas que levantam erro não são guardadas.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        # Retorna o resultado guardado ou None
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def report(self):
+        return (f"memo: {self.hits} hits, {self.misses} misses, {self.evictions} evictions, "
+                f"{len(self.entries)}/{self.maxsize} entries")
+
+
+class MemoFuncCall(FuncCall):
+    # Chamada a uma função pura: os argumentos são avaliados e checados como no
+    # FuncCall, e o bloco só executa se o resultado não estiver no cache.
+    # Mesmo layout do FuncCall, para a troca de __class__; memo fica no __dict__
+    __slots__ = ()
+
+    def Evaluate(self, func_table, symbol_table):
+        func_dec, params_values = self.bindArguments(func_table, symbol_table)
+        return self.call(func_table, func_dec, params_values)
+
+    def call(self, func_table, func_dec, params_values):
+        # Resultado do cache ou da execução do bloco; também usado pelo profiler
+        key = (self.func_name, tuple(params_values))
+        result = self.memo.get(key)
+        if result is None:
+            result = self.invoke(func_table, func_dec, params_values)
+            self.memo.put(key, result)
+        return result
+
+
+def install_memo(program, memo):
+    # Troca a classe das chamadas a funções puras por MemoFuncCall e retorna os nomes das funções puras
+    functions = {}
+    for child in program.children:
+        if isinstance(child, FuncDecl):
+            # Mesma função que o FuncTable guardaria; declarações repetidas falham antes de main
+            functions.setdefault(child.func_name, child)
+    pure = pure_functions(functions)
+    for node in walk(program):
+        if type(node) is FuncCall and node.func_name in pure:
+            node.__class__ = MemoFuncCall
+            node.memo = memo
+    return pure
@@ -0,0 +1,224 @@
+from arvore import *
+from resolver import *
+
+#Nós que representam um valor já conhecido em tempo de compilação
+CONSTANT_NODES = {'int': IntVal, 'str': StrVal, 'bool': BoolVal}
+
+
+def constant(node):
+    # Retorna o par (valor, tipo) de um nó constante ou None
+    if isinstance(node, IntVal):
+        return node.value, 'int'
+    if isinstance(node, StrVal):
+        return node.value, 'str'
+    if isinstance(node, BoolVal):
+        return node.value, 'bool'
+    return None
+
+
+def constant_node(value, value_type):
+    # Cria o nó que representa o valor; o valor de StrVal nunca contém aspas e é sempre uma str
+    if value_type == 'str':
+        value = str(value)
+    return CONSTANT_NODES[value_type](value)
+
+
+class Optimizer:
+    """Otimiza a AST gerada por Parser.run, sem mudar o comportamento observável.
+
+    - Dobra operações entre constantes chamando o próprio handler do nó; se o
+      handler levantar um erro (tipos incompatíveis, divisão por zero, operador
+      desconhecido) o nó fica como está e o erro acontece na execução.
+    - Propaga constantes de variáveis locais declaradas uma única vez e nunca
+      atribuídas, apenas nos acessos que o Resolver garante que acontecem depois
+      da declaração.
+    - Remove ramos de If e loops While cuja condição é uma constante 'bool', e
+      comandos depois de um Return no mesmo bloco. Condições constantes de outro
+      tipo (while (0)) continuam levantando o TypeError na execução.
+    """
+
+    def __init__(self):
+        self.layout = None
+        self.candidates = set()
+        self.constants = {}
+
+    def optimize(self, node):
+        method = getattr(self, 'optimize' + type(node).__name__, None)
+        if method is None:
+            return node
+        return method(node)
+
+    def optimizeBlock(self, node):
+        # Blocos de If/While/FuncDecl precisam de um nó mesmo quando ficam vazios
+        result = self.optimize(node)
+        return result if result is not None else NoOp()
+
+    def optimizeProgram(self, node):
+        node.children = [self.optimize(child) for child in node.children]
+        return node
+
+    def optimizeFuncDecl(self, node):
+        self.layout = resolve_function(node)
+        params = {param_name for _, param_name in node.params}
+        declarations = {}
+        assigned = set()
+        self.collect(node.children[0], declarations, assigned)
+        # Variáveis declaradas uma única vez e nunca atribuídas têm sempre o valor da declaração
+        self.candidates = {name for name, count in declarations.items()
+                           if count == 1 and name not in assigned and name not in params}
+        self.constants = {}
+        block = self.optimize(node.children[0])
+        node.children = [block if block is not None else Statements()]
+        self.layout = None
+        return node
+
+    def collect(self, node, declarations, assigned):
+        # Conta as declarações e as atribuições de cada variável da função
+        if isinstance(node, Declaration):
+            for var_name, _ in node.declarations:
+                declarations[var_name] = declarations.get(var_name, 0) + 1
+        elif isinstance(node, Assign):
+            assigned.add(node.children[0].value)
+        for child in node.children:
+            self.collect(child, declarations, assigned)
+
+    def optimizeStatements(self, node):
+        children = []
+        for child in node.children:
+            result = self.optimize(child)
+            if result is None or isinstance(result, NoOp):
+                continue
+            children.append(result)
+            # Comandos depois de um return nunca executam
+            if isinstance(result, Return):
+                break
+        node.children = children
+        return node
+
+    def optimizeNoOp(self, node):
+        return None
+
+    def optimizeDeclaration(self, node):
+        declarations = []
+        for index, (var_name, expr) in enumerate(node.declarations):
+            if expr is not None:
+                expr = self.optimize(expr)
+            declarations.append((var_name, expr))
+            if var_name not in self.candidates or self.layout.check(node, index) != OK:
+                continue
+            if expr is None:
+                value = ({'int': 0, 'str': ''}[node.var_type], node.var_type)
+            else:
+                value = constant(expr)
+                if value is None:
+                    continue
+                # Mesma conversão implícita da declaração; tipos errados levantam erro na execução
+                if value[1] != node.var_type:
+                    if node.var_type == 'int' and value[1] == 'bool':
+                        value = (int(value[0]), 'int')
+                    else:
+                        continue
+            self.constants[var_name] = value
+        node.declarations = declarations
+        return node
+
+    def optimizeAssign(self, node):
+        node.children[1] = self.optimize(node.children[1])
+        return node
+
+    def optimizePrint(self, node):
+        node.children[0] = self.optimize(node.children[0])
+        return node
+
+    def optimizeReturn(self, node):
+        node.children[0] = self.optimize(node.children[0])
+        return node
+
+    def optimizeFuncCall(self, node):
+        node.children = [self.optimize(arg) for arg in node.children]
+        return node
+
+    def optimizeIf(self, node):
+        condition = self.optimize(node.children[0])
+        value = constant(condition)
+        if value is not None and value[1] == 'bool':
+            # Só o ramo escolhido pode executar
+            if value[0]:
+                return self.optimize(node.children[1])
+            if len(node.children) == 3:
+                return self.optimize(node.children[2])
+            return None
+        node.children = [condition] + [self.optimizeBlock(child) for child in node.children[1:]]
+        return node
+
+    def optimizeWhile(self, node):
+        condition = self.optimize(node.children[0])
+        value = constant(condition)
+        if value is not None and value[1] == 'bool' and not value[0]:
+            return None
+        node.children = [condition, self.optimizeBlock(node.children[1])]
+        return node
+
+    def optimizeIdentifier(self, node):
+        # O acesso só é substituído se a declaração certamente já executou
+        if node.value in self.constants and self.layout.check(node) == OK:
+            return constant_node(*self.constants[node.value])
+        return node
+
+    def optimizeBinOp(self, node):
+        node.children = [self.optimize(child) for child in node.children]
+        left, right = constant(node.children[0]), constant(node.children[1])
+        if left is None or right is None:
+            return node
+        try:
+            return constant_node(*node.getHandler()(left[0], left[1], right[0], right[1]))
+        except Exception:
+            # O erro continua acontecendo na execução, no ponto original
+            return node
+
+    def optimizeUnOp(self, node):
+        node.children = [self.optimize(node.children[0])]
+        operand = constant(node.children[0])
+        if operand is None:
+            return node
+        try:
+            return constant_node(*node.getHandler()(operand[0], operand[1]))
+        except Exception:
+            return node
+
+
+def optimize(program):
+    # Otimiza a AST no lugar e a retorna
+    return Optimizer().optimize(program)
+
+
+def dump(node, indent=0):
+    # Representação textual da árvore, um nó por linha
+    prefix = '  ' * indent
+    lines = []
+    if isinstance(node, FuncDecl):
+        params = ', '.join(f'{param_type} {param_name}' for param_type, param_name in node.params)
+        lines.append(f'{prefix}FuncDecl {node.func_type} {node.func_name}({params})')
+    elif isinstance(node, FuncCall):
+        lines.append(f'{prefix}FuncCall {node.func_name}')
+    elif isinstance(node, Declaration):
+        lines.append(f'{prefix}Declaration {node.var_type}')
+        for var_name, expr in node.declarations:
+            if expr is None:
+                lines.append(f'{prefix}  {var_name}')
+            else:
+                lines.append(f'{prefix}  {var_name} =')
+                lines.append(dump(expr, indent + 2))
+    elif isinstance(node, Assign):
+        lines.append(f'{prefix}Assign {node.children[0].value}')
+        lines.append(dump(node.children[1], indent + 1))
+        return '\n'.join(lines)
+    elif isinstance(node, StrVal):
+        lines.append(f'{prefix}StrVal "{node.value}"')
+    elif node.value is not None:
+        lines.append(f'{prefix}{type(node).__name__} {node.value}')
+    else:
+        lines.append(f'{prefix}{type(node).__name__}')
+    for child in node.children:
+        lines.append(dump(child, indent + 1))
+    return '\n'.join(lines)
@@ -0,0 +1,181 @@
+import time
+from arvore import *
+from memo import walk, MemoFuncCall
+
+#Quantas funções, loops e nós aparecem no relatório quando o tamanho não é informado
+DEFAULT_TOP = 10
+
+
+class Profiler:
+    """Contadores e tempos coletados pelos nós instrumentados.
+
+    Tempos usam time.perf_counter. O tempo inclusivo de uma função só é somado
+    na ativação mais externa, para que recursão não conte o mesmo intervalo
+    várias vezes; o exclusivo desconta o tempo das funções chamadas.
+    """
+
+    def __init__(self):
+        self.clock = time.perf_counter
+        # FuncDecl -> [chamadas, inclusivo, exclusivo]
+        self.functions = {}
+        # While -> [iterações, inclusivo]
+        self.loops = {}
+        # nó -> avaliações
+        self.counts = {}
+        # If -> vezes em que a condição foi verdadeira
+        self.taken = {}
+        # Função que contém cada nó instrumentado
+        self.owners = {}
+        # Profundidade de cada função ou loop ativo e tempo dos filhos de cada chamada
+        self.active = {}
+        self.children_time = []
+        self.total = 0.0
+
+    def enter(self, key):
+        depth = self.active.get(key, 0)
+        self.active[key] = depth + 1
+        return depth == 0
+
+
+class ProfiledFuncCall(FuncCall):
+    # Sem slots novos: o layout precisa ser o do FuncCall para a troca de __class__,
+    # e o atributo profiler fica no __dict__ do nó
+    __slots__ = ()
+
+    def Evaluate(self, func_table, symbol_table):
+        profiler = self.profiler
+        profiler.counts[self] = profiler.counts.get(self, 0) + 1
+        # Os argumentos são avaliados no tempo de quem chama
+        func_dec, params_values = self.bindArguments(func_table, symbol_table)
+        outermost = profiler.enter(func_dec)
+        profiler.children_time.append(0.0)
+        start = profiler.clock()
+        try:
+            return self.call(func_table, func_dec, params_values)
+        finally:
+            elapsed = profiler.clock() - start
+            children = profiler.children_time.pop()
+            if profiler.children_time:
+                profiler.children_time[-1] += elapsed
+            profiler.active[func_dec] -= 1
+            stats = profiler.functions.setdefault(func_dec, [0, 0.0, 0.0])
+            stats[0] += 1
+            if outermost:
+                stats[1] += elapsed
+            stats[2] += elapsed - children
+
+    def call(self, func_table, func_dec, params_values):
+        return self.invoke(func_table, func_dec, params_values)
+
+
+class ProfiledMemoFuncCall(ProfiledFuncCall, MemoFuncCall):
+    # Chamada memoizada (--memo): um acerto no cache conta como chamada, com o
+    # tempo da consulta, e um erro mede a execução do bloco como no FuncCall
+    __slots__ = ()
+    call = MemoFuncCall.call
+
+
+class ProfiledWhile(While):
+    __slots__ = ()
+
+    def Evaluate(self, funct_table, symbol_table):
+        profiler = self.profiler
+        profiler.counts[self] = profiler.counts.get(self, 0) + 1
+        outermost = profiler.enter(self)
+        stats = profiler.loops.setdefault(self, [0, 0.0])
+        start = profiler.clock()
+        try:
+            while True:
+                condition_value, condition_type = self.children[0].Evaluate(funct_table, symbol_table)
+                # Checa se a condição é do tipo 'bool'
+                if condition_type != 'bool':
+                    raise TypeError(f"Condition in 'while' must be 'bool', got '{condition_type}'")
+                # Avalia a condição para continuar ou não
+                if not condition_value:
+                    break
+                stats[0] += 1
+                self.children[1].Evaluate(funct_table, symbol_table)
+            return None, None
+        finally:
+            profiler.active[self] -= 1
+            if outermost:
+                stats[1] += profiler.clock() - start
+
+
+class ProfiledIf(If):
+    __slots__ = ()
+
+    def Evaluate(self, funct_table, symbol_table):
+        profiler = self.profiler
+        profiler.counts[self] = profiler.counts.get(self, 0) + 1
+        condition_value, condition_type = self.children[0].Evaluate(funct_table, symbol_table)
+        # Checa se a condição é do tipo 'bool'
+        if condition_type != 'bool':
+            raise TypeError(f"Condition in 'if' must be 'bool', got '{condition_type}'")
+        # Avalia o bloco correspondente
+        if condition_value:
+            profiler.taken[self] = profiler.taken.get(self, 0) + 1
+            self.children[1].Evaluate(funct_table, symbol_table)
+        elif len(self.children) == 3:
+            self.children[2].Evaluate(funct_table, symbol_table)
+        return None, None
+
+
+class ProfiledBinOp(BinOp):
+    __slots__ = ()
+
+    def Evaluate(self, funct_table, symbol_table):
+        counts = self.profiler.counts
+        counts[self] = counts.get(self, 0) + 1
+        return BinOp.Evaluate(self, funct_table, symbol_table)
+
+
+#Classe instrumentada de cada tipo de nó
+PROFILED = {FuncCall: ProfiledFuncCall, MemoFuncCall: ProfiledMemoFuncCall, While: ProfiledWhile, If: ProfiledIf,
+            BinOp: ProfiledBinOp}
+
+
+def install_profiler(program, profiler):
+    # Troca a classe dos nós instrumentados; com o profiler desligado a árvore fica intacta
+    for child in program.children:
+        owner = child.func_name if isinstance(child, FuncDecl) else '<program>'
+        for node in walk(child):
+            profiled = PROFILED.get(type(node))
+            if profiled is not None:
+                node.__class__ = profiled
+                node.profiler = profiler
+                profiler.owners[node] = owner
+    return profiler
+
+
+def report(profiler, source_map=None, top=DEFAULT_TOP):
+    # Relatório com as funções, loops e nós mais executados
+    def where(node):
+        if node.start is None:
+            return '-'
+        if source_map is None:
+            return f"offset {node.start}"
+        line, column = source_map.lineCol(node.start)
+        return f"{line}:{column}"
+
+    lines = [f"profile: {profiler.total:.6f} s total"]
+    lines.append(f"{'function':<28}{'where':>9}{'calls':>12}{'incl (s)':>12}{'excl (s)':>12}")
+    functions = sorted(profiler.functions.items(), key=lambda item: item[1][2], reverse=True)
+    for func_dec, (calls, inclusive, exclusive) in functions[:top]:
+        lines.append(f"{func_dec.func_name:<28}{where(func_dec):>9}{calls:>12}{inclusive:>12.6f}{exclusive:>12.6f}")
+    lines.append(f"{'loop':<28}{'where':>9}{'iterations':>12}{'time (s)':>12}")
+    loops = sorted(profiler.loops.items(), key=lambda item: item[1][1], reverse=True)
+    for node, (iterations, elapsed) in loops[:top]:
+        lines.append(f"{'while in ' + profiler.owners[node]:<28}{where(node):>9}{iterations:>12}{elapsed:>12.6f}")
+    lines.append(f"{'node':<28}{'where':>9}{'evaluations':>12}")
+    nodes = sorted(profiler.counts.items(), key=lambda item: item[1], reverse=True)
+    for node, count in nodes[:top]:
+        name = type(node).__name__[len('Profiled'):]
+        if isinstance(node, (BinOp, UnOp)):
+            name += ' ' + node.value
+        elif isinstance(node, FuncCall):
+            name += ' ' + node.func_name
+        elif isinstance(node, If):
+            name += f" ({profiler.taken.get(node, 0)} true)"
+        lines.append(f"{name + ' in ' + profiler.owners[node]:<28}{where(node):>9}{count:>12}")
+    return '\n'.join(lines)
@@ -0,0 +1,113 @@
+from arvore import *
+
+#Número mínimo de operandos para uma cadeia de + ou * ser rebalanceada
+REBALANCE_MIN = 16
+
+
+def variable_types(func_dec, declarations):
+    # Nome -> tipo das variáveis da função; nomes declarados com tipos diferentes ficam sem tipo
+    types = {}
+    declared = [(param_type, param_name) for param_type, param_name in func_dec.params]
+    for declaration in declarations:
+        declared.extend((declaration.var_type, var_name) for var_name, _ in declaration.declarations)
+    for var_type, var_name in declared:
+        types[var_name] = var_type if types.get(var_name, var_type) == var_type else None
+    return types
+
+
+#Tipo do valor das folhas e dos operadores cujo resultado não depende dos operandos
+LEAF_TYPES = {IntVal: 'int', Scanf: 'int', StrVal: 'str', BoolVal: 'bool'}
+OPERATOR_TYPES = {'MINUS': 'int', 'MULTIPLY': 'int', 'DIVIDE': 'int', 'EQUALS': 'bool', 'LESS': 'bool',
+                  'GREATER': 'bool', 'AND': 'bool', 'OR': 'bool'}
+
+
+def static_type(node, types, sums):
+    # Tipo que a avaliação do nó retorna sempre que não levanta erro, ou None se depende da execução
+    # (os nós saem do Parser, então a classe é exata e dispensa isinstance)
+    node_class = type(node)
+    if node_class in LEAF_TYPES:
+        return LEAF_TYPES[node_class]
+    if node_class is Identifier:
+        return types.get(node.value)
+    if node_class is UnOp:
+        return 'bool' if node.value == 'NOT' else 'int'
+    if node_class is BinOp:
+        if node.value == 'PLUS':
+            return sums.get(id(node))
+        return OPERATOR_TYPES.get(node.value)
+    # O tipo de retorno das funções não é verificado na execução
+    return None
+
+
+def rebalance_function(func_dec, declarations, chains):
+    """Rebalanceia as cadeias longas de + e * de uma função recém analisada.
+
+    chains são os BinOps de + e * da função na ordem em que o Parser os criou
+    (os operandos antes de quem os usa) e declarations, as Declarations da
+    função. Uma cadeia a + b + c + ... vira uma árvore balanceada com os mesmos
+    operandos na mesma ordem, então a profundidade da avaliação cai de n para
+    log n. Os operandos continuam sendo avaliados da esquerda para a direita,
+    e a cadeia só é reagrupada quando o tipo de todos os operandos é conhecido
+    e o agrupamento não muda o resultado nem os erros: um produto só de int,
+    uma soma só de int e bool ou uma concatenação só de str. Os nós são
+    reaproveitados, e a raiz da cadeia continua sendo o mesmo objeto.
+    """
+    types = variable_types(func_dec, declarations)
+    # Tipo de cada soma, calculado na ordem de criação para não recursar nas cadeias
+    sums = {}
+    for node in chains:
+        if node.value == 'PLUS':
+            left_type = static_type(node.children[0], types, sums)
+            right_type = static_type(node.children[1], types, sums)
+            if left_type == 'str' or right_type == 'str':
+                sums[id(node)] = 'str'
+            elif left_type in ('int', 'bool') and right_type in ('int', 'bool'):
+                sums[id(node)] = 'int'
+
+    # Nós que são o operando esquerdo de outro nó do mesmo operador fazem parte da cadeia dele
+    inner = set()
+    for node in chains:
+        left = node.children[0]
+        if type(left) is BinOp and left.value == node.value:
+            inner.add(id(left))
+
+    for root in chains:
+        if id(root) in inner:
+            continue
+        # Desce pelo lado esquerdo: spine[i] junta os operandos até operands[i + 1]
+        spine = []
+        operands = []
+        node = root
+        while type(node) is BinOp and node.value == root.value:
+            spine.append(node)
+            operands.append(node.children[1])
+            node = node.children[0]
+        operands.append(node)
+        if len(operands) < REBALANCE_MIN:
+            continue
+        spine.reverse()
+        operands.reverse()
+        operand_types = {static_type(operand, types, sums) for operand in operands}
+        if root.value == 'MULTIPLY':
+            safe = operand_types == {'int'}
+        else:
+            safe = operand_types <= {'int', 'bool'} or operand_types == {'str'}
+        if safe:
+            starts = [node.start for node in spine]
+            # A raiz troca de lugar com o nó da primeira divisão, que fica no topo
+            middle = len(operands) // 2
+            spine[-1], spine[middle - 1] = spine[middle - 1], spine[-1]
+            build(spine, operands, starts, 0, len(operands))
+
+
+def build(spine, operands, starts, low, high):
+    # Árvore balanceada de operands[low:high]
+    if high - low == 1:
+        return operands[low]
+    middle = (low + high) // 2
+    # Cada divisão usa um nó da cadeia e a posição do operador que fica entre as duas metades
+    node = spine[middle - 1]
+    node.start = starts[middle - 1]
+    node.children = [build(spine, operands, starts, low, middle),
+                     build(spine, operands, starts, middle, high)]
+    return node
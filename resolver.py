@@ -0,0 +1,145 @@
+from arvore import *
+
+#Resultado da resolução de um acesso a variável
+OK = 'ok'        # a variável com certeza existe (ou não existe, na declaração) quando o nó executa
+GUARD = 'guard'  # depende do caminho executado: o acesso precisa ser verificado em tempo de execução
+
+
+class FunctionLayout:
+    """Slots das variáveis de uma função e o resultado da resolução de cada acesso.
+
+    Parâmetros ocupam os primeiros slots, na ordem da declaração; cada variável
+    local recebe o próximo slot livre. Erros certos (variável nunca declarada
+    antes do uso, ou declarada duas vezes no mesmo caminho) ficam em errors e em
+    checks, para que os compiladores possam levantá-los no ponto em que o
+    Evaluate os levantaria.
+    """
+
+    def __init__(self, func_dec):
+        self.name = func_dec.func_name
+        self.slots = {}
+        self.checks = {}
+        self.errors = []
+        self.param_slots = [self.slot(param_name) for _, param_name in func_dec.params]
+        # Tipo de cada variável na primeira declaração (ou no parâmetro)
+        self.types = {}
+        for param_type, param_name in func_dec.params:
+            self.types.setdefault(param_name, param_type)
+
+    def slot(self, name):
+        if name not in self.slots:
+            self.slots[name] = len(self.slots)
+        return self.slots[name]
+
+    @property
+    def size(self):
+        return len(self.slots)
+
+    def check(self, node, index=None):
+        # Retorna OK, GUARD ou a exceção que o acesso certamente levanta
+        return self.checks.get((node, index), OK)
+
+    def guarded(self):
+        # Nomes das variáveis com algum acesso GUARD, na ordem dos slots
+        names = set()
+        for (node, index), check in self.checks.items():
+            if check != GUARD:
+                continue
+            if isinstance(node, Declaration):
+                names.add(node.declarations[index][0])
+            elif isinstance(node, Assign):
+                names.add(node.children[0].value)
+            else:
+                names.add(node.value)
+        return sorted(names, key=self.slots.get)
+
+    def _set(self, node, index, result):
+        self.checks[(node, index)] = result
+        if isinstance(result, Exception):
+            self.errors.append(result)
+
+
+class Resolver:
+    """Atribui slots às variáveis de cada FuncDecl e resolve os acessos.
+
+    A análise acompanha, em cada ponto da função, as variáveis certamente
+    declaradas (declared) e as possivelmente declaradas (maybe). Um while pode
+    executar o corpo várias vezes, então declarações dentro dele ficam
+    possivelmente declaradas desde a primeira iteração.
+    """
+
+    def resolveFunction(self, func_dec):
+        self.layout = FunctionLayout(func_dec)
+        params = {param_name for _, param_name in func_dec.params}
+        self.resolveStatement(func_dec.children[0], set(params), set(params))
+        return self.layout
+
+    def resolveStatement(self, node, declared, maybe):
+        # Atualiza declared e maybe com o efeito do comando
+        if isinstance(node, Statements):
+            for child in node.children:
+                self.resolveStatement(child, declared, maybe)
+        elif isinstance(node, Declaration):
+            for index, (var_name, expr) in enumerate(node.declarations):
+                self.layout.slot(var_name)
+                self.layout.types.setdefault(var_name, node.var_type)
+                if var_name in declared:
+                    self.layout._set(node, index, ValueError(f"Variable '{var_name}' already declared."))
+                elif var_name in maybe:
+                    self.layout._set(node, index, GUARD)
+                if expr is not None:
+                    self.resolveExpression(expr, declared, maybe)
+                declared.add(var_name)
+                maybe.add(var_name)
+        elif isinstance(node, Assign):
+            var_name = node.children[0].value
+            self.layout.slot(var_name)
+            if var_name not in maybe:
+                self.layout._set(node, None, ValueError(f"Variable '{var_name}' not declared."))
+            elif var_name not in declared:
+                self.layout._set(node, None, GUARD)
+            self.resolveExpression(node.children[1], declared, maybe)
+        elif isinstance(node, If):
+            self.resolveExpression(node.children[0], declared, maybe)
+            true_declared, true_maybe = set(declared), set(maybe)
+            self.resolveStatement(node.children[1], true_declared, true_maybe)
+            false_declared, false_maybe = set(declared), set(maybe)
+            if len(node.children) == 3:
+                self.resolveStatement(node.children[2], false_declared, false_maybe)
+            declared.intersection_update(true_declared & false_declared)
+            maybe.update(true_maybe | false_maybe)
+        elif isinstance(node, While):
+            # Variáveis declaradas no corpo podem existir desde a primeira iteração
+            body_maybe = maybe | self.declaredIn(node.children[1])
+            self.resolveExpression(node.children[0], set(declared), set(body_maybe))
+            self.resolveStatement(node.children[1], set(declared), body_maybe)
+            maybe.update(body_maybe)
+        elif isinstance(node, (Print, Return)):
+            self.resolveExpression(node.children[0], declared, maybe)
+        elif isinstance(node, FuncCall):
+            self.resolveExpression(node, declared, maybe)
+
+    def resolveExpression(self, node, declared, maybe):
+        if isinstance(node, Identifier):
+            self.layout.slot(node.value)
+            if node.value not in maybe:
+                self.layout._set(node, None, ValueError(f"Undefined variable '{node.value}'"))
+            elif node.value not in declared:
+                self.layout._set(node, None, GUARD)
+            return
+        for child in node.children:
+            self.resolveExpression(child, declared, maybe)
+
+    def declaredIn(self, node):
+        # Nomes declarados em qualquer ponto de um comando
+        if isinstance(node, Declaration):
+            return {var_name for var_name, _ in node.declarations}
+        names = set()
+        if isinstance(node, (Statements, If, While)):
+            for child in node.children:
+                names |= self.declaredIn(child)
+        return names
+
+
+def resolve_function(func_dec):
+    return Resolver().resolveFunction(func_dec)
@@ -0,0 +1,105 @@
+#Concatenações menores que isso (em caracteres) continuam como str comum
+ROPE_MIN = 256
+#Quantas partes pequenas no fim do buffer são juntadas em um único bloco
+CHUNK_PARTS = 64
+
+
+class StrBuffer:
+    """Partes de texto compartilhadas pelas Ropes criadas a partir de uma mesma concatenação.
+
+    As partes só crescem no fim. Quando o fim acumula CHUNK_PARTS partes elas
+    viram um bloco só, então cada caractere é copiado uma vez para os blocos e
+    a memória fica proporcional ao tamanho do texto, não ao número de '+'.
+    """
+
+    __slots__ = ('parts', 'length', 'joined')
+
+    def __init__(self, parts, length):
+        self.parts = parts
+        self.length = length
+        # parts[:joined] já são blocos juntados
+        self.joined = 0
+
+    def append(self, text):
+        parts = self.parts
+        parts.append(text)
+        self.length += len(text)
+        if len(parts) - self.joined >= CHUNK_PARTS:
+            parts[self.joined:] = [''.join(parts[self.joined:])]
+            self.joined += 1
+
+    def flatten(self):
+        # Junta todas as partes em uma e a guarda no lugar delas
+        parts = self.parts
+        if len(parts) > 1:
+            parts[:] = [''.join(parts)]
+            self.joined = 1
+        return parts[0]
+
+
+class Rope:
+    """Valor 'str' resultante de concatenações, materializado só quando necessário.
+
+    Uma Rope é o prefixo de length caracteres de um StrBuffer. Concatenar no
+    fim de uma Rope que ainda é o buffer inteiro só acrescenta uma parte, então
+    s = s + x em um loop custa tempo linear no total. str(rope) materializa o
+    texto (printf usa str); igualdade, ordem e hash são as do texto, então uma
+    Rope e uma str com o mesmo conteúdo são iguais e podem ser chaves do mesmo
+    dicionário.
+    """
+
+    __slots__ = ('buffer', 'length')
+
+    def __init__(self, buffer, length):
+        self.buffer = buffer
+        self.length = length
+
+    def __str__(self):
+        text = self.buffer.flatten()
+        # O buffer pode ter crescido depois que esta Rope foi criada
+        return text if self.length == len(text) else text[:self.length]
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __len__(self):
+        return self.length
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __eq__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) != str(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) < str(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) > str(other)
+        return NotImplemented
+
+
+def concat(left_value, right_value):
+    # Resultado 'str' de left + right, com os valores convertidos como em str(left) + str(right)
+    if type(left_value) is Rope:
+        buffer = left_value.buffer
+        if left_value.length == buffer.length:
+            # A Rope ainda é o buffer inteiro: acrescenta no lugar
+            buffer.append(str(right_value))
+            return Rope(buffer, buffer.length)
+    left_value = str(left_value)
+    right_value = str(right_value)
+    length = len(left_value) + len(right_value)
+    if length < ROPE_MIN:
+        return left_value + right_value
+    return Rope(StrBuffer([left_value, right_value], length), length)
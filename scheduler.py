@@ -0,0 +1,288 @@
+"""Executa muitos programas ao mesmo tempo num único laço asyncio, cada um como uma corrotina.
+
+Cada programa roda na VM de bytecode em fatias: VM.resume executa cerca
+de slice instruções e a corrotina devolve o controle ao laço de eventos
+antes de continuar. Um scanf sem entrada disponível também suspende a
+corrotina, que espera a próxima linha de uma entrada assíncrona (TextInput,
+QueueInput ou StreamInput) sem bloquear os outros programas. Cada programa
+pode ter um limite de instruções (max_steps, OutOfSteps) e um limite de
+tempo real (max_seconds, TimeoutError, incluindo o tempo esperando
+entrada); ao passar de um deles, o programa é cancelado. ScheduledProgram
+guarda os contadores de cada programa, que a linha de comando mostra.
+
+Uso: python scheduler.py [--slice=N] [--max-steps=N] [--max-seconds=S] <arquivo.c | diretório>...
+"""
+import asyncio
+import sys
+import time
+
+from batch import discover, fixture, parse
+from streams import MemoryOutput, MemoryInput
+from vm import VM, FINISHED, WAITING_INPUT
+
+# Opções aceitas na linha de comando
+OPCOES = {
+    'slice': 'instruções executadas antes de devolver o controle ao laço (--slice=N, padrão 1000)',
+    'max-steps': 'limite de instruções por programa (--max-steps=N)',
+    'max-seconds': 'limite de tempo real por programa, incluindo a espera por entrada (--max-seconds=S)',
+    'no-cache': 'não usa o cache de programas analisados',
+}
+#Instruções por fatia quando o tamanho não é informado
+DEFAULT_SLICE = 1000
+#Situação de cada programa
+RUNNING = 'running'
+DONE = 'done'                    # terminou sem erro
+ERROR = 'error'                  # terminou com erro do programa
+OUT_OF_STEPS = 'out of steps'    # passou de max_steps
+TIMED_OUT = 'timed out'          # passou de max_seconds
+CANCELLED = 'cancelled'          # a tarefa foi cancelada de fora
+
+
+class OutOfSteps(Exception):
+    pass
+
+
+class TextInput:
+    # Entrada assíncrona com um texto já conhecido, com as mesmas regras de linha do stdin
+    def __init__(self, text):
+        self.lines = MemoryInput(text)
+
+    async def readLine(self):
+        try:
+            return self.lines.readLine()
+        except EOFError:
+            return None
+
+
+class QueueInput:
+    """Entrada assíncrona alimentada pelo código que hospeda o programa.
+
+    feed(texto) acrescenta linhas e close() marca o fim da entrada; o scanf
+    que chegar ao fim levanta EOFError, como int(input()). Deve ser criada
+    dentro do laço de eventos que executa o programa.
+    """
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.partial = ''
+
+    def feed(self, text):
+        lines = (self.partial + text).split('\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self.queue.put_nowait(line)
+
+    def close(self):
+        # A última linha pode não ter '\n'
+        if self.partial:
+            self.queue.put_nowait(self.partial)
+            self.partial = ''
+        self.queue.put_nowait(None)
+
+    async def readLine(self):
+        line = await self.queue.get()
+        if line is None:
+            # Continua no fim para os próximos scanf
+            self.queue.put_nowait(None)
+        return line
+
+
+class StreamInput:
+    # Entrada assíncrona lida de um asyncio.StreamReader (um socket ou um pipe)
+    def __init__(self, reader):
+        self.reader = reader
+
+    async def readLine(self):
+        line = await self.reader.readline()
+        if not line:
+            return None
+        return line.decode().rstrip('\n')
+
+
+class ScheduledIO:
+    """Entrada e saída de um programa agendado, no lugar do IOContext.
+
+    readInt() retorna None enquanto a próxima linha não chegou; a corrotina
+    então espera fill() e a VM executa o scanf de novo.
+    """
+
+    def __init__(self, input, output):
+        self.input = input
+        self.output = output
+        self.write = output.write
+        self.line = None
+        self.eof = False
+
+    def readInt(self):
+        if self.line is None:
+            if self.eof:
+                raise EOFError("EOF when reading a line")
+            return None
+        line, self.line = self.line, None
+        return int(line)
+
+    async def fill(self):
+        # Espera a próxima linha da entrada
+        line = await self.input.readLine()
+        if line is None:
+            self.eof = True
+        else:
+            self.line = line
+
+    def flush(self):
+        self.output.flush()
+
+
+class ScheduledProgram:
+    """Um programa no Scheduler: a VM, o estado da execução e os contadores.
+
+    steps são as instruções executadas, slices as vezes que o programa
+    devolveu o controle ao laço e waits as vezes que esperou entrada.
+    """
+
+    def __init__(self, name, ast, input, output):
+        self.name = name
+        self.io = ScheduledIO(input, output)
+        self.vm = VM(ast, io=self.io)
+        self.execution = None
+        self.status = RUNNING
+        self.error = None
+        self.slices = 0
+        self.waits = 0
+        self.elapsed = 0.0
+
+    @property
+    def steps(self):
+        return self.execution.steps if self.execution is not None else 0
+
+    @property
+    def output(self):
+        # Saída capturada, quando o programa escreve em memória
+        return self.io.output.getvalue()
+
+
+class Scheduler:
+    def __init__(self, slice=DEFAULT_SLICE, max_steps=None, max_seconds=None):
+        self.slice = slice
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.programs = []
+
+    def add(self, ast, name=None, input=None, output=None):
+        """Acrescenta um programa analisado e retorna o seu ScheduledProgram.
+
+        input é uma entrada assíncrona (TextInput, QueueInput, StreamInput) ou
+        um texto; sem output, a saída fica em memória.
+        """
+        if input is None or isinstance(input, str):
+            input = TextInput(input or '')
+        program = ScheduledProgram(name or f"programa {len(self.programs)}", ast, input,
+                                   output if output is not None else MemoryOutput())
+        self.programs.append(program)
+        return program
+
+    async def run(self):
+        # Executa todos os programas acrescentados até cada um terminar ou ser cancelado
+        await asyncio.gather(*(self.execute(program) for program in self.programs))
+        return self.programs
+
+    async def execute(self, program):
+        """Executa um programa até o fim, com os limites do Scheduler.
+
+        Os erros do programa e dos limites ficam em program.status e
+        program.error; só o cancelamento da própria tarefa é propagado.
+        """
+        start = time.perf_counter()
+        try:
+            if self.max_seconds is not None:
+                await asyncio.wait_for(self.advance(program), self.max_seconds)
+            else:
+                await self.advance(program)
+            program.status = DONE
+        except asyncio.CancelledError:
+            program.status = CANCELLED
+            raise
+        except asyncio.TimeoutError:
+            program.status = TIMED_OUT
+            program.error = TimeoutError(f"Wall-clock limit of {self.max_seconds} s exceeded")
+        except OutOfSteps as error:
+            program.status, program.error = OUT_OF_STEPS, error
+        except Exception as error:
+            program.status, program.error = ERROR, error
+        finally:
+            program.elapsed = time.perf_counter() - start
+            program.io.flush()
+
+    async def advance(self, program):
+        # Alterna fatias de execução na VM com esperas no laço de eventos
+        program.execution = program.vm.start()
+        execution = program.execution
+        while True:
+            budget = self.slice
+            if self.max_steps is not None:
+                if execution.steps >= self.max_steps:
+                    raise OutOfSteps(f"Step limit of {self.max_steps} exceeded")
+                budget = min(budget, self.max_steps - execution.steps)
+            status = program.vm.resume(execution, budget)
+            if status == FINISHED:
+                return
+            if status == WAITING_INPUT:
+                program.waits += 1
+                await program.io.fill()
+            else:
+                program.slices += 1
+                await asyncio.sleep(0)
+
+
+def main(argv):
+    # Separa as opções (--nome=valor) dos arquivos
+    opcoes = {}
+    argumentos = []
+    for arg in argv:
+        if arg.startswith('--'):
+            nome, _, valor = arg[2:].partition('=')
+            if nome not in OPCOES:
+                print(f"Opção desconhecida: --{nome}")
+                sys.exit(1)
+            opcoes[nome] = valor or True
+        else:
+            argumentos.append(arg)
+
+    files = discover(argumentos)
+    if not files:
+        print("Uso: python3 scheduler.py [opções] <arquivo.c | diretório>...")
+        for nome, descricao in OPCOES.items():
+            print(f"  --{nome:<12} {descricao}")
+        sys.exit(1)
+    try:
+        scheduler = Scheduler(int(opcoes.get('slice', DEFAULT_SLICE)),
+                              int(opcoes['max-steps']) if 'max-steps' in opcoes else None,
+                              float(opcoes['max-seconds']) if 'max-seconds' in opcoes else None)
+    except (TypeError, ValueError):
+        print("Uso: --slice=N, --max-steps=N e --max-seconds=S precisam de um número")
+        sys.exit(1)
+
+    # Erros de análise contam como erro do programa, sem impedir os outros
+    failed = []
+    for filename in files:
+        try:
+            ast = parse(filename, 'no-cache' not in opcoes)
+        except Exception as error:
+            failed.append((filename, error))
+            continue
+        scheduler.add(ast, filename, fixture(filename, '.in'))
+    programs = asyncio.run(scheduler.run())
+
+    for program in programs:
+        line = (f"{program.name}: {program.status}, {program.steps} instruções, {program.slices} fatias, "
+                f"{program.waits} esperas, {program.elapsed:.3f} s")
+        if program.error is not None:
+            line += f" ({type(program.error).__name__}: {program.error})"
+        print(line)
+    for filename, error in failed:
+        print(f"{filename}: {ERROR} ({type(error).__name__}: {error})")
+    sys.exit(0 if not failed and all(program.status == DONE for program in programs) else 1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
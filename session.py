@@ -0,0 +1,60 @@
+"""Interpretador isolado, para rodar muitos programas no mesmo processo.
+
+Uma Session guarda tudo o que uma execução altera: a FuncTable com as
+funções do programa, a SymbolTable do nível de cima e o IOContext do printf e
+do scanf. Nada disso é compartilhado com outras sessões, então programas que
+declaram as mesmas funções rodam um depois do outro no mesmo processo ou ao
+mesmo tempo em threads de um ThreadPoolExecutor. A árvore de cada programa é
+analisada pela própria sessão, e uma árvore pronta passada a execute() só é
+lida, então a mesma árvore pode ser executada por várias sessões.
+
+    session = Session(input='5\\n')
+    session.run('int main() { printf(2 * scanf()); }')
+    session.output  # '10\\n'
+"""
+from classes import Parser, PrePro, FuncTable
+from arvore import SymbolTable
+from batch import ENGINES, prepare
+from streams import IOContext, MemoryOutput, MemoryInput
+
+
+class Session:
+    def __init__(self, engine='evaluate', input='', io=None):
+        """Cria uma sessão que executa programas no modo engine (um de batch.ENGINES).
+
+        Sem io, a saída fica em memória (output) e o scanf lê de input.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'; use one of {', '.join(ENGINES)}")
+        self.engine = engine
+        self.io = io if io is not None else IOContext(MemoryOutput(), MemoryInput(input))
+        # Estado da última execução com Evaluate
+        self.func_table = None
+        self.globals = None
+
+    @property
+    def output(self):
+        # Saída capturada, quando a sessão escreve em memória
+        return self.io.output.getvalue()
+
+    def parse(self, source):
+        # Árvore sintática do código fonte, sem executar
+        return Parser().run(PrePro.filter(source))
+
+    def execute(self, ast):
+        """Executa uma árvore já analisada com a FuncTable, as variáveis e a E/S desta sessão.
+
+        A saída é descarregada no fim, inclusive quando o programa termina com erro.
+        """
+        with self.io:
+            if self.engine != 'evaluate':
+                prepare(ast, self.engine, self.io)()
+                return
+            # Uma FuncTable nova por execução: o mesmo programa pode rodar de novo na sessão
+            self.func_table = FuncTable(self.io)
+            self.globals = SymbolTable()
+            ast.Evaluate(self.func_table, self.globals)
+
+    def run(self, source):
+        # Analisa e executa o código
+        self.execute(self.parse(source))
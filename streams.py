@@ -0,0 +1,158 @@
+import io
+import sys
+
+#Políticas de descarga da saída
+FLUSH_SIZE = 'size'    # descarrega quando o buffer passa de size caracteres
+FLUSH_LINE = 'line'    # descarrega a cada printf, como o print do Python num terminal
+FLUSH_EXIT = 'exit'    # só descarrega em flush() explícito (fim do programa ou erro)
+FLUSH_POLICIES = (FLUSH_SIZE, FLUSH_LINE, FLUSH_EXIT)
+#Tamanho do buffer de saída e dos blocos lidos da entrada
+BUFFER_SIZE = 1 << 16
+
+
+class BufferedOutput:
+    """Saída do printf com buffer, escrita em stream (por padrão sys.stdout).
+
+    write(value) equivale a print(value): cada valor vira uma linha. O stream é
+    resolvido só na descarga, então redirecionar sys.stdout continua funcionando.
+    """
+
+    def __init__(self, stream=None, policy=FLUSH_SIZE, size=BUFFER_SIZE):
+        if policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {policy}")
+        self.stream = stream
+        self.policy = policy
+        self.size = size
+        self.parts = []
+        self.pending = 0
+
+    def write(self, value):
+        line = f"{value}\n"
+        self.parts.append(line)
+        if self.policy == FLUSH_LINE:
+            self.flush()
+        elif self.policy == FLUSH_SIZE:
+            self.pending += len(line)
+            if self.pending >= self.size:
+                self.flush()
+
+    def flush(self):
+        if self.parts:
+            stream = self.stream if self.stream is not None else sys.stdout
+            stream.write(''.join(self.parts))
+            stream.flush()
+            self.parts = []
+            self.pending = 0
+
+
+class MemoryOutput:
+    # Saída em memória, para embutir o interpretador ou medir sem o custo do terminal
+    def __init__(self):
+        self.lines = []
+
+    def write(self, value):
+        self.lines.append(f"{value}\n")
+
+    def flush(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(self.lines)
+
+
+class BufferedInput:
+    """Entrada do scanf lida em blocos de stream (por padrão sys.stdin).
+
+    readInt() tem a mesma semântica de int(input()): consome uma linha, a última
+    linha pode não ter '\\n', e o fim da entrada levanta EOFError.
+    """
+
+    def __init__(self, stream=None, size=BUFFER_SIZE):
+        self.stream = stream
+        self.size = size
+        self.lines = []
+        self.position = 0
+        self.partial = b''
+        self.eof = False
+        self._interactive = None
+
+    @property
+    def interactive(self):
+        # Calculado na primeira leitura
+        if self._interactive is None:
+            stream = self.stream if self.stream is not None else sys.stdin
+            try:
+                self._interactive = stream.isatty()
+            except (AttributeError, ValueError):
+                self._interactive = False
+        return self._interactive
+
+    def _read(self):
+        # Lê o que estiver disponível, sem esperar o bloco inteiro (importante em terminais)
+        stream = self.stream if self.stream is not None else sys.stdin
+        stream = getattr(stream, 'buffer', stream)
+        if hasattr(stream, 'read1'):
+            return stream.read1(self.size)
+        return stream.read(self.size)
+
+    def readLine(self):
+        while self.position == len(self.lines):
+            if self.eof:
+                raise EOFError("EOF when reading a line")
+            chunk = self._read()
+            if not chunk:
+                self.eof = True
+                if self.partial:
+                    self.lines, self.position = [self.partial], 0
+                    self.partial = b''
+                continue
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            lines = (self.partial + chunk).split(b'\n')
+            self.partial = lines.pop()
+            self.lines, self.position = lines, 0
+        line = self.lines[self.position]
+        self.position += 1
+        return line.decode()
+
+    def readInt(self):
+        return int(self.readLine())
+
+
+class MemoryInput(BufferedInput):
+    # Entrada em memória, com as mesmas regras de linha do stdin
+    def __init__(self, text):
+        super().__init__(io.BytesIO(text.encode()))
+
+    @property
+    def interactive(self):
+        return False
+
+
+class IOContext:
+    """Entrada e saída usadas por printf e scanf em todos os modos de execução.
+
+    Usado como gerenciador de contexto, descarrega a saída ao sair, inclusive
+    quando o programa termina com erro. Num terminal, a saída pendente é
+    descarregada antes de cada leitura.
+    """
+
+    def __init__(self, output=None, input=None):
+        self.output = output if output is not None else BufferedOutput()
+        self.input = input if input is not None else BufferedInput()
+        self.write = self.output.write
+
+    def readInt(self):
+        if self.input.interactive:
+            self.output.flush()
+        return self.input.readInt()
+
+    def flush(self):
+        self.output.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
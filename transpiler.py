@@ -0,0 +1,313 @@
+import ast
+from arvore import *
+from resolver import *
+from ropes import concat
+from classes import FuncTable
+
+#Valores padrão das declarações sem expressão
+DEFAULTS = {'int': 0, 'str': ''}
+#Operadores de comparação do Python para cada operador da linguagem
+COMPARISONS = {'EQUALS': ast.Eq, 'LESS': ast.Lt, 'GREATER': ast.Gt}
+
+
+def _divide(left_value, right_value):
+    if right_value == 0:
+        raise ZeroDivisionError("Division by zero")
+    return left_value // right_value
+
+
+def _and(left_value, right_value):
+    # Os dois operandos já foram avaliados: AND e OR não têm curto-circuito
+    return left_value and right_value
+
+
+def _or(left_value, right_value):
+    return left_value or right_value
+
+
+def _undefined(name):
+    raise ValueError(f"Undefined variable '{name}'")
+
+
+class Transpiler:
+    """Transforma um programa que passou pelo TypeChecker em um ast.Module do Python.
+
+    Cada FuncDecl vira uma função Python (f_<nome>), cada variável uma variável
+    local (v_<nome>), While e If viram laços e condicionais nativos e Return um
+    return nativo. Os valores são os mesmos do CheckedCompiler: bools são os ints
+    0 e 1, e nenhuma operação checa tipos. As checagens que não dependem de tipo
+    viram guardas no próprio código: variáveis declaradas só em alguns caminhos
+    começam como None e são testadas no acesso, e a divisão por um valor que não
+    é constante passa por _divide. Concatenações de str usam ropes.concat, como
+    no Evaluate. Os prefixos evitam conflitos com palavras reservadas e com os
+    nomes auxiliares, que começam com '_'.
+    """
+
+    def __init__(self, types):
+        self.types = types
+        self.layout = None
+
+    def compileProgram(self, program):
+        body = []
+        for child in program.children:
+            if isinstance(child, FuncDecl):
+                body.append(self.compileFuncDecl(child))
+        # Os demais comandos (a chamada a main) formam a função _run
+        entry = []
+        for child in program.children:
+            if not isinstance(child, FuncDecl):
+                entry.extend(self.compileStatement(child))
+        body.append(self.function('_run', [], entry or [ast.Pass()]))
+        return ast.fix_missing_locations(ast.Module(body=body, type_ignores=[]))
+
+    def function(self, name, params, body):
+        return ast.FunctionDef(
+            name=name,
+            args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=param) for param in params], vararg=None,
+                               kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[]),
+            body=body, decorator_list=[], returns=None)
+
+    def compileFuncDecl(self, func_dec):
+        self.layout = resolve_function(func_dec)
+        names = [param_name for _, param_name in func_dec.params]
+        body = []
+        if len(set(names)) == len(names):
+            params = [variable(name) for name in names]
+        else:
+            # Parâmetros com nomes repetidos: o último argumento prevalece
+            params = [f"_p{index}" for index in range(len(names))]
+            last = {name: index for index, name in enumerate(names)}
+            for name, index in last.items():
+                body.append(store(variable(name), ast.Name(id=params[index], ctx=ast.Load())))
+        # Variáveis acessadas com guarda começam sem valor
+        for name in self.layout.guarded():
+            body.append(store(variable(name), ast.Constant(value=None)))
+        body.extend(self.compileStatement(func_dec.children[0]))
+        self.layout = None
+        return self.function(function_name(func_dec.func_name), params, body or [ast.Pass()])
+
+    def compileStatement(self, node):
+        # Retorna a lista de comandos Python equivalentes ao nó
+        method = getattr(self, 'compile' + type(node).__name__, None)
+        if method is None:
+            raise ValueError(f"Cannot compile node '{type(node).__name__}'")
+        if isinstance(node, FuncCall):
+            # Chamadas usadas como comando descartam o valor retornado
+            return [ast.Expr(value=method(node))]
+        return method(node)
+
+    def compileBlock(self, node):
+        return self.compileStatement(node) or [ast.Pass()]
+
+    def compileStatements(self, node):
+        statements = []
+        for child in node.children:
+            statements.extend(self.compileStatement(child))
+        return statements
+
+    def compileNoOp(self, node):
+        return []
+
+    def compileDeclaration(self, node):
+        statements = []
+        for index, (var_name, expr) in enumerate(node.declarations):
+            name = variable(var_name)
+            # Checa se a variável já foi declarada antes de avaliar a expressão
+            if self.layout.check(node, index) == GUARD:
+                statements.append(guard(name, ast.IsNot(), f"Variable '{var_name}' already declared."))
+            value = self.compileExpression(expr) if expr is not None else ast.Constant(value=DEFAULTS[node.var_type])
+            statements.append(store(name, value))
+        return statements
+
+    def compileAssign(self, node):
+        var_name = node.children[0].value
+        name = variable(var_name)
+        statements = []
+        if self.layout.check(node) == GUARD:
+            statements.append(guard(name, ast.Is(), f"Variable '{var_name}' not declared."))
+        statements.append(store(name, self.compileExpression(node.children[1])))
+        return statements
+
+    def compilePrint(self, node):
+        return [ast.Expr(value=call('_write', [self.compileExpression(node.children[0])]))]
+
+    def compileIf(self, node):
+        orelse = self.compileStatement(node.children[2]) if len(node.children) == 3 else []
+        return [ast.If(test=self.compileCondition(node.children[0]), body=self.compileBlock(node.children[1]), orelse=orelse)]
+
+    def compileWhile(self, node):
+        return [ast.While(test=self.compileCondition(node.children[0]), body=self.compileBlock(node.children[1]), orelse=[])]
+
+    def compileReturn(self, node):
+        return [ast.Return(value=self.compileExpression(node.children[0]))]
+
+    def compileExpression(self, node):
+        # Expressão cujo valor é usado: comparações e 'not' precisam resultar em 0 ou 1
+        return getattr(self, 'compile' + type(node).__name__)(node)
+
+    def compileCondition(self, node):
+        # Expressão em que só importa se o valor é verdadeiro: comparações ficam como bool do Python
+        if isinstance(node, BinOp) and node.value in COMPARISONS:
+            return self.comparison(node)
+        if isinstance(node, UnOp) and node.value == 'NOT':
+            return ast.UnaryOp(op=ast.Not(), operand=self.compileCondition(node.children[0]))
+        if isinstance(node, BinOp) and node.value in ('AND', 'OR') and safe(node.children[1], self.layout):
+            return self.boolOp(node, self.compileCondition)
+        return self.compileExpression(node)
+
+    def compileIntVal(self, node):
+        return ast.Constant(value=node.value)
+
+    compileStrVal = compileIntVal
+    compileBoolVal = compileIntVal
+
+    def compileIdentifier(self, node):
+        name = variable(node.value)
+        if self.layout is not None and self.layout.check(node) == GUARD:
+            # Declarada só em alguns caminhos: None indica que não foi declarada
+            return ast.IfExp(test=ast.Compare(left=load(name), ops=[ast.IsNot()], comparators=[ast.Constant(value=None)]),
+                             body=load(name), orelse=call('_undefined', [ast.Constant(value=node.value)]))
+        return load(name)
+
+    def compileScanf(self, node):
+        return call('_read_int', [])
+
+    def compileFuncCall(self, node):
+        return ast.Call(func=load(function_name(node.func_name)),
+                        args=[self.compileExpression(arg) for arg in node.children], keywords=[])
+
+    def compileUnOp(self, node):
+        op = node.value
+        if op == 'PLUS':
+            return self.compileExpression(node.children[0])
+        if op == 'MINUS':
+            return ast.UnaryOp(op=ast.USub(), operand=self.compileExpression(node.children[0]))
+        if op == 'NOT':
+            return ast.IfExp(test=self.compileCondition(node.children[0]), body=ast.Constant(value=0), orelse=ast.Constant(value=1))
+        raise ValueError(f"Unknown unary operator: {op}")
+
+    def compileBinOp(self, node):
+        op = node.value
+        left, right = node.children
+        if op in COMPARISONS:
+            return flag(self.comparison(node))
+        if op in ('AND', 'OR'):
+            if not safe(right, self.layout):
+                # O operando da direita pode ter efeitos ou levantar erro: avalia os dois antes
+                return call('_and' if op == 'AND' else '_or', [self.compileExpression(left), self.compileExpression(right)])
+            if is_flag(left) and is_flag(right):
+                return flag(self.boolOp(node, self.compileCondition))
+            # Com operandos int, 'and'/'or' do Python já resultam no int(left and right) do Evaluate
+            return self.boolOp(node, self.compileExpression)
+        if op == 'PLUS':
+            if self.types[node] == 'str':
+                # Concatenação de str vira Rope, linear em loops como s = s + x
+                return call('_concat', [self.compileExpression(left), self.compileExpression(right)])
+            return ast.BinOp(left=self.compileExpression(left), op=ast.Add(), right=self.compileExpression(right))
+        if op == 'MINUS':
+            return ast.BinOp(left=self.compileExpression(left), op=ast.Sub(), right=self.compileExpression(right))
+        if op == 'MULTIPLY':
+            return ast.BinOp(left=self.compileExpression(left), op=ast.Mult(), right=self.compileExpression(right))
+        if op == 'DIVIDE':
+            if isinstance(right, (IntVal, BoolVal)) and right.value != 0:
+                return ast.BinOp(left=self.compileExpression(left), op=ast.FloorDiv(), right=self.compileExpression(right))
+            return call('_divide', [self.compileExpression(left), self.compileExpression(right)])
+        raise ValueError(f"Unknown binary operator: {op}")
+
+    def comparison(self, node):
+        return ast.Compare(left=self.compileExpression(node.children[0]), ops=[COMPARISONS[node.value]()],
+                           comparators=[self.compileExpression(node.children[1])])
+
+    def boolOp(self, node, compile_operand):
+        return ast.BoolOp(op=ast.And() if node.value == 'AND' else ast.Or(),
+                          values=[compile_operand(child) for child in node.children])
+
+
+def variable(name):
+    return 'v_' + name
+
+
+def function_name(name):
+    return 'f_' + name
+
+
+def load(name):
+    return ast.Name(id=name, ctx=ast.Load())
+
+
+def store(name, value):
+    return ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=value)
+
+
+def call(name, args):
+    return ast.Call(func=load(name), args=args, keywords=[])
+
+
+def flag(test):
+    # 1 if test else 0: o valor 'bool' da linguagem, sem chamar int()
+    return ast.IfExp(test=test, body=ast.Constant(value=1), orelse=ast.Constant(value=0))
+
+
+def guard(name, op, message):
+    # if v_x is (not) None: raise ValueError(message)
+    return ast.If(test=ast.Compare(left=load(name), ops=[op], comparators=[ast.Constant(value=None)]),
+                  body=[ast.Raise(exc=call('ValueError', [ast.Constant(value=message)]), cause=None)], orelse=[])
+
+
+def is_flag(node):
+    # Expressões que sempre valem 0 ou 1
+    return (isinstance(node, BinOp) and node.value in COMPARISONS) or \
+        (isinstance(node, UnOp) and node.value == 'NOT') or isinstance(node, BoolVal)
+
+
+def safe(node, layout):
+    # Verdadeiro se avaliar a expressão não tem efeitos e não levanta erro,
+    # então o curto-circuito do 'and'/'or' do Python não muda o resultado
+    if isinstance(node, (IntVal, StrVal, BoolVal)):
+        return True
+    if isinstance(node, Identifier):
+        return layout is None or layout.check(node) == OK
+    if isinstance(node, UnOp):
+        return safe(node.children[0], layout)
+    if isinstance(node, BinOp):
+        right = node.children[1]
+        if node.value == 'DIVIDE' and not (isinstance(right, (IntVal, BoolVal)) and right.value != 0):
+            return False
+        return all(safe(child, layout) for child in node.children)
+    return False
+
+
+def transpile(program, types):
+    # Retorna o ast.Module gerado para a AST verificada pelo TypeChecker
+    return Transpiler(types).compileProgram(program)
+
+
+def source(module):
+    # Código Python gerado, para inspeção
+    return ast.unparse(module)
+
+
+def compile_program(program, types, io=None):
+    """Transpila o programa, compila com compile() e retorna a função que o executa.
+
+    O Python não compila alguns programas válidos na linguagem (mais de 20
+    laços aninhados, expressões aninhadas demais para o compilador); esses
+    rodam nas closures sem checagens de tipo, com o mesmo resultado.
+    """
+    io = io if io is not None else FuncTable.io
+    try:
+        code = compile(transpile(program, types), '<transpiled>', 'exec')
+    except (SyntaxError, RecursionError, MemoryError):
+        from closures import compile_program as compile_closures
+        return compile_closures(program, types, io)
+    namespace = {
+        '_write': io.write,
+        '_read_int': io.readInt,
+        '_concat': concat,
+        '_divide': _divide,
+        '_and': _and,
+        '_or': _or,
+        '_undefined': _undefined,
+    }
+    exec(code, namespace)
+    return namespace['_run']
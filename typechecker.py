@@ -0,0 +1,229 @@
+from arvore import *
+from resolver import *
+
+#Valores usados para descobrir o tipo do resultado chamando o próprio handler
+SAMPLES = {'int': 1, 'bool': 1, 'str': 's'}
+
+
+class TypeChecker:
+    """Verificação estática de tipos sobre a AST gerada por Parser.run.
+
+    Infere o tipo de cada expressão ('int', 'str', 'bool' ou 'void', para
+    chamadas de funções void) e guarda o resultado em types. O tipo de uma
+    operação é obtido chamando o handler do nó com valores de exemplo, então as
+    regras (e as mensagens de erro) são as mesmas do Evaluate. Todos os erros
+    encontrados ficam em errors, com o nome da função em que aparecem.
+
+    Um programa sem erros pode rodar sem as checagens de tipo em tempo de
+    execução. Por isso a verificação é mais estrita que o Evaluate em alguns
+    pontos: o tipo do return precisa ser o tipo da função (um 'bool' retornado
+    por uma função 'int' continuaria 'bool' no chamador), funções não void
+    precisam retornar em todos os caminhos, e valores de funções void não podem
+    ser usados em expressões.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.errors = []
+        self.functions = {}
+        self.function = None
+        self.layout = None
+        self.variables = {}
+
+    def error(self, error):
+        # Erros de tipo ficam com o nome da função onde aparecem
+        if self.function is not None:
+            error = type(error)(f"In function '{self.function.func_name}': {error}")
+        self.errors.append(error)
+
+    def checkProgram(self, program):
+        declared = []
+        for child in program.children:
+            if isinstance(child, FuncDecl):
+                if child.func_name in self.functions:
+                    self.error(ValueError(f"Function '{child.func_name}' already declared."))
+                    continue
+                self.functions[child.func_name] = child
+                declared.append(child)
+        for func_dec in declared:
+            self.checkFunction(func_dec)
+        for child in program.children:
+            if not isinstance(child, FuncDecl):
+                self.checkStatement(child)
+        return self.errors
+
+    def checkFunction(self, func_dec):
+        self.function = func_dec
+        self.layout = resolve_function(func_dec)
+        # Erros certos de declaração também impedem a execução
+        for error in self.layout.errors:
+            self.error(error)
+        # As variáveis são visíveis na função inteira, com o tipo da declaração
+        self.variables = {}
+        for param_type, param_name in func_dec.params:
+            self.variables[param_name] = param_type
+        self.collectVariables(func_dec.children[0])
+        self.checkStatement(func_dec.children[0])
+        if func_dec.func_type != 'void' and func_dec.func_name != 'main' and not self.returns(func_dec.children[0]):
+            self.error(ValueError(f"Function '{func_dec.func_name}' should return a value on every path."))
+        self.function = None
+        self.layout = None
+
+    def collectVariables(self, node):
+        if isinstance(node, Declaration):
+            for var_name, _ in node.declarations:
+                var_type = self.variables.setdefault(var_name, node.var_type)
+                if var_type != node.var_type:
+                    self.error(TypeError(f"Variable '{var_name}' declared as both '{var_type}' and '{node.var_type}'."))
+        for child in node.children:
+            self.collectVariables(child)
+
+    def returns(self, node):
+        # Verdadeiro se o comando sempre termina em um return
+        if isinstance(node, Return):
+            return True
+        if isinstance(node, Statements):
+            return any(self.returns(child) for child in node.children)
+        if isinstance(node, If) and len(node.children) == 3:
+            return self.returns(node.children[1]) and self.returns(node.children[2])
+        return False
+
+    def fallsThrough(self, func_dec):
+        # Verdadeiro se uma chamada à função pode terminar sem return
+        return not self.returns(func_dec.children[0])
+
+    def checkStatement(self, node):
+        if isinstance(node, Statements):
+            for child in node.children:
+                self.checkStatement(child)
+        elif isinstance(node, Declaration):
+            for var_name, expr in node.declarations:
+                if expr is not None:
+                    self.checkAssignable(self.checkExpression(expr), node.var_type)
+        elif isinstance(node, Assign):
+            value_type = self.checkExpression(node.children[1])
+            self.checkAssignable(value_type, self.variables.get(node.children[0].value))
+        elif isinstance(node, Print):
+            self.checkExpression(node.children[0])
+        elif isinstance(node, If):
+            self.checkCondition(node.children[0], 'if')
+            for child in node.children[1:]:
+                self.checkStatement(child)
+        elif isinstance(node, While):
+            self.checkCondition(node.children[0], 'while')
+            self.checkStatement(node.children[1])
+        elif isinstance(node, Return):
+            self.checkReturn(node)
+        elif isinstance(node, FuncCall):
+            self.checkExpression(node)
+
+    def checkAssignable(self, value_type, expected_type):
+        # Mesma regra do Evaluate: tipos iguais ou conversão implícita de bool para int
+        if value_type is None or expected_type is None:
+            return
+        if value_type != expected_type and not (expected_type == 'int' and value_type == 'bool'):
+            self.error(TypeError(f"Cannot assign '{value_type}' to '{expected_type}'."))
+
+    def checkCondition(self, node, statement):
+        condition_type = self.checkExpression(node)
+        if condition_type is not None and condition_type != 'bool':
+            self.error(TypeError(f"Condition in '{statement}' must be 'bool', got '{condition_type}'"))
+
+    def checkReturn(self, node):
+        value_type = self.checkExpression(node.children[0])
+        func_dec = self.function
+        if func_dec is None or value_type is None:
+            return
+        if value_type == 'void':
+            self.error(TypeError("Cannot return the result of a void function."))
+        elif func_dec.func_type == 'void':
+            if func_dec.func_name != 'main':
+                self.error(ValueError(f"Function '{func_dec.func_name}' should not return a value."))
+        elif value_type != func_dec.func_type:
+            self.error(TypeError(f"Function '{func_dec.func_name}' must return '{func_dec.func_type}', got '{value_type}'."))
+
+    def checkExpression(self, node):
+        # Retorna o tipo da expressão, ou None se ele não pode ser determinado por um erro
+        method = getattr(self, 'check' + type(node).__name__)
+        value_type = method(node)
+        self.types[node] = value_type
+        return value_type
+
+    def checkIntVal(self, node):
+        return 'int'
+
+    def checkStrVal(self, node):
+        return 'str'
+
+    def checkBoolVal(self, node):
+        return 'bool'
+
+    def checkScanf(self, node):
+        return 'int'
+
+    def checkIdentifier(self, node):
+        check = self.layout.check(node) if self.layout is not None else OK
+        if isinstance(check, Exception):
+            # O erro já foi registrado a partir do Resolver
+            return None
+        return self.variables.get(node.value)
+
+    def checkBinOp(self, node):
+        left_type = self.checkExpression(node.children[0])
+        right_type = self.checkExpression(node.children[1])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            self.error(error)
+            return None
+        if left_type is None or right_type is None:
+            return None
+        if left_type == 'void' or right_type == 'void':
+            self.error(TypeError(f"Unsupported operands for operation: '{left_type}' and '{right_type}'"))
+            return None
+        try:
+            return handler(SAMPLES[left_type], left_type, SAMPLES[right_type], right_type)[1]
+        except TypeError as error:
+            self.error(error)
+            return None
+
+    def checkUnOp(self, node):
+        value_type = self.checkExpression(node.children[0])
+        try:
+            handler = node.getHandler()
+        except ValueError as error:
+            self.error(error)
+            return None
+        if value_type is None:
+            return None
+        if value_type == 'void':
+            self.error(TypeError(f"Unary operator not supported for type '{value_type}'"))
+            return None
+        try:
+            return handler(SAMPLES[value_type], value_type)[1]
+        except TypeError as error:
+            self.error(error)
+            return None
+
+    def checkFuncCall(self, node):
+        arg_types = [self.checkExpression(arg) for arg in node.children]
+        func_dec = self.functions.get(node.func_name)
+        if func_dec is None:
+            self.error(ValueError(f"Function '{node.func_name}' not declared."))
+            return None
+        if len(arg_types) != len(func_dec.params):
+            self.error(ValueError(f"Function '{node.func_name}' expects {len(func_dec.params)} arguments, got {len(arg_types)}."))
+            return None
+        for (param_type, param_name), arg_type in zip(func_dec.params, arg_types):
+            if arg_type is not None and arg_type != param_type and not (param_type == 'int' and arg_type == 'bool'):
+                self.error(TypeError(f"Type mismatch in function '{node.func_name}' argument '{param_name}': expected '{param_type}', got '{arg_type}'."))
+        # main pode terminar sem return; nesse caso a chamada não tem valor
+        if func_dec.func_name == 'main' and self.fallsThrough(func_dec):
+            return 'void'
+        return func_dec.func_type
+
+
+def type_check(program):
+    # Retorna o TypeChecker (com os tipos de cada expressão) e a lista de erros
+    checker = TypeChecker()
+    return checker, checker.checkProgram(program)
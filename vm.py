@@ -0,0 +1,275 @@
+from bytecode import *
+from classes import FuncTable
+
+#Profundidade máxima de chamadas do programa interpretado. Os quadros ficam numa
+#lista da VM, então o limite não depende do limite de recursão do Python
+DEFAULT_MAX_DEPTH = 100000
+
+#Como VM.resume para: programa terminou, passos esgotados ou scanf sem entrada disponível
+FINISHED = 'finished'
+PAUSED = 'paused'
+WAITING_INPUT = 'waiting input'
+
+
+class Execution:
+    """Estado de um programa na VM, que pode parar e continuar depois (VM.resume).
+
+    steps conta as instruções executadas; result é o valor de retorno do
+    ponto de entrada quando o programa termina.
+    """
+    __slots__ = ('stack', 'frames', 'func', 'pc', 'slots', 'steps', 'result')
+
+    def __init__(self, entry):
+        # Pilha de valores compartilhada entre os quadros, com tuplas (valor, tipo)
+        self.stack = []
+        # Quadros suspensos: (código, pc, slots das variáveis)
+        self.frames = []
+        self.func = entry
+        self.pc = 0
+        self.slots = []
+        self.steps = 0
+        self.result = None
+
+
+class VM:
+    def __init__(self, program, max_depth=DEFAULT_MAX_DEPTH, tail_calls=False, io=None):
+        # Compila o programa para bytecode
+        self.entry, self.errors = compile_program(program, tail_calls)
+        self.entry.emit(RETURN_NONE)
+        self.max_depth = max_depth
+        # Entrada e saída de printf/scanf, por padrão as mesmas do FuncTable
+        self.io = io if io is not None else FuncTable.io
+
+    def run(self):
+        execution = self.start()
+        self.resume(execution)
+        return execution.result
+
+    def start(self):
+        # Erros de carga (funções duplicadas) acontecem antes de main, como no Evaluate
+        if self.errors:
+            raise self.errors[0]
+        return Execution(self.entry)
+
+    def execute(self, entry):
+        execution = Execution(entry)
+        self.resume(execution)
+        return execution.result
+
+    def resume(self, execution, budget=None):
+        """Continua a execução e retorna FINISHED, PAUSED ou WAITING_INPUT.
+
+        Com budget, para em PAUSED depois de cerca de budget instruções: a
+        contagem é feita nos desvios e nas chamadas, então a parada acontece no
+        primeiro JUMP, CALL ou TAIL_CALL depois de esgotar o limite, e todo laço
+        ou recursão passa por um deles. Quando io.readInt() retorna None (entrada
+        assíncrona ainda não disponível), para em WAITING_INPUT antes do scanf,
+        que é executado de novo no próximo resume.
+        """
+        stack = execution.stack
+        push = stack.append
+        pop = stack.pop
+        frames = execution.frames
+        max_depth = self.max_depth
+        write = self.io.write
+        read_int = self.io.readInt
+        func = execution.func
+        code = func.code
+        consts = func.consts
+        names = func.names
+        slots = execution.slots
+        pc = execution.pc
+        # Posições já executadas (duas por instrução), contadas até mark
+        executed = execution.steps * 2
+        mark = pc
+        limit = executed + budget * 2 if budget is not None else None
+
+        try:
+            while True:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+
+                if op == LOAD:
+                    push(slots[arg])
+                elif op == CONST:
+                    push(consts[arg])
+                elif op == BINARY_LESS:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (int(left[0] < right[0]), 'bool')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == BINARY_ADD:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (left[0] + right[0], 'int')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == WHILE_FALSE:
+                    value, value_type = pop()
+                    if value_type != 'bool':
+                        raise TypeError(f"Condition in 'while' must be 'bool', got '{value_type}'")
+                    if not value:
+                        executed += pc - mark
+                        pc = mark = arg
+                elif op == JUMP:
+                    executed += pc - mark
+                    pc = mark = arg
+                    if limit is not None and executed >= limit:
+                        execution.func, execution.pc, execution.slots, execution.steps = func, pc, slots, executed // 2
+                        return PAUSED
+                elif op == STORE:
+                    result = pop()
+                    expected_type = slots[arg][1]
+                    # Checagem de tipo e conversão implícita
+                    if result[1] != expected_type:
+                        if expected_type == 'int' and result[1] == 'bool':
+                            result = (int(result[0]), 'int')
+                        else:
+                            raise TypeError(f"Cannot assign '{result[1]}' to '{expected_type}'.")
+                    slots[arg] = result
+                elif op == IF_FALSE:
+                    value, value_type = pop()
+                    if value_type != 'bool':
+                        raise TypeError(f"Condition in 'if' must be 'bool', got '{value_type}'")
+                    if not value:
+                        executed += pc - mark
+                        pc = mark = arg
+                elif op == BINARY_SUB:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (left[0] - right[0], 'int')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == BINARY_MUL:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (left[0] * right[0], 'int')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == BINARY_GREATER:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (int(left[0] > right[0]), 'bool')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == BINARY_EQUALS:
+                    right = pop()
+                    left = stack[-1]
+                    if left[1] == 'int' and right[1] == 'int':
+                        stack[-1] = (int(left[0] == right[0]), 'bool')
+                    else:
+                        stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == BINARY:
+                    right = pop()
+                    left = stack[-1]
+                    stack[-1] = consts[arg](left[0], left[1], right[0], right[1])
+                elif op == UNARY:
+                    value = stack[-1]
+                    stack[-1] = consts[arg](value[0], value[1])
+                elif op == CALL or op == TAIL_CALL:
+                    callee, argc = consts[arg]
+                    # Desempilha os argumentos e cria o escopo da função
+                    args = stack[len(stack) - argc:]
+                    del stack[len(stack) - argc:]
+                    for index, (param_type, param_name) in enumerate(callee.params):
+                        if param_type != args[index][1]:
+                            # Conversão implícita de bool para int
+                            if param_type == 'int' and args[index][1] == 'bool':
+                                args[index] = (int(args[index][0]), 'int')
+                            else:
+                                raise TypeError(f"Type mismatch in function '{callee.name}' argument '{param_name}': expected '{param_type}', got '{args[index][1]}'.")
+                    # Os argumentos formam o início do frame da função
+                    if callee.padding is not None:
+                        callee_slots = args + callee.padding
+                    else:
+                        callee_slots = [None] * len(callee.names)
+                        for slot, result in zip(callee.param_slots, args):
+                            callee_slots[slot] = result
+                    # Salva o quadro atual e entra na função; a chamada final substitui o quadro atual
+                    if op == CALL:
+                        if len(frames) >= max_depth:
+                            raise RecursionError("maximum recursion depth exceeded")
+                        frames.append((func, pc, slots))
+                    executed += pc - mark
+                    func = callee
+                    code = func.code
+                    consts = func.consts
+                    names = func.names
+                    slots = callee_slots
+                    pc = mark = 0
+                    if limit is not None and executed >= limit:
+                        execution.func, execution.pc, execution.slots, execution.steps = func, pc, slots, executed // 2
+                        return PAUSED
+                elif op == RETURN or op == RETURN_NONE:
+                    if op == RETURN:
+                        result = pop()
+                        if func.func_type == 'void' and func.name != 'main':
+                            raise ValueError(f"Function '{func.name}' should not return a value.")
+                    else:
+                        if func.func_type != 'void' and func.name != 'main':
+                            raise ValueError(f"Function '{func.name}' should return a value.")
+                        result = (None, None)
+                    executed += pc - mark
+                    if not frames:
+                        execution.result = result
+                        execution.func, execution.pc, execution.slots, execution.steps = func, pc, slots, executed // 2
+                        return FINISHED
+                    # Restaura o quadro de quem chamou
+                    func, pc, slots = frames.pop()
+                    mark = pc
+                    code = func.code
+                    consts = func.consts
+                    names = func.names
+                    push(result)
+                elif op == POP:
+                    pop()
+                elif op == DECLARE:
+                    slot, var_type = consts[arg]
+                    result = pop()
+                    # Checagem de tipo e conversão implícita
+                    if result[1] != var_type:
+                        if var_type == 'int' and result[1] == 'bool':
+                            result = (int(result[0]), 'int')
+                        else:
+                            raise TypeError(f"Cannot assign '{result[1]}' to '{var_type}'.")
+                    slots[slot] = result
+                elif op == DECLARE_DEFAULT:
+                    slot, var_type = consts[arg]
+                    slots[slot] = ({'int': 0, 'str': ''}[var_type], var_type)
+                elif op == LOAD_CHECK:
+                    if slots[arg] is None:
+                        raise ValueError(f"Undefined variable '{names[arg]}'")
+                    push(slots[arg])
+                elif op == ASSIGN_CHECK:
+                    if slots[arg] is None:
+                        raise ValueError(f"Variable '{names[arg]}' not declared.")
+                elif op == DECL_CHECK:
+                    if slots[arg] is not None:
+                        raise ValueError(f"Variable '{names[arg]}' already declared.")
+                elif op == PRINT:
+                    write(pop()[0])
+                elif op == SCANF:
+                    value = read_int()
+                    if value is None:
+                        # Entrada ainda não disponível: para antes do scanf
+                        pc -= 2
+                        executed += pc - mark
+                        execution.func, execution.pc, execution.slots, execution.steps = func, pc, slots, executed // 2
+                        return WAITING_INPUT
+                    push((value, 'int'))
+                elif op == RAISE:
+                    error_class, message = consts[arg]
+                    raise error_class(message)
+                else:
+                    raise ValueError(f"Unknown opcode: {op}")
+        except BaseException:
+            # Erro do programa: conta também a instrução que falhou
+            execution.steps = (executed + pc - mark) // 2
+            raise